@@ -5,6 +5,7 @@ from prompt_toolkit.cache import SimpleCache
 from prompt_toolkit.clipboard import Clipboard, InMemoryClipboard
 from prompt_toolkit.enums import EditingMode
 from prompt_toolkit.eventloop import get_event_loop, ensure_future, Return, run_in_executor, run_until_complete, call_from_executor, From
+from prompt_toolkit.eventloop.executor import HIGH_PRIORITY
 from prompt_toolkit.eventloop.base import get_traceback_from_context
 from prompt_toolkit.filters import to_filter, Condition
 from prompt_toolkit.input.base import Input
@@ -17,11 +18,13 @@ from prompt_toolkit.key_binding.key_processor import KeyProcessor
 from prompt_toolkit.key_binding.emacs_state import EmacsState
 from prompt_toolkit.key_binding.vi_state import ViState
 from prompt_toolkit.keys import Keys
-from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.layout.containers import Window
+from prompt_toolkit.layout.controls import BufferControl, UIControl
 from prompt_toolkit.layout.dummy import create_dummy_layout
 from prompt_toolkit.layout.layout import Layout, walk
 from prompt_toolkit.output import Output, ColorDepth
 from prompt_toolkit.output.defaults import get_default_output
+from prompt_toolkit.profiling import RenderProfiler
 from prompt_toolkit.renderer import Renderer, print_formatted_text
 from prompt_toolkit.search import SearchState
 from prompt_toolkit.styles import BaseStyle, default_ui_style, default_pygments_style, merge_styles, DynamicStyle, DummyStyle, StyleTransformation, DummyStyleTransformation
@@ -76,6 +79,15 @@ class Application(object):
     :param max_render_postpone_time: When there is high CPU (a lot of other
         scheduled calls), postpone the rendering max x seconds.  '0' means:
         don't postpone. '.5' means: try to draw at least twice a second.
+    :param max_fps: Maximum number of redraws per second, or `None`. All the
+        `invalidate` calls that arrive within one frame result in one redraw.
+        When rendering takes longer than one frame, the frame rate is lowered
+        further, so that at least as much time remains for other work as is
+        spent on rendering.
+    :param render_profiler: :class:`~prompt_toolkit.profiling.RenderProfiler`
+        instance or `None`. When given, the timings of every rendered frame
+        are recorded. (This can be changed later by setting the
+        `render_profiler` attribute.)
 
     Filters:
 
@@ -126,6 +138,8 @@ class Application(object):
                  reverse_vi_search_direction=False,
                  min_redraw_interval=None,
                  max_render_postpone_time=0,
+                 max_fps=None,
+                 render_profiler=None,
 
                  on_reset=None, on_invalidate=None,
                  before_render=None, after_render=None,
@@ -156,6 +170,8 @@ class Application(object):
         assert isinstance(erase_when_done, bool)
         assert min_redraw_interval is None or isinstance(min_redraw_interval, (float, int))
         assert max_render_postpone_time is None or isinstance(max_render_postpone_time, (float, int))
+        assert max_fps is None or (isinstance(max_fps, (float, int)) and max_fps > 0)
+        assert render_profiler is None or isinstance(render_profiler, RenderProfiler)
 
         assert on_reset is None or callable(on_reset)
         assert on_invalidate is None or callable(on_invalidate)
@@ -192,6 +208,8 @@ class Application(object):
         self.enable_page_navigation_bindings = enable_page_navigation_bindings
         self.min_redraw_interval = min_redraw_interval
         self.max_render_postpone_time = max_render_postpone_time
+        self.max_fps = max_fps
+        self.render_profiler = render_profiler
 
         # Events.
         self.on_invalidate = Event(self, on_invalidate)
@@ -254,7 +272,17 @@ class Application(object):
         self._invalidated = False
         self._invalidate_events = []  # Collection of 'invalidate' Event objects.
         self._last_redraw_time = 0  # Unix timestamp of last redraw. Used when
-                                    # `min_redraw_interval` is given.
+                                    # `min_redraw_interval` or `max_fps` is given.
+        self._last_render_duration = 0  # Time that the last redraw took.
+
+        # Idle mode. When set, invalidations don't render until idle mode is
+        # left again.
+        self._idle = False
+        self._redraw_postponed = False
+
+        # When only some windows need to be repainted, the set of windows.
+        # `None` means: repaint everything.
+        self._invalidated_windows = None
 
         #: The `InputProcessor` instance.
         self.key_processor = KeyProcessor(_CombinedRegistry(self))
@@ -363,17 +391,69 @@ class Application(object):
         # Never schedule a second redraw, when a previous one has not yet been
         # executed. (This should protect against other threads calling
         # 'invalidate' many times, resulting in 100% CPU.)
+        # If only some windows were scheduled for a repaint, repaint
+        # everything instead.
+        self._invalidated_windows = None
+
         if self._invalidated:
             return
         else:
             self._invalidated = True
 
+        self._schedule_redraw()
+
+    def invalidate_window(self, window):
+        """
+        Thread safe way of repainting only the given
+        :class:`~prompt_toolkit.layout.Window`. (Or the windows that display
+        the given :class:`~prompt_toolkit.layout.UIControl`.)
+
+        The window is drawn again at the position where it was drawn before,
+        without computing the whole layout again. Use this for changes that
+        only affect the content of this window, like a progress indicator
+        that ticks. When the layout needs to change (because of a resize, or
+        because the window reports different dimensions), this falls back to
+        repainting everything.
+        """
+        if isinstance(window, UIControl):
+            windows = [w for w in self.layout.find_all_windows() if w.content == window]
+        else:
+            assert isinstance(window, Window)
+            windows = [window]
+
+        if self._invalidated:
+            # A repaint has already been scheduled. Add these windows, unless
+            # everything is going to be repainted anyway.
+            if self._invalidated_windows is not None:
+                self._invalidated_windows.update(windows)
+            return
+        else:
+            self._invalidated = True
+            self._invalidated_windows = set(windows)
+
+        self._schedule_redraw()
+
+    def _schedule_redraw(self):
+        """
+        Schedule a redraw for `invalidate` and `invalidate_window`.
+        """
         # Trigger event.
         self.on_invalidate.fire()
 
+        # In idle mode, render when idle mode is left.
+        if self._idle:
+            self._redraw_postponed = True
+            return
+
         def redraw():
+            if self._idle:
+                self._redraw_postponed = True
+                return
+
+            windows = self._invalidated_windows
             self._invalidated = False
-            self._redraw()
+            self._invalidated_windows = None
+            self._redraw(windows=windows)
 
         def schedule_redraw():
             # Call redraw in the eventloop (thread safe).
@@ -388,36 +468,71 @@ class Application(object):
             call_from_executor(
                 redraw, _max_postpone_until=_max_postpone_until)
 
-        if self.min_redraw_interval:
+        redraw_interval = self._get_redraw_interval()
+
+        if redraw_interval:
             # When a minimum redraw interval is set, wait minimum this amount
-            # of time between redraws.
+            # of time between redraws. All invalidations in the meantime are
+            # handled by this one redraw.
             diff = time.time() - self._last_redraw_time
-            if diff < self.min_redraw_interval:
-                def redraw_in_future():
-                    time.sleep(self.min_redraw_interval - diff)
-                    schedule_redraw()
-                run_in_executor(redraw_in_future)
+            if diff < redraw_interval:
+                get_event_loop().call_later(redraw_interval - diff, redraw)
             else:
                 schedule_redraw()
         else:
             schedule_redraw()
 
+    def _get_redraw_interval(self):
+        """
+        Minimum number of seconds between the start of two redraws.
+        """
+        interval = self.min_redraw_interval or 0
+
+        if self.max_fps:
+            frame_time = 1. / self.max_fps
+            interval = max(interval, frame_time)
+
+            # Back off when rendering doesn't fit in one frame.
+            if self._last_render_duration > frame_time:
+                interval = max(interval, 2 * self._last_render_duration)
+
+        return interval
+
     @property
     def invalidated(self):
         " True when a redraw operation has been scheduled. "
         return self._invalidated
 
-    def _redraw(self, render_as_done=False):
+    @property
+    def idle(self):
+        """
+        Idle mode. Set this to `True` when the output is not visible. (Like a
+        detached session, or a hidden window.) `invalidate` calls will not
+        render anything until this is set to `False` again, and then, they
+        will result in one redraw. (Thread safe.)
+        """
+        return self._idle
+
+    @idle.setter
+    def idle(self, value):
+        self._idle = bool(value)
+
+        # Leaving idle mode: render what was invalidated in the meantime.
+        if not value and self._redraw_postponed:
+            self._redraw_postponed = False
+            self._schedule_redraw()
+
+    def _redraw(self, render_as_done=False, windows=None):
         """
         Render the command line again. (Not thread safe!) (From other threads,
         or if unsure, use :meth:`.Application.invalidate`.)
 
         :param render_as_done: make sure to put the cursor after the UI.
+        :param windows: When given, try to render only these windows.
         """
         # Only draw when no sub application was started.
         if self._is_running and not self._running_in_terminal:
-            if self.min_redraw_interval:
-                self._last_redraw_time = time.time()
+            self._last_redraw_time = start_time = time.time()
 
             # Clear the 'rendered_ui_controls' list. (The `Window` class will
             # populate this during the next rendering.)
@@ -441,7 +556,7 @@ class Application(object):
                         # Draw in 'done' state and reset renderer.
                         self.renderer.render(self, self.layout, is_done=render_as_done)
                 else:
-                    self.renderer.render(self, self.layout)
+                    self.renderer.render(self, self.layout, windows=windows)
 
             self.layout.update_parents_relations()
 
@@ -450,6 +565,8 @@ class Application(object):
 
             self._update_invalidate_events()
 
+            self._last_render_duration = time.time() - start_time
+
     def _update_invalidate_events(self):
         """
         Make sure to attach 'invalidate' handlers to all invalidate events in
@@ -531,6 +648,7 @@ class Application(object):
             # when any subsequent input is received, a new timer is started and
             # the current timer will be ignored.
             flush_counter = [0]  # Non local.
+            flush_timer = [None]  # `TimerHandle` of the auto flush. (Non local.)
 
             # Reset.
             self.reset()
@@ -564,18 +682,20 @@ class Application(object):
                     counter = flush_counter[0]
 
                     # Automatically flush keys.
-                    # (_daemon needs to be set, otherwise, this will hang the
-                    # application for .5 seconds before exiting.)
-                    run_in_executor(
-                        lambda: auto_flush_input(counter), _daemon=True)
+                    # (Cancel the timer of the previous read. Only the last
+                    # one can still flush.)
+                    if flush_timer[0] is not None:
+                        flush_timer[0].cancel()
+                    flush_timer[0] = loop.call_later(
+                        self.ttimeoutlen, lambda: auto_flush_input(counter))
 
             def auto_flush_input(counter):
                 # Flush input after timeout.
                 # (Used for flushing the enter key.)
-                time.sleep(self.ttimeoutlen)
+                flush_timer[0] = None
 
                 if flush_counter[0] == counter:
-                    call_from_executor(flush_input)
+                    flush_input()
 
             def flush_input():
                 if not self.is_done:
@@ -617,6 +737,10 @@ class Application(object):
                             # yield.
                             self._is_running = False
 
+                            # Don't flush the input anymore.
+                            if flush_timer[0] is not None:
+                                flush_timer[0].cancel()
+
                             # Detach event handlers for invalidate events.
                             # (Important when a UIControl is embedded in
                             # multiple applications, like ptterm in pymux. An
@@ -782,7 +906,7 @@ class Application(object):
                 p = Popen(command, shell=True,
                           stdin=input_fd, stdout=output_fd)
                 p.wait()
-            yield run_in_executor(run_command)
+            yield run_in_executor(run_command, _priority=HIGH_PRIORITY)
 
             # Wait for the user to press enter.
             if wait_for_enter:
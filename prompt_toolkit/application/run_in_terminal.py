@@ -3,6 +3,7 @@ Tools for running functions on the terminal above the current application or pro
 """
 from __future__ import unicode_literals
 from prompt_toolkit.eventloop import get_event_loop, ensure_future, Return, run_in_executor, From, Future
+from prompt_toolkit.eventloop.executor import HIGH_PRIORITY
 from .current import get_app
 
 __all__ = [
@@ -31,7 +32,7 @@ def run_in_terminal(func, render_cli_done=False, in_executor=False):
     """
     if in_executor:
         def async_func():
-            f = run_in_executor(func)
+            f = run_in_executor(func, _priority=HIGH_PRIORITY)
             return f
     else:
         def async_func():
@@ -106,20 +106,45 @@ class DummyAutoSuggest(AutoSuggest):
 class AutoSuggestFromHistory(AutoSuggest):
     """
     Give suggestions based on the lines in the history.
+
+    The most recent matching line is found through the index of the history.
+    When the user types more characters of the current suggestion, the
+    previous result is reused.
     """
+    # (history, history length, text, line) of the previous search. (A class
+    # attribute, so that it also exists for subclasses that don't call
+    # `__init__`.)
+    _previous = None
+
     def get_suggestion(self, buffer, document):
         history = buffer.history
 
         # Consider only the last line for the suggestion.
-        text = document.text.rsplit('\n', 1)[-1]
+        text = document.lines[-1]
 
         # Only create a suggestion when this is not an empty line.
         if text.strip():
-            # Find first matching line in history.
-            for string in reversed(list(history.get_strings())):
-                for line in reversed(string.splitlines()):
-                    if line.startswith(text):
-                        return Suggestion(line[len(text):])
+            line = self._find_line(history, text)
+            if line is not None:
+                return Suggestion(line[len(text):])
+
+    def _find_line(self, history, text):
+        " Return the most recent line in the history that starts with `text`. "
+        history_length = len(history.get_strings())
+        previous = self._previous
+
+        # When the history didn't change and the text was extended, the
+        # previous result is still valid if it matches the new text. (It was
+        # the most recent line starting with the shorter text.)
+        if (previous is not None and previous[0] is history and
+                previous[1] == history_length and text.startswith(previous[2])):
+            line = previous[3]
+            if line is None or line.startswith(text):
+                return line
+
+        line = history.find_line_with_prefix(text)
+        self._previous = (history, history_length, text, line)
+        return line
 
 
 class ConditionalAutoSuggest(AutoSuggest):
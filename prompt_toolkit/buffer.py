@@ -10,16 +10,19 @@ from .auto_suggest import AutoSuggest
 from .cache import FastDictCache
 from .clipboard import ClipboardData
 from .completion import CompleteEvent, get_common_complete_suffix, Completer, Completion, DummyCompleter
-from .document import Document
+from .document import Document, _edit_document
 from .eventloop import ensure_future, Return, From, consume_async_generator
 from .filters import to_filter
-from .history import History, InMemoryHistory
+from .history import History, InMemoryHistory, _string_matches
+from .rope import Rope
 from .search import SearchDirection, SearchState
 from .selection import SelectionType, SelectionState, PasteMode
 from .utils import Event, test_callable_args, to_str
 from .validation import ValidationError, Validator
 
+from collections import deque
 from functools import wraps
+from itertools import chain
 from six.moves import range
 
 import os
@@ -38,6 +41,12 @@ __all__ = [
 ]
 
 
+# While completions are still being generated, stop firing change events
+# (which redraw the menu) once there are this many completions. One more event
+# is fired when all completions are there.
+_MAX_COMPLETIONS_UPDATED_WHILE_LOADING = 1000
+
+
 class EditReadOnlyBuffer(Exception):
     " Attempt editing of read-only :class:`.Buffer`. "
 
@@ -179,6 +188,17 @@ class Buffer(object):
     :param multiline: :class:`~prompt_toolkit.filters.Filter` or `bool`. When
         not set, pressing `Enter` will call the `accept_handler`.  Otherwise,
         pressing `Esc-Enter` is required.
+    :param use_rope: When True, store the text in a
+        :class:`~prompt_toolkit.rope.Rope`. Inserting and deleting text, and
+        the line queries of the `Document` become O(log n), which makes
+        editing very big texts fast. The text is only turned into a string
+        when it is accessed.
+    :param max_undo_entries: Maximum number of entries on the undo stack, or
+        `None` for no limit. The oldest entries are dropped first.
+    :param max_undo_size: Maximum number of characters stored by the undo
+        stack, or `None` for no limit. (The undo stack stores the differences
+        between consecutive states, so this is usually much less than the
+        size of all the texts together.)
     """
     def __init__(self, completer=None, auto_suggest=None, history=None,
                  validator=None, tempfile_suffix='', name='',
@@ -187,7 +207,8 @@ class Buffer(object):
                  accept_handler=None, read_only=False, multiline=True,
                  on_text_changed=None, on_text_insert=None,
                  on_cursor_position_changed=None, on_completions_changed=None,
-                 on_suggestion_set=None):
+                 on_suggestion_set=None, use_rope=False,
+                 max_undo_entries=None, max_undo_size=None):
 
         # Accept both filters and booleans as input.
         enable_history_search = to_filter(enable_history_search)
@@ -209,6 +230,8 @@ class Buffer(object):
         assert on_completions_changed is None or callable(on_completions_changed)
         assert on_suggestion_set is None or callable(on_suggestion_set)
         assert document is None or isinstance(document, Document)
+        assert max_undo_entries is None or max_undo_entries > 0
+        assert max_undo_size is None or max_undo_size > 0
         assert accept_handler is None or (callable(accept_handler) and test_callable_args(accept_handler, [None]))
 
         self.completer = completer or DummyCompleter()
@@ -224,6 +247,9 @@ class Buffer(object):
         self.enable_history_search = enable_history_search
         self.read_only = read_only
         self.multiline = multiline
+        self.use_rope = use_rope
+        self.max_undo_entries = max_undo_entries
+        self.max_undo_size = max_undo_size
 
         # Text width. (For wrapping, used by the Vi 'gq' operator.)
         self.text_width = 0
@@ -258,6 +284,9 @@ class Buffer(object):
             # Insert the new string into `_working_lines`.
             self._working_lines.insert(0, self.history.get_strings()[0])
             self.__working_index += 1
+            self._history_count += 1
+            self._edited_history_indexes = set(
+                i + 1 for i in self._edited_history_indexes)
 
         self.history.get_item_loaded_event().add_handler(new_history_item)
         self.history.start_loading()
@@ -316,37 +345,57 @@ class Buffer(object):
         self.history_search_text = None
 
         # Undo/redo stacks
-        self._undo_stack = []  # Stack of (text, cursor_position)
-        self._redo_stack = []
+        self._undo_stack = _UndoStack(self.max_undo_entries, self.max_undo_size)
+        self._redo_stack = _UndoStack(self.max_undo_entries, self.max_undo_size)
 
         #: The working lines. Similar to history, except that this can be
         #: modified. The user can press arrow_up and edit previous entries.
         #: Ctrl-C should reset this, and copy the whole history back in here.
         #: Enter should process the current command and append to the real
         #: history.
-        self._working_lines = self.history.get_strings()[:]
-        self._working_lines.append(document.text)
+        strings = self.history.get_strings()
+        if isinstance(strings, list):
+            self._working_lines = strings[:]
+        else:
+            # Lazily loaded history. Don't copy (and load) all the strings.
+            self._working_lines = _WorkingLines(strings[:])
+        self._working_lines.append(
+            document.rope if document.rope is not None else document.text)
         self.__working_index = len(self._working_lines) - 1
 
+        # The first `_history_count` working lines correspond with the strings
+        # of the history, except for the ones that have been edited.
+        self._history_count = len(strings)
+        self._edited_history_indexes = set()
+
     # <getters/setters>
 
     def _set_text(self, value):
-        """ set text at current working_index. Return whether it changed. """
+        """ set text at current working_index. Return whether it changed.
+        (`value` can be a string or a `Rope`.) """
         working_index = self.working_index
         working_lines = self._working_lines
 
+        if self.use_rope and not isinstance(value, Rope):
+            value = Rope(value)
+
         original_value = working_lines[working_index]
         working_lines[working_index] = value
 
+        if working_index < self._history_count:
+            self._edited_history_indexes.add(working_index)
+
         # Return True when this text has been changed.
-        if len(value) != len(original_value):
+        if value is original_value:
+            return False
+        elif len(value) != len(original_value):
             # For Python 2, it seems that when two strings have a different
             # length and one is a prefix of the other, Python still scans
             # character by character to see whether the strings are different.
             # (Some benchmarking showed significant differences for big
             # documents. >100,000 of lines.)
             return True
-        elif value != original_value:
+        elif _text_of(value) != _text_of(original_value):
             return True
         return False
 
@@ -359,7 +408,7 @@ class Buffer(object):
 
     @property
     def text(self):
-        return self._working_lines[self.working_index]
+        return _text_of(self._working_lines[self.working_index])
 
     @text.setter
     def text(self, value):
@@ -401,8 +450,10 @@ class Buffer(object):
         assert isinstance(value, int)
 
         # Ensure cursor position is within the size of the text.
-        if value > len(self.text):
-            value = len(self.text)
+        # (Don't use `self.text`, that would create the string of a `Rope`.)
+        length = len(self._working_lines[self.working_index])
+        if value > length:
+            value = length
         if value < 0:
             value = 0
 
@@ -470,7 +521,8 @@ class Buffer(object):
         current text, cursor position and selection state.
         """
         return self._document_cache[
-            self.text, self.cursor_position, self.selection_state]
+            self._working_lines[self.working_index], self.cursor_position,
+            self.selection_state]
 
     @document.setter
     def document(self, value):
@@ -507,12 +559,21 @@ class Buffer(object):
             raise EditReadOnlyBuffer()
 
         # Set text and cursor position first.
-        text_changed = self._set_text(value.text)
+        if value.rope is not None:
+            text_changed = self._set_text(value.rope)
+        else:
+            text_changed = self._set_text(value.text)
         cursor_position_changed = self._set_cursor_position(value.cursor_position)
 
         # Now handle change events. (We do this when text/cursor position is
         # both set and consistent.)
         if text_changed:
+            # Create the `Document` for the `document` property while `value`
+            # is alive, so that it shares the line cache of `value`. (Which
+            # can be derived from the previous document by `_edit_document`.)
+            if value.rope is None:
+                self.document
+
             self._text_changed()
             self.history_search_text = None
 
@@ -535,14 +596,14 @@ class Buffer(object):
         """
         # Safe if the text is different from the text at the top of the stack
         # is different. If the text is the same, just update the cursor position.
-        if self._undo_stack and self._undo_stack[-1][0] == self.text:
-            self._undo_stack[-1] = (self._undo_stack[-1][0], self.cursor_position)
+        if self._undo_stack and self._undo_stack.top_text == self.text:
+            self._undo_stack.top_cursor_position = self.cursor_position
         else:
-            self._undo_stack.append((self.text, self.cursor_position))
+            self._undo_stack.push(self.text, self.cursor_position)
 
         # Saving anything to the undo stack, clears the redo stack.
         if clear_redo_stack:
-            self._redo_stack = []
+            self._redo_stack.clear()
 
     def transform_lines(self, line_index_iterator, transform_callback):
         """
@@ -668,13 +729,23 @@ class Buffer(object):
         deleted = ''
 
         if self.cursor_position > 0:
-            deleted = self.text[self.cursor_position - count:self.cursor_position]
+            rope = self._get_rope()
+            start = max(0, self.cursor_position - count)
+
+            if rope is not None:
+                deleted = rope.get_text(start, self.cursor_position)
+            else:
+                deleted = self.text[start:self.cursor_position]
 
-            new_text = self.text[:self.cursor_position - count] + self.text[self.cursor_position:]
             new_cursor_position = self.cursor_position - len(deleted)
 
             # Set new Document atomically.
-            self.document = Document(new_text, new_cursor_position)
+            if rope is not None:
+                self.document = Document(
+                    rope.delete(start, self.cursor_position), new_cursor_position)
+            else:
+                self.document = _edit_document(
+                    self.document, start, self.cursor_position, '', new_cursor_position)
 
         return deleted
 
@@ -682,10 +753,19 @@ class Buffer(object):
         """
         Delete specified number of characters and Return the deleted text.
         """
-        if self.cursor_position < len(self.text):
-            deleted = self.document.text_after_cursor[:count]
-            self.text = self.text[:self.cursor_position] + \
-                self.text[self.cursor_position + len(deleted):]
+        rope = self._get_rope()
+        start = self.cursor_position
+        end = start + count
+
+        if rope is not None:
+            deleted = rope.get_text(start, end)
+            if deleted:
+                self.document = Document(rope.delete(start, end), start)
+            return deleted
+
+        elif self.cursor_position < len(self.text):
+            deleted = self.text[start:end]
+            self.document = _edit_document(self.document, start, end, '', start)
             return deleted
         else:
             return ''
@@ -817,7 +897,7 @@ class Buffer(object):
         current_line = self.document.current_line_before_cursor.lstrip()
 
         for i, string in enumerate(self._working_lines):
-            for j, l in enumerate(string.split('\n')):
+            for j, l in enumerate(_text_of(string).split('\n')):
                 l = l.strip()
                 if l and l.startswith(current_line):
                     # When a new line has been found.
@@ -882,13 +962,58 @@ class Buffer(object):
         else:
             self.history_search_text = None
 
-    def _history_matches(self, i):
+    def _find_working_lines(self, text, start, stop, backward=False,
+                            prefix=False, ignore_case=False):
         """
-        True when the current entry matches the history search.
-        (when we don't have history search, it's also True.)
+        Generator that yields the indexes of the working lines in the range
+        [start, stop) that contain `text` (or start with it, if `prefix` is
+        `True`). In descending order if `backward` is `True`.
+
+        This uses the index of the history, so that we don't have to visit
+        every entry.
         """
-        return (self.history_search_text is None or
-                self._working_lines[i].startswith(self.history_search_text))
+        working_lines = self._working_lines
+        history_count = self._history_count
+        edited = self._edited_history_indexes
+
+        # The working lines that don't come from the history directly have to
+        # be checked separately.
+        others = [i for i in chain(
+                      (i for i in edited if start <= i < stop),
+                      range(max(start, history_count), stop))
+                  if _string_matches(_text_of(working_lines[i]), text, prefix, ignore_case)]
+        others.sort(reverse=backward)
+        others_index = 0
+
+        for i in self.history.find_matches(
+                text, start=start, stop=min(stop, history_count),
+                backward=backward, prefix=prefix, ignore_case=ignore_case):
+            if i in edited:
+                continue
+
+            while others_index < len(others) and (
+                    others[others_index] > i if backward else others[others_index] < i):
+                yield others[others_index]
+                others_index += 1
+
+            yield i
+
+        for i in others[others_index:]:
+            yield i
+
+    def _history_search_indexes(self, start, stop, backward=False):
+        """
+        Indexes of the working lines in the range [start, stop) that match the
+        history search.
+        """
+        if self.history_search_text:
+            return self._find_working_lines(
+                self.history_search_text, start, stop, backward=backward,
+                prefix=True)
+        elif backward:
+            return range(stop - 1, start - 1, -1)
+        else:
+            return range(start, stop)
 
     def history_forward(self, count=1):
         """
@@ -901,11 +1026,11 @@ class Buffer(object):
         # Go forward in history.
         found_something = False
 
-        for i in range(self.working_index + 1, len(self._working_lines)):
-            if self._history_matches(i):
-                self.working_index = i
-                count -= 1
-                found_something = True
+        for i in self._history_search_indexes(
+                self.working_index + 1, len(self._working_lines)):
+            self.working_index = i
+            count -= 1
+            found_something = True
             if count == 0:
                 break
 
@@ -923,11 +1048,11 @@ class Buffer(object):
         # Go back in history.
         found_something = False
 
-        for i in range(self.working_index - 1, -1, -1):
-            if self._history_matches(i):
-                self.working_index = i
-                count -= 1
-                found_something = True
+        for i in self._history_search_indexes(
+                0, self.working_index, backward=True):
+            self.working_index = i
+            count -= 1
+            found_something = True
             if count == 0:
                 break
 
@@ -1072,6 +1197,18 @@ class Buffer(object):
         self.cursor_position += self.document.get_end_of_line_position()
         self.insert_text(insert)
 
+    def _get_rope(self):
+        """
+        Return the `Rope` that holds the text when `use_rope` is set, or `None`.
+        """
+        if self.use_rope:
+            value = self._working_lines[self.working_index]
+            if not isinstance(value, Rope):
+                # E.g. after going to another entry in the history.
+                value = Rope(value)
+                self._working_lines[self.working_index] = value
+            return value
+
     def insert_text(self, data, overwrite=False, move_cursor=True, fire_event=True):
         """
         Insert characters at cursor position.
@@ -1079,21 +1216,25 @@ class Buffer(object):
         :param fire_event: Fire `on_text_insert` event. This is mainly used to
             trigger autocompletion while typing.
         """
-        # Original text & cursor position.
-        otext = self.text
+        # Original cursor position.
         ocpos = self.cursor_position
+        rope = self._get_rope()
 
         # In insert/text mode.
         if overwrite:
             # Don't overwrite the newline itself. Just before the line ending,
             # it should act like insert mode.
-            overwritten_text = otext[ocpos:ocpos + len(data)]
+            if rope is not None:
+                overwritten_text = rope.get_text(ocpos, ocpos + len(data))
+            else:
+                overwritten_text = self.text[ocpos:ocpos + len(data)]
+
             if '\n' in overwritten_text:
                 overwritten_text = overwritten_text[:overwritten_text.find('\n')]
 
-            text = otext[:ocpos] + data + otext[ocpos + len(overwritten_text):]
+            end = ocpos + len(overwritten_text)
         else:
-            text = otext[:ocpos] + data + otext[ocpos:]
+            end = ocpos
 
         if move_cursor:
             cpos = self.cursor_position + len(data)
@@ -1104,7 +1245,10 @@ class Buffer(object):
         # (Set text and cursor position at the same time. Otherwise, setting
         # the text will fire a change event before the cursor position has been
         # set. It works better to have this atomic.)
-        self.document = Document(text, cpos)
+        if rope is not None:
+            self.document = Document(rope.replace(ocpos, end, data), cpos)
+        else:
+            self.document = _edit_document(self.document, ocpos, end, data, cpos)
 
         # Fire 'on_text_insert' event.
         if fire_event:  # XXX: rename to `start_complete`.
@@ -1128,7 +1272,7 @@ class Buffer(object):
 
             if text != self.text:
                 # Push current text to redo stack.
-                self._redo_stack.append((self.text, self.cursor_position))
+                self._redo_stack.push(self.text, self.cursor_position)
 
                 # Set new text/cursor_position.
                 self.document = Document(text, cursor_position=pos)
@@ -1242,6 +1386,10 @@ class Buffer(object):
         direction = search_state.direction
         ignore_case = search_state.ignore_case()
 
+        def find(start, stop, backward=False):
+            return self._find_working_lines(
+                text, start, stop, backward=backward, ignore_case=ignore_case)
+
         def search_once(working_index, document):
             """
             Do search one time.
@@ -1257,12 +1405,13 @@ class Buffer(object):
                     return (working_index,
                             Document(document.text, document.cursor_position + new_index))
                 else:
-                    # No match, go forward in the history. (Include len+1 to wrap around.)
+                    # No match, go forward in the history. (Include the first
+                    # line to wrap around.) Only visit the lines that contain
+                    # the text.
                     # (Here we should always include all cursor positions, because
                     # it's a different line.)
-                    for i in range(working_index + 1, len(self._working_lines) + 1):
-                        i %= len(self._working_lines)
-
+                    for i in chain(find(working_index + 1, len(self._working_lines)),
+                                   find(0, 1)):
                         document = Document(self._working_lines[i], 0)
                         new_index = document.find(text, include_current_position=True,
                                                   ignore_case=ignore_case)
@@ -1277,10 +1426,12 @@ class Buffer(object):
                     return (working_index,
                             Document(document.text, document.cursor_position + new_index))
                 else:
-                    # No match, go back in the history. (Include -1 to wrap around.)
-                    for i in range(working_index - 1, -2, -1):
-                        i %= len(self._working_lines)
+                    # No match, go back in the history. (Include the last line
+                    # to wrap around.)
+                    last = len(self._working_lines) - 1
 
+                    for i in chain(find(0, working_index, backward=True),
+                                   find(last, last + 1)):
                         document = Document(self._working_lines[i], len(self._working_lines[i]))
                         new_index = document.find_backwards(
                             text, ignore_case=ignore_case)
@@ -1489,18 +1640,32 @@ class Buffer(object):
                 while generating completions. """
                 return self.complete_state == complete_state
 
-            def add_completion(completion):
-                " Got one completion from the asynchronous completion generator. "
-                complete_state.completions.append(completion)
-                self.on_completions_changed.fire()
+            update_pending = [False]
+
+            def add_completions(new_completions):
+                """ Got a batch of completions from the asynchronous completion
+                generator. """
+                completions = complete_state.completions
+                shown = len(completions)
+                completions.extend(new_completions)
+
+                # One change event for every batch. Once the menu has enough
+                # completions, wait until all of them are there.
+                if shown < _MAX_COMPLETIONS_UPDATED_WHILE_LOADING:
+                    self.on_completions_changed.fire()
+                else:
+                    update_pending[0] = True
 
             yield From(consume_async_generator(
                 self.completer.get_completions_async(document, complete_event),
-                item_callback=add_completion,
+                batch_callback=add_completions,
                 cancel=lambda: not proceed()))
 
             completions = complete_state.completions
 
+            if update_pending[0] and proceed():
+                self.on_completions_changed.fire()
+
             # When there is only one completion, which has nothing to add, ignore it.
             if (len(completions) == 1 and
                     completion_does_nothing(document, completions[0])):
@@ -1624,6 +1789,196 @@ class Buffer(object):
                 self.reset()
 
 
+class _UndoStack(object):
+    """
+    Stack of (text, cursor_position) tuples, used for undo and redo.
+
+    Only the text at the top of the stack is kept as a whole. Every other
+    entry stores the difference with the entry above it: the range that
+    changed and the text it had there. Pushing computes the difference for
+    the previous top, popping applies it again. An entry is kept as a whole
+    text (a snapshot) when that is not bigger than the difference.
+
+    :param max_entries: Drop the oldest entries when there are more.
+    :param max_size: Drop the oldest entries when more characters are stored.
+    """
+    def __init__(self, max_entries=None, max_size=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+
+        # List of [text, delta, cursor_position] lists. For all but the top
+        # entry, either `text` is None and `delta` is a (start, end, old_text)
+        # tuple, meaning: this text is the text of the entry above, with
+        # [start:end] replaced by `old_text`. Or `delta` is None.
+        self._entries = deque()
+        self.size = 0  # Number of characters stored.
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    @property
+    def top_text(self):
+        " Text of the most recent entry. "
+        return self._entries[-1][0]
+
+    @property
+    def top_cursor_position(self):
+        return self._entries[-1][2]
+
+    @top_cursor_position.setter
+    def top_cursor_position(self, value):
+        self._entries[-1][2] = value
+
+    def push(self, text, cursor_position):
+        entries = self._entries
+
+        if entries:
+            # Store the previous top as the difference with the new text.
+            top = entries[-1]
+            old_text = top[0]
+            start, end, old_end = _get_changed_range(text, old_text)
+            changed = old_text[start:old_end]
+
+            if len(changed) < len(old_text):
+                top[0] = None
+                top[1] = (start, end, changed)
+                self.size += len(changed) - len(old_text)
+
+        entries.append([text, None, cursor_position])
+        self.size += len(text)
+
+        # Drop the oldest entries. (No other entry depends on them.)
+        while len(entries) > 1 and (
+                (self.max_entries is not None and len(entries) > self.max_entries) or
+                (self.max_size is not None and self.size > self.max_size)):
+            text, delta, _ = entries.popleft()
+            self.size -= len(text) if delta is None else len(delta[2])
+
+    def pop(self):
+        " Remove the most recent entry. Return a (text, cursor_position) tuple. "
+        entries = self._entries
+        text, _, cursor_position = entries.pop()
+        self.size -= len(text)
+
+        if entries:
+            # Turn the new top into a whole text again.
+            top = entries[-1]
+            if top[1] is not None:
+                start, end, changed = top[1]
+                top[0] = text[:start] + changed + text[end:]
+                top[1] = None
+                self.size += len(top[0]) - len(changed)
+
+        return text, cursor_position
+
+
+def _get_changed_range(text, old_text):
+    """
+    Compare two strings. Return a (start, end, old_end) tuple, such that
+    `old_text` equals `text` with `text[start:end]` replaced by
+    `old_text[start:old_end]`.
+
+    (The common prefix and suffix are found with a binary search, which
+    compares ever smaller slices, in C. That's O(n) in total.)
+    """
+    max_length = min(len(text), len(old_text))
+
+    # Common prefix.
+    lo, hi = 0, max_length
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old_text.startswith(text[lo:mid], lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+
+    # Common suffix. (Not overlapping the prefix.)
+    lo, hi = 0, max_length - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old_text.endswith(text[len(text) - mid:len(text) - lo],
+                             0, len(old_text) - lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    suffix = lo
+
+    return prefix, len(text) - suffix, len(old_text) - suffix
+
+
+def _text_of(value):
+    " Return the text of a working line. (A string or a `Rope`.) "
+    if isinstance(value, Rope):
+        return value.text
+    return value
+
+
+class _WorkingLines(object):
+    """
+    Mutable list-like wrapper around a lazy sequence of history strings, used
+    for `Buffer._working_lines`. Only the entries that are modified or added
+    are kept in memory. Everything else is taken from the history when it's
+    accessed.
+    """
+    def __init__(self, strings):
+        self._strings = strings
+        self._changes = {}  # Maps indexes in `_strings` to modified strings.
+        self._head = []  # Strings inserted at the start, in reverse order.
+        self._tail = []  # Strings appended at the end.
+
+    def __len__(self):
+        return len(self._head) + len(self._strings) + len(self._tail)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _locate(self, index):
+        """
+        Return a `(list_or_dict, key)` tuple for the given index. (`list_or_dict`
+        is `None` for unmodified entries of the history.)
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Working lines index out of range.')
+
+        head = len(self._head)
+        if index < head:
+            return self._head, head - 1 - index
+
+        index -= head
+        count = len(self._strings)
+        if index < count:
+            return (self._changes if index in self._changes else None), index
+
+        return self._tail, index - count
+
+    def __getitem__(self, index):
+        container, key = self._locate(index)
+        if container is None:
+            return self._strings[key]
+        return container[key]
+
+    def __setitem__(self, index, value):
+        container, key = self._locate(index)
+        if container is None:
+            container = self._changes
+        container[key] = value
+
+    def append(self, value):
+        self._tail.append(value)
+
+    def insert(self, index, value):
+        assert index == 0, 'Only inserting at the start is supported.'
+        self._head.append(value)
+
+
 def _only_one_at_a_time(coroutine):
     """
     Decorator that only starts the coroutine only if the previous call has
@@ -23,8 +23,8 @@ class Completion(object):
     :param start_position: Position relative to the cursor_position where the
         new text will start. The text will be inserted between the
         start_position and the original cursor position.
-    :param display: (optional string) If the completion has to be displayed
-        differently in the completion menu.
+    :param display: (optional string or formatted text) If the completion has
+        to be displayed differently in the completion menu.
     :param display_meta: (Optional string) Meta information about the
         completion, e.g. the path or source where it's coming from.
         This can also be a callable that returns a string.
@@ -36,7 +36,6 @@ class Completion(object):
                  style='', selected_style=''):
         assert isinstance(text, text_type)
         assert isinstance(start_position, int)
-        assert display is None or isinstance(display, text_type)
         assert display_meta is None or isinstance(display_meta, text_type)
         assert isinstance(style, text_type)
         assert isinstance(selected_style, text_type)
@@ -46,9 +45,16 @@ class Completion(object):
         self._display_meta = display_meta
 
         if display is None:
-            self.display = text
-        else:
+            display = text
+
+        if isinstance(display, text_type):
             self.display = display
+            self._display_fragments = None
+        else:
+            # (Imported here, because of circular imports.)
+            from prompt_toolkit.formatted_text import to_formatted_text, fragment_list_to_text
+            self._display_fragments = to_formatted_text(display)
+            self.display = fragment_list_to_text(self._display_fragments)
 
         self.style = style
         self.selected_style = selected_style
@@ -87,6 +93,16 @@ class Completion(object):
 
         return meta
 
+    @property
+    def display_fragments(self):
+        """
+        The text to display in the completion menu, as a list of
+        ``(style_str, text)`` tuples. (`display` is the plain text.)
+        """
+        if self._display_fragments is None:
+            return [('', self.display)]
+        return self._display_fragments
+
     def new_completion_from_position(self, position):
         """
         (Only for internal use!)
@@ -98,7 +114,7 @@ class Completion(object):
 
         return Completion(
             text=self.text[position - self.start_position:],
-            display=self.display,
+            display=self._display_fragments or self.display,
             display_meta=self._display_meta)
 
 
@@ -1,7 +1,19 @@
 from __future__ import unicode_literals
 
+from bisect import bisect_left
+from collections import OrderedDict
+from operator import itemgetter
 from prompt_toolkit.completion import Completer, Completion
+from six import text_type
 import os
+import sys
+import threading
+import time
+
+try:
+    from os import scandir
+except ImportError:  # Python < 3.5
+    scandir = None
 
 __all__ = [
     'PathCompleter',
@@ -19,19 +31,25 @@ class PathCompleter(Completer):
                         this file should show up in the completion. ``None``
                         when no filtering has to be done.
     :param min_input_len: Don't do autocompletion when the input string is shorter.
+    :param listing_ttl: Time (in seconds) during which directory listings are
+        reused without looking at the directory again. (By default, the
+        modification time of the directory is checked every time. A higher
+        value helps on slow network file systems.)
     """
     def __init__(self, only_directories=False, get_paths=None, file_filter=None,
-                 min_input_len=0, expanduser=False):
+                 min_input_len=0, expanduser=False, listing_ttl=0):
         assert get_paths is None or callable(get_paths)
         assert file_filter is None or callable(file_filter)
         assert isinstance(min_input_len, int)
         assert isinstance(expanduser, bool)
+        assert isinstance(listing_ttl, (int, float))
 
         self.only_directories = only_directories
         self.get_paths = get_paths or (lambda: ['.'])
         self.file_filter = file_filter or (lambda _: True)
         self.min_input_len = min_input_len
         self.expanduser = expanduser
+        self.listing_ttl = listing_ttl
 
     def get_completions(self, document, complete_event):
         text = document.text_before_cursor
@@ -62,20 +80,24 @@ class PathCompleter(Completer):
             filenames = []
             for directory in directories:
                 # Look for matches in this directory.
-                if os.path.isdir(directory):
-                    for filename in os.listdir(directory):
-                        if filename.startswith(prefix):
-                            filenames.append((directory, filename))
+                try:
+                    entries = _directory_cache.get_entries(directory, self.listing_ttl)
+                except OSError:
+                    continue  # Not a directory.
+
+                for filename, is_directory in entries:
+                    if filename.startswith(prefix):
+                        filenames.append((directory, filename, is_directory))
 
             # Sort
             filenames = sorted(filenames, key=lambda k: k[1])
 
             # Yield them.
-            for directory, filename in filenames:
+            for directory, filename, is_directory in filenames:
                 completion = filename[len(prefix):]
                 full_name = os.path.join(directory, filename)
 
-                if os.path.isdir(full_name):
+                if is_directory:
                     # For directories, add a slash to the filename.
                     # (We don't add them to the `completion`. Users can type it
                     # to trigger the autocompletion themselves.)
@@ -94,12 +116,247 @@ class PathCompleter(Completer):
 class ExecutableCompleter(PathCompleter):
     """
     Complete only executable files in the current path.
+
+    Commands are looked up in an index of the directories in `$PATH`, which
+    is kept up to date in the background.
     """
     def __init__(self):
         PathCompleter.__init__(
             self,
             only_directories=False,
             min_input_len=1,
-            get_paths=lambda: os.environ.get('PATH', '').split(os.pathsep),
+            get_paths=lambda: _get_path().split(os.pathsep),
             file_filter=lambda name: os.access(name, os.X_OK),
             expanduser=True),
+
+        # Start indexing, so that it's ready when the user starts typing.
+        _executable_index.refresh()
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+
+        # Paths are completed like in `PathCompleter`.
+        if len(text) < self.min_input_len or os.path.dirname(os.path.expanduser(text)):
+            for c in PathCompleter.get_completions(self, document, complete_event):
+                yield c
+            return
+
+        for filename, is_directory in _executable_index.find(text):
+            completion = filename[len(text):]
+
+            if is_directory:
+                filename += '/'
+
+            yield Completion(completion, 0, display=filename)
+
+
+def _get_path():
+    """
+    Return `$PATH` as unicode. (On Python 2, listing a directory that's given
+    as a byte string returns byte strings.)
+    """
+    path = os.environ.get('PATH', '')
+
+    if not isinstance(path, text_type):
+        path = path.decode(sys.getfilesystemencoding() or 'utf-8', 'replace')
+
+    return path
+
+
+def _list_directory(directory):
+    """
+    Return a list of (filename, is_directory) tuples for the files in this
+    directory. Raise `OSError` when this directory can't be listed.
+    """
+    if scandir is not None:
+        # (`DirEntry` knows whether it's a directory, without calling `stat`,
+        # except for symlinks.)
+        return [(entry.name, entry.is_dir()) for entry in scandir(directory)]
+    else:
+        return [(filename, os.path.isdir(os.path.join(directory, filename)))
+                for filename in os.listdir(directory)]
+
+
+class _DirectoryCache(object):
+    """
+    Cache of directory listings, shared by the path completers.
+
+    A listing is reused as long as the modification time of the directory
+    didn't change. (That's one `stat` call, instead of listing the directory.)
+
+    :param max_size: Maximum number of filenames in the cache. The listings
+        that were used least recently are discarded first.
+    """
+    # Don't trust the modification time of directories that were modified
+    # this recently. (Some file systems store it in seconds. The directory
+    # can still change without changing the modification time.)
+    _RACY_INTERVAL = 2
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+
+        # Maps absolute paths to [mtime, check_time, entries] lists.
+        self._listings = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_entries(self, directory, ttl=0):
+        """
+        Return a list of (filename, is_directory) tuples for the files in this
+        directory. Raise `OSError` when this directory can't be listed.
+
+        :param ttl: Time (in seconds) during which a listing is reused without
+            checking the directory.
+        """
+        if not directory:
+            raise OSError('No directory given.')
+
+        directory = os.path.abspath(directory)
+        now = time.time()
+
+        with self._lock:
+            listing = self._listings.pop(directory, None)
+            if listing is not None:
+                self._listings[directory] = listing  # Most recently used.
+
+        if listing is not None and now - listing[1] < ttl:
+            return listing[2]
+
+        # (Call `stat` before listing the directory. If a file is created in
+        # between, the mtime won't match next time.)
+        mtime = os.stat(directory).st_mtime
+
+        if listing is not None and listing[0] == mtime:
+            listing[1] = now
+            return listing[2]
+
+        entries = _list_directory(directory)
+
+        if now - mtime < self._RACY_INTERVAL:
+            mtime = None  # List it again next time.
+
+        with self._lock:
+            previous = self._listings.pop(directory, None)
+            if previous is not None:
+                self._size -= len(previous[2])
+
+            self._listings[directory] = [mtime, now, entries]
+            self._size += len(entries)
+
+            # Discard the least recently used listings. (But keep this one.)
+            while self._size > self.max_size and len(self._listings) > 1:
+                _, discarded = self._listings.popitem(last=False)
+                self._size -= len(discarded[2])
+
+        return entries
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+            self._size = 0
+
+
+class _ExecutableIndex(object):
+    """
+    Sorted list of the executables in `$PATH`, for `ExecutableCompleter`.
+
+    The index is created in a background thread, and created again in the
+    background when it's older than `refresh_interval` seconds. (Directories
+    that didn't change are not listed again, but the permissions of the files
+    are checked every time: `chmod` doesn't change the directory.) Only when
+    `$PATH` changes, the completer has to wait for a new index.
+    """
+    def __init__(self, refresh_interval=10.0):
+        self.refresh_interval = refresh_interval
+
+        self._path = None  # The `$PATH` of the current index.
+        self._executables = []  # Sorted list of (filename, is_directory) tuples.
+        self._listings = {}  # Maps directories to (mtime, entries) tuples.
+        self._time = 0
+
+        self._lock = threading.Lock()
+        self._thread = None  # Thread that's creating a new index.
+        self._thread_path = None
+
+    def refresh(self):
+        """
+        Start creating a new index in the background. Return the thread.
+        """
+        path = _get_path()
+
+        with self._lock:
+            if self._thread is None or self._thread_path != path:
+                self._thread = threading.Thread(target=self._update, args=(path, ))
+                self._thread.daemon = True
+                self._thread_path = path
+                self._thread.start()
+
+            return self._thread
+
+    def find(self, prefix):
+        """
+        Yield the (filename, is_directory) tuples for the executables that
+        start with `prefix`, sorted by filename.
+        """
+        if self._path != _get_path():
+            # Not indexed yet, or `$PATH` changed. Wait for the index.
+            self.refresh().join()
+        elif time.time() - self._time > self.refresh_interval:
+            self.refresh()
+
+        executables = self._executables
+        i = bisect_left(executables, (prefix, ))
+
+        while i < len(executables) and executables[i][0].startswith(prefix):
+            yield executables[i]
+            i += 1
+
+    def _update(self, path):
+        listings = {}
+        executables = []
+
+        for directory in path.split(os.pathsep):
+            if directory not in listings:
+                listings[directory] = self._get_listing(directory)
+                executables.extend(
+                    (filename, is_directory)
+                    for filename, is_directory in listings[directory][1]
+                    if os.access(os.path.join(directory, filename), os.X_OK))
+
+        # (A stable sort keeps the order of `$PATH` for duplicate names.)
+        executables.sort(key=itemgetter(0))
+
+        with self._lock:
+            # Only keep the result of the most recent thread.
+            if self._thread is threading.current_thread():
+                self._path = path
+                self._executables = executables
+                self._listings = listings
+                self._time = time.time()
+                self._thread = None
+
+    def _get_listing(self, directory):
+        """
+        Return a (mtime, entries) tuple for this directory. Reuse the previous
+        listing if the directory didn't change.
+        """
+        try:
+            mtime = os.stat(directory).st_mtime
+
+            previous = self._listings.get(directory)
+            if previous is not None and previous[0] == mtime:
+                return previous
+
+            entries = _list_directory(directory)
+        except OSError:
+            return None, []
+
+        # List it again next time. (See `_DirectoryCache`.)
+        if time.time() - mtime < _DirectoryCache._RACY_INTERVAL:
+            mtime = None
+
+        return mtime, entries
+
+
+_directory_cache = _DirectoryCache()
+_executable_index = _ExecutableIndex()
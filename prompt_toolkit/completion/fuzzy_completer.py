@@ -0,0 +1,279 @@
+from __future__ import unicode_literals
+
+from array import array
+from bisect import bisect_right
+from itertools import compress, count, repeat
+from operator import methodcaller, ne
+from six import string_types
+from six.moves import map
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.history import _INDEX_TYPECODE
+
+import heapq
+import re
+
+__all__ = [
+    'FuzzyWordCompleter',
+]
+
+
+class FuzzyWordCompleter(Completer):
+    """
+    Fuzzy completion on a list of words.
+
+    A word matches when it contains all the characters of the word before the
+    cursor, in the same order, but not necessarily next to each other. (So,
+    "gcs" matches "get_completions".) The best matches come first: these are
+    the words in which the characters are closest together, and closest to
+    the start. The matching characters are highlighted in the menu.
+
+    The words are indexed when the first completions are requested. When the
+    user types more characters, only the words that matched before are
+    searched again.
+
+    :param words: List of words or callable that returns a list of words.
+    :param meta_dict: Optional dict mapping words to their meta-information.
+    :param WORD: When True, use WORD characters.
+    :param ignore_case: If True, case-insensitive completion.
+    :param max_completions: Only yield this many of the best matches. (For
+        big word lists, most of the time would otherwise be spent creating
+        completions that are never displayed.) `None` means no limit.
+    """
+    def __init__(self, words, meta_dict=None, WORD=False, ignore_case=True,
+                 max_completions=1000):
+        assert callable(words) or all(isinstance(w, string_types) for w in words)
+        assert max_completions is None or max_completions > 0
+
+        self.words = words
+        self.meta_dict = meta_dict or {}
+        self.WORD = WORD
+        self.ignore_case = ignore_case
+        self.max_completions = max_completions
+
+        self._index = None  # Index of all the words.
+
+        # List of (pattern, index, word_indexes) tuples for the previous
+        # searches. Every pattern is an extension of the pattern before.
+        # `word_indexes` are the positions in `index` of the words that
+        # matched. (The index for only those words is created when needed.)
+        self._narrowed = []
+
+    def _get_index(self):
+        " Return the index for the current list of words. "
+        words = self.words
+        if callable(words):
+            words = words()
+
+        index = self._index
+        if index is None or index.source is not words or len(index.words) != len(words):
+            if self.ignore_case:
+                search_words = [w.lower() for w in words]
+            else:
+                search_words = words
+
+            index = self._index = _FuzzyIndex(list(words), search_words)
+            index.source = words
+            self._narrowed = []
+
+        return index
+
+    def _find(self, pattern):
+        """
+        Return a list of (match_length, match_start, word_index) tuples, and
+        the index in which `word_index` is a position.
+        """
+        index = self._get_index()
+
+        # Search only the words that matched the last search that this is an
+        # extension of. (The list is replaced, not modified, because this can
+        # be called from several threads.)
+        narrowed = [n for n in self._narrowed if pattern.startswith(n[0])]
+
+        if narrowed:
+            previous_pattern, index, word_indexes = narrowed[-1]
+            if word_indexes is not None:
+                index = index.subset(word_indexes)
+                narrowed[-1] = (previous_pattern, index, None)
+
+        matches = index.search(pattern)
+
+        if not narrowed or narrowed[-1][0] != pattern:
+            narrowed.append((pattern, index, [m[2] for m in matches]))
+        self._narrowed = narrowed
+        return matches, index
+
+    def get_completions(self, document, complete_event):
+        word_before_cursor = document.get_word_before_cursor(WORD=self.WORD)
+        pattern = word_before_cursor.lower() if self.ignore_case else word_before_cursor
+        max_completions = self.max_completions
+
+        # Nothing typed: every word matches.
+        if not pattern:
+            for word in self._get_index().words[:max_completions]:
+                yield Completion(word, 0, display_meta=self.meta_dict.get(word, ''))
+            return
+
+        matches, index = self._find(pattern)
+
+        # Only sort the matches that are yielded.
+        if max_completions is None:
+            matches.sort()
+        else:
+            matches = heapq.nsmallest(max_completions, matches)
+
+        for match_length, match_start, i in matches:
+            word = index.words[i]
+            yield _FuzzyCompletion(
+                word, -len(word_before_cursor),
+                display_meta=self.meta_dict.get(word, ''),
+                index=index, word_index=i, match_start=match_start,
+                pattern=pattern)
+
+
+class _FuzzyCompletion(Completion):
+    """
+    Completion in which the matching characters are highlighted.
+
+    The highlighted text is only created when the completion is displayed.
+    (Usually, there are many more completions than what fits in the menu.)
+    """
+    def __init__(self, text, start_position, display_meta, index, word_index,
+                 match_start, pattern, display=None):
+        super(_FuzzyCompletion, self).__init__(
+            text, start_position, display=display, display_meta=display_meta)
+
+        self._index = index
+        self._word_index = word_index
+        self._match_start = match_start
+        self._pattern = pattern
+
+    def new_completion_from_position(self, position):
+        # Keep the highlighting. (It's for the whole word: `display`.)
+        assert isinstance(position, int) and position - self.start_position >= 0
+
+        return _FuzzyCompletion(
+            self.text[position - self.start_position:], 0,
+            display_meta=self._display_meta, index=self._index,
+            word_index=self._word_index, match_start=self._match_start,
+            pattern=self._pattern, display=self.display)
+
+    @property
+    def display_fragments(self):
+        word = self.display
+        search_word = self._index.get_search_word(self._word_index)
+        match_start = self._match_start
+
+        # Some characters have a lower case variant of another length.
+        if len(search_word) != len(word):
+            return [('', word)]
+
+        # Positions of the matching characters.
+        positions = set()
+        match_end = match_start
+        for c in self._pattern:
+            match_end = search_word.index(c, match_end) + 1
+            positions.add(match_end - 1)
+
+        result = [('class:fuzzymatch.outside', word[:match_start])]
+
+        for i in range(match_start, match_end):
+            if i in positions:
+                style = 'class:fuzzymatch.inside.character'
+            else:
+                style = 'class:fuzzymatch.inside'
+
+            if result[-1][0] == style:
+                result[-1] = (style, result[-1][1] + word[i])
+            else:
+                result.append((style, word[i]))
+
+        result.append(('class:fuzzymatch.outside', word[match_end:]))
+        return result
+
+
+class _FuzzyIndex(object):
+    """
+    Index for fuzzy searching through a list of words.
+
+    All the words are joined together (with a newline in between), so that
+    finding all the words that match a pattern becomes one regular expression
+    search. `offsets` contains the position of every word in this text.
+    (Patterns of one character are searched with `str.find` on every word.)
+
+    :param words: List of words.
+    :param search_words: List of the words as they are searched. (Lower case
+        words for case insensitive searches.)
+    """
+    def __init__(self, words, search_words):
+        self.words = words
+        self.source = None  # The list from which this index was created.
+
+        self._search_words = search_words
+        self._text = '\n'.join(search_words) + '\n'
+        self._offsets = array(_INDEX_TYPECODE, [0])
+
+        position = 0
+        for w in search_words:
+            position += len(w) + 1
+            self._offsets.append(position)
+
+    def get_search_word(self, i):
+        " Return the search word at position `i`. "
+        return self._search_words[i]
+
+    def subset(self, word_indexes):
+        " Create a new index for only these words. "
+        return _FuzzyIndex(
+            list(map(self.words.__getitem__, word_indexes)),
+            list(map(self._search_words.__getitem__, word_indexes)))
+
+    def search(self, pattern):
+        """
+        Find the words that match this pattern. Return a list of
+        (match_length, match_start, word_index) tuples, with the shortest
+        match for every word, in the order of the words.
+        """
+        if '\n' in pattern:
+            return []
+
+        if len(pattern) == 1:
+            # The first occurrence is the best match.
+            starts = list(map(methodcaller('find', pattern), self._search_words))
+            indexes = compress(count(), map(ne, starts, repeat(-1)))
+            return [(1, starts[i], i) for i in indexes]
+
+        # Every match is the shortest match that starts at a given position.
+        # (Only the first character is consumed, the rest is a lookahead, so
+        # that the matches can overlap. Starting with a literal lets the
+        # regex engine skip quickly to the candidates.) A match can't contain
+        # the first character again before the second, because starting from
+        # that one would give a shorter match.
+        first = re.escape(pattern[0])
+        regex = re.compile('%s(?=([^\n%s]*?%s))' % (
+            first, first, '[^\n]*?'.join(re.escape(c) for c in pattern[1:])))
+
+        offsets = self._offsets
+        result = []
+        word_end = 0
+        match = None
+
+        for m in regex.finditer(self._text):
+            start = m.start()
+            end = m.end(1)
+
+            if start >= word_end:
+                # First match in a new word.
+                if match is not None:
+                    result.append(match)
+                i = bisect_right(offsets, start) - 1
+                word_start = offsets[i]
+                word_end = offsets[i + 1]
+                match = (end - start, start - word_start, i)
+
+            elif end - start < match[0]:
+                match = (end - start, start - word_start, i)
+
+        if match is not None:
+            result.append(match)
+
+        return result
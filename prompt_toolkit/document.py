@@ -12,6 +12,7 @@ from six.moves import range, map
 
 from .clipboard import ClipboardData
 from .filters import vi_mode
+from .rope import Rope
 from .selection import SelectionType, SelectionState, PasteMode
 
 __all__ = [
@@ -68,6 +69,33 @@ class _DocumentCache(object):
         self.line_indexes = None
 
 
+class _RopeLineList(object):
+    """
+    Read-only list of the lines in a :class:`.Rope`. Lines are only extracted
+    when they're accessed.
+    """
+    def __init__(self, rope):
+        self._rope = rope
+
+    def __len__(self):
+        return self._rope.line_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('list index out of range')
+
+        return self._rope.get_line(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._rope.get_line(i)
+
+
 class Document(object):
     """
     This is a immutable class around the text and cursor position, and contains
@@ -76,14 +104,19 @@ class Document(object):
     This class is usually instantiated by a :class:`~prompt_toolkit.buffer.Buffer`
     object, and accessed as the `document` property of that class.
 
-    :param text: string
+    The text can also be given as a :class:`~prompt_toolkit.rope.Rope`. In
+    that case, the lines and the translation between indexes and positions
+    are computed from the rope, and the string is only created when `text` is
+    accessed.
+
+    :param text: string or :class:`~prompt_toolkit.rope.Rope`.
     :param cursor_position: int
     :param selection: :class:`.SelectionState`
     """
-    __slots__ = ('_text', '_cursor_position', '_selection', '_cache')
+    __slots__ = ('_text', '_rope', '_cursor_position', '_selection', '_cache')
 
     def __init__(self, text='', cursor_position=None, selection=None):
-        assert isinstance(text, six.text_type), 'Got %r' % text
+        assert isinstance(text, (six.text_type, Rope)), 'Got %r' % text
         assert selection is None or isinstance(selection, SelectionState)
 
         # Check cursor position. It can also be right after the end. (Where we
@@ -100,10 +133,20 @@ class Document(object):
         # Keep these attributes private. A `Document` really has to be
         # considered to be immutable, because otherwise the caching will break
         # things. Because of that, we wrap these into read-only properties.
-        self._text = text
         self._cursor_position = cursor_position
         self._selection = selection
 
+        if isinstance(text, Rope):
+            # The text is created when needed. Lines are taken from the rope.
+            self._text = None
+            self._rope = text
+            self._cache = _DocumentCache()
+            self._cache.lines = _RopeLineList(text)
+            return
+
+        self._text = text
+        self._rope = None
+
         # Cache for lines/indexes. (Shared with other Document instances that
         # contain the same text.
         try:
@@ -130,8 +173,18 @@ class Document(object):
     @property
     def text(self):
         " The document text. "
+        if self._text is None:
+            self._text = self._rope.text
         return self._text
 
+    @property
+    def rope(self):
+        """
+        The :class:`~prompt_toolkit.rope.Rope` that holds the text, or `None`
+        when this document was created from a string.
+        """
+        return self._rope
+
     @property
     def cursor_position(self):
         " The document cursor position. "
@@ -163,12 +216,22 @@ class Document(object):
     @property
     def current_line_before_cursor(self):
         """ Text from the start of the line until the cursor. """
+        if self._rope is not None:
+            rope = self._rope
+            row = rope.row_of_index(self.cursor_position)
+            return rope.get_text(rope.line_start_index(row), self.cursor_position)
+
         _, _, text = self.text_before_cursor.rpartition('\n')
         return text
 
     @property
     def current_line_after_cursor(self):
         """ Text from the cursor until the end of the line. """
+        if self._rope is not None:
+            rope = self._rope
+            row = rope.row_of_index(self.cursor_position)
+            return rope.get_text(self.cursor_position, rope.line_end_index(row))
+
         text, _, _ = self.text_after_cursor.partition('\n')
         return text
 
@@ -241,6 +304,12 @@ class Document(object):
         """
         Return character relative to cursor position, or empty string
         """
+        if self._rope is not None:
+            try:
+                return self._rope.char_at(self.cursor_position + offset)
+            except IndexError:
+                return ''
+
         try:
             return self.text[self.cursor_position + offset]
         except IndexError:
@@ -286,6 +355,10 @@ class Document(object):
 
         Return (row, index) tuple.
         """
+        if self._rope is not None:
+            row = self._rope.row_of_index(index)
+            return row, self._rope.line_start_index(row)
+
         indexes = self._line_start_indexes
 
         pos = bisect.bisect_right(indexes, index) - 1
@@ -309,6 +382,14 @@ class Document(object):
 
         Negative row/col values are turned into zero.
         """
+        if self._rope is not None:
+            rope = self._rope
+            if -rope.line_count <= row < 0:
+                row += rope.line_count  # Like indexing `self.lines`.
+            row = max(0, min(row, rope.line_count - 1))
+            start = rope.line_start_index(row)
+            return start + max(0, min(col, rope.line_end_index(row) - start))
+
         try:
             result = self._line_start_indexes[row]
             line = self.lines[row]
@@ -330,6 +411,8 @@ class Document(object):
     @property
     def is_cursor_at_the_end(self):
         """ True when the cursor is at the end of the text. """
+        if self._rope is not None:
+            return self.cursor_position == len(self._rope)
         return self.cursor_position == len(self.text)
 
     @property
@@ -1033,3 +1116,52 @@ class Document(object):
                 text=text + self.text,
                 cursor_position=self.cursor_position + len(text),
                 selection=selection_state)
+
+
+def _edit_document(document, start, end, text, cursor_position):
+    """
+    Return a new `Document` in which the text between `start` and `end` is
+    replaced by `text`.
+
+    When the lines of `document` were already computed, the lines and line
+    start indexes of the new document are derived from them: only the lines
+    touched by the edit are split again.
+    """
+    old_text = document.text
+    new_document = Document(old_text[:start] + text + old_text[end:], cursor_position)
+
+    old_cache = document._cache
+    new_cache = new_document._cache
+
+    if (old_cache.lines is not None and new_cache.lines is None and
+            document.rope is None):
+        old_lines = old_cache.lines
+        old_indexes = document._line_start_indexes
+
+        first_row = bisect.bisect_right(old_indexes, start) - 1
+        last_row = bisect.bisect_right(old_indexes, end) - 1
+
+        # The lines that contain the edit.
+        head = old_lines[first_row][:start - old_indexes[first_row]]
+        tail = old_lines[last_row][end - old_indexes[last_row]:]
+        middle = (head + text + tail).split('\n')
+
+        lines = old_lines[:first_row] + middle + old_lines[last_row + 1:]
+
+        indexes = old_indexes[:first_row + 1]
+        pos = indexes[-1]
+        for line in middle[:-1]:
+            pos += len(line) + 1
+            indexes.append(pos)
+
+        # Lines after the edit are shifted.
+        delta = len(text) - (end - start)
+        if delta:
+            indexes.extend(map(delta.__add__, old_indexes[last_row + 1:]))
+        else:
+            indexes.extend(old_indexes[last_row + 1:])
+
+        new_cache.lines = _ImmutableLineList(lines)
+        new_cache.line_indexes = indexes
+
+    return new_document
@@ -1,15 +1,16 @@
 from __future__ import unicode_literals
 
-from .base import EventLoop, get_traceback_from_context
+from .base import EventLoop, TimerHandle, get_traceback_from_context
 from .coroutine import From, Return, ensure_future
 from .async_generator import AsyncGeneratorItem, generator_to_async_generator, consume_async_generator
-from .defaults import create_event_loop, create_asyncio_event_loop, use_asyncio_event_loop, get_event_loop, set_event_loop, run_in_executor, call_from_executor, run_until_complete
+from .defaults import create_event_loop, create_asyncio_event_loop, use_asyncio_event_loop, get_event_loop, set_event_loop, run_in_executor, call_from_executor, call_later, run_until_complete
 from .future import Future, InvalidStateError
 from .event import Event
 
 __all__ = [
     # Base.
     'EventLoop',
+    'TimerHandle',
     'get_traceback_from_context',
 
     # Coroutine.
@@ -30,6 +31,7 @@ __all__ = [
     'set_event_loop',
     'run_in_executor',
     'call_from_executor',
+    'call_later',
     'run_until_complete',
 
     # Futures.
@@ -16,7 +16,6 @@ from Python 3 (and asyncio).
         ...
 """
 from __future__ import unicode_literals
-from six.moves.queue import Queue
 from threading import RLock
 from .defaults import run_in_executor
 from .future import Future
@@ -45,10 +44,14 @@ def generator_to_async_generator(get_iterable):
     The new async generator will yield both `Future` objects as well
     as the original items.
 
+    The background thread appends the items to a list. The async generator
+    takes all the items that are available at once, so when the generator
+    produces items quickly, they are handed over in big chunks.
+
     :param get_iterable: Function that returns a generator or iterable when
         called.
     """
-    q = Queue()
+    items = []
     f = Future()
     l = RLock()
     quitting = False
@@ -56,12 +59,12 @@ def generator_to_async_generator(get_iterable):
     def runner():
         """
         Consume the generator in background thread.
-        When items are received, they'll be pushed to the queue and the
+        When items are received, they'll be appended to the list and the
         Future is set.
         """
         for item in get_iterable():
             with l:
-                q.put(item)
+                items.append(item)
                 if not f.done():
                     f.set_result(None)
 
@@ -83,14 +86,20 @@ def generator_to_async_generator(get_iterable):
 
             # Items received. Yield all items so far.
             with l:
-                while not q.empty():
-                    yield AsyncGeneratorItem(q.get())
-
+                received = items[:]
+                del items[:]
                 f = Future()
 
+            for item in received:
+                yield AsyncGeneratorItem(item)
+
         # Yield final items.
-        while not q.empty():
-            yield q.get()
+        with l:
+            received = items[:]
+            del items[:]
+
+        for item in received:
+            yield AsyncGeneratorItem(item)
 
     finally:
         # When this async generator is closed (GeneratorExit exception, stop
@@ -98,16 +107,26 @@ def generator_to_async_generator(get_iterable):
         quitting = True
 
 
-def consume_async_generator(iterator, cancel, item_callback):
+def consume_async_generator(iterator, cancel, item_callback=None, batch_callback=None):
     """
     Consume an asynchronous generator.
 
     :param cancel: Cancel the consumption of the generator when this callable
         return True.
     :param item_callback: This will be called for each item that we receive.
+    :param batch_callback: Alternative for `item_callback`. This will be
+        called with a list of items: all the items that were received before
+        the generator had to wait for a `Future`, or ended.
     """
     assert callable(cancel)
-    assert callable(item_callback)
+    assert callable(item_callback) or callable(batch_callback)
+
+    batch = []
+
+    def flush():
+        if batch:
+            batch_callback(batch[:])
+            del batch[:]
 
     send = None
     try:
@@ -121,10 +140,20 @@ def consume_async_generator(iterator, cancel, item_callback):
 
         if isinstance(item, AsyncGeneratorItem):
             # Got item.
-            item_callback(item.value)
+            if batch_callback is None:
+                item_callback(item.value)
+            else:
+                batch.append(item.value)
             send = None
 
         elif isinstance(item, Future):
+            # Deliver the items that we have, before waiting.
+            if batch_callback is not None:
+                flush()
+
+                if cancel():
+                    break
+
             # Process future.
             try:
                 send = yield From(item)
@@ -141,4 +170,7 @@ def consume_async_generator(iterator, cancel, item_callback):
         except StopIteration:
             break
 
+    if batch_callback is not None and not cancel():
+        flush()
+
     raise Return(None)
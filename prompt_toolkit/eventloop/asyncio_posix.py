@@ -3,7 +3,7 @@ Posix asyncio event loop.
 """
 from __future__ import unicode_literals
 
-from .base import EventLoop
+from .base import EventLoop, TimerHandle
 from .context import wrap_in_current_context
 from .future import Future
 from .utils import ThreadWithFuture
@@ -41,7 +41,7 @@ class PosixAsyncioEventLoop(EventLoop):
 
         self.loop.run_forever()
 
-    def run_in_executor(self, callback, _daemon=False):
+    def run_in_executor(self, callback, _daemon=False, _priority=None):
         if _daemon:
             # Asyncio doesn't support 'daemon' executors.
             th = ThreadWithFuture(callback, daemon=True)
@@ -60,6 +60,19 @@ class PosixAsyncioEventLoop(EventLoop):
         callback = wrap_in_current_context(callback)
         self.loop.call_soon_threadsafe(callback)
 
+    def time(self):
+        return self.loop.time()
+
+    def call_at(self, when, callback):
+        """
+        Call `callback` in the event loop at the given time.
+        (Thread safe, unlike asyncio's `call_at`.)
+        """
+        handle = TimerHandle(when, wrap_in_current_context(callback))
+        self.loop.call_soon_threadsafe(
+            lambda: self.loop.call_at(when, handle._run))
+        return handle
+
     def add_reader(self, fd, callback):
         " Start watching the file descriptor for read availability. "
         callback = wrap_in_current_context(callback)
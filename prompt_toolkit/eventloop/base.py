@@ -11,13 +11,20 @@ from __future__ import unicode_literals
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass
 from prompt_toolkit.log import logger
+from .context import wrap_in_current_context
 import sys
+import threading
+import time
 
 __all__ = [
     'EventLoop',
+    'TimerHandle',
     'get_traceback_from_context',
 ]
 
+# Clock used for timers. (`time.monotonic` doesn't exist on Python 2.)
+_time = getattr(time, 'monotonic', time.time)
+
 
 class EventLoop(with_metaclass(ABCMeta, object)):
     """
@@ -80,6 +87,9 @@ class EventLoop(with_metaclass(ABCMeta, object)):
         Run a long running function in a background thread. (This is
         recommended for code that could block the event loop.)
         Similar to Twisted's ``deferToThread``.
+
+        Event loops that execute the functions in a bounded thread pool
+        accept a `_priority` argument as well. (For internal use.)
         """
 
     @abstractmethod
@@ -98,6 +108,49 @@ class EventLoop(with_metaclass(ABCMeta, object)):
                   does fewer system calls. (It doesn't read /etc/localtime.)
         """
 
+    def time(self):
+        """
+        Return the current time, according to the clock of this event loop.
+        This is the clock that is used by :meth:`.call_at`.
+        """
+        return _time()
+
+    def call_later(self, delay, callback):
+        """
+        Call `callback` in the event loop after `delay` seconds.
+        Returns a :class:`.TimerHandle` that can be used to cancel the call.
+        (Like `call_from_executor`, this is thread safe.)
+        """
+        assert isinstance(delay, (int, float))
+        return self.call_at(self.time() + delay, callback)
+
+    def call_at(self, when, callback):
+        """
+        Call `callback` in the event loop at the given time. (A value
+        returned by :meth:`.time`.)
+        Returns a :class:`.TimerHandle` that can be used to cancel the call.
+
+        The built-in event loops keep a heap of timers and wake up in time.
+        This default implementation, for event loops that don't, waits in a
+        background thread.
+        """
+        assert isinstance(when, (int, float))
+        assert callable(callback)
+
+        handle = TimerHandle(when, wrap_in_current_context(callback))
+
+        def wait():
+            delay = when - self.time()
+            if delay > 0:
+                time.sleep(delay)
+            if not handle.cancelled:
+                self.call_from_executor(handle._run)
+
+        th = threading.Thread(target=wait)
+        th.daemon = True
+        th.start()
+        return handle
+
     def create_future(self):
         """
         Create a `Future` object that is attached to this loop.
@@ -167,6 +220,32 @@ class EventLoop(with_metaclass(ABCMeta, object)):
         logger.error('\n'.join(log_lines), exc_info=exc_info)
 
 
+class TimerHandle(object):
+    """
+    Handle for a call that was scheduled using :meth:`.EventLoop.call_later`
+    or :meth:`.EventLoop.call_at`.
+    """
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancel the call. (This has no effect if the callback was called
+        already.)
+        """
+        self.cancelled = True
+
+    def _run(self):
+        if not self.cancelled:
+            self.callback()
+
+    def __repr__(self):
+        return '%s(when=%r, callback=%r, cancelled=%r)' % (
+            self.__class__.__name__, self.when, self.callback, self.cancelled)
+
+
 def get_traceback_from_context(context):
     """
     Get the traceback object from the context.
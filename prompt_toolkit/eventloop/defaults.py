@@ -11,6 +11,7 @@ __all__ = [
     'set_event_loop',
     'run_in_executor',
     'call_from_executor',
+    'call_later',
     'run_until_complete',
 ]
 
@@ -100,11 +101,20 @@ def set_event_loop(loop):
     _loop = loop
 
 
-def run_in_executor(callback, _daemon=False):
+def run_in_executor(callback, _daemon=False, _priority=None):
     """
     Run a long running function in a background thread.
+
+    :param _priority: `None` or one of the priorities from
+        :mod:`prompt_toolkit.eventloop.executor`. (For internal use.)
     """
-    return get_event_loop().run_in_executor(callback, _daemon=_daemon)
+    loop = get_event_loop()
+
+    # Only pass the priority when given. Not every event loop supports it.
+    if _priority is None:
+        return loop.run_in_executor(callback, _daemon=_daemon)
+    else:
+        return loop.run_in_executor(callback, _daemon=_daemon, _priority=_priority)
 
 
 def call_from_executor(callback, _max_postpone_until=None):
@@ -115,6 +125,13 @@ def call_from_executor(callback, _max_postpone_until=None):
         callback, _max_postpone_until=_max_postpone_until)
 
 
+def call_later(delay, callback):
+    """
+    Call this function in the main event loop after `delay` seconds.
+    """
+    return get_event_loop().call_later(delay, callback)
+
+
 def run_until_complete(future, inputhook=None):
     """
     Keep running until this future has been set.
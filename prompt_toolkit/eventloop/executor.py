@@ -0,0 +1,253 @@
+"""
+Thread pool, used by the event loops to implement `run_in_executor`.
+"""
+from __future__ import unicode_literals
+from .context import get_context_id, context
+from .future import Future
+import atexit
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+import weakref
+
+__all__ = [
+    'ThreadPoolExecutor',
+    'HIGH_PRIORITY',
+    'NORMAL_PRIORITY',
+    'LOW_PRIORITY',
+]
+
+#: Priorities for `run_in_executor`. When all workers are busy, pending
+#: callbacks with a lower value are started first. (`HIGH_PRIORITY` callbacks
+#: don't wait for a worker at all.)
+HIGH_PRIORITY = 0  # The user is waiting for this. (Like validation.)
+NORMAL_PRIORITY = 1
+LOW_PRIORITY = 2
+
+_time = getattr(time, 'monotonic', time.time)
+
+
+def _default_max_workers():
+    try:
+        cpu_count = multiprocessing.cpu_count()
+    except NotImplementedError:
+        cpu_count = 1
+    return min(32, cpu_count + 4)
+
+
+# All executors, for waiting on the non-daemon callbacks at exit.
+_executors = weakref.WeakSet()
+
+
+@atexit.register
+def _shutdown_executors():
+    for executor in list(_executors):
+        executor._shutdown_at_exit()
+
+
+class ThreadPoolExecutor(object):
+    """
+    Bounded pool of worker threads.
+
+    Worker threads are started when needed, up to `max_workers`, and stop
+    after being idle for `idle_timeout` seconds. When all workers are busy,
+    callbacks are queued, and started in order of priority.
+
+    A callback that blocks for a long time occupies a worker for that time.
+    When all workers are occupied like this, queued callbacks have to wait,
+    except for `HIGH_PRIORITY` callbacks: for these, an additional worker is
+    started, even if that exceeds `max_workers`.
+
+    Daemon callbacks (like the threads that consume the generators of a
+    `ThreadedCompleter`) can block for as long as the application runs. They
+    don't count against `max_workers`: when no worker is idle, an additional
+    worker is started for them, so that they never occupy the workers that
+    the other callbacks are waiting for.
+
+    The workers are daemon threads. Like for a non-daemon thread, the
+    interpreter waits at exit for the callbacks that were submitted with
+    `daemon=False`. (This happens in an `atexit` handler.)
+
+    :param max_workers: Maximum number of worker threads. (By default, this
+        depends on the number of CPUs.)
+    :param idle_timeout: Number of seconds after which an idle worker stops.
+    """
+    def __init__(self, max_workers=None, idle_timeout=60):
+        if max_workers is None:
+            max_workers = _default_max_workers()
+
+        assert isinstance(max_workers, int) and max_workers > 0
+        assert isinstance(idle_timeout, (int, float))
+
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+
+        self._queue = []  # Heap of (priority, counter, ctx_id, callback, future, daemon).
+        self._counter = itertools.count()  # Keeps the order within a priority.
+        self._condition = threading.Condition()
+        self._worker_count = 0
+        self._idle_worker_count = 0
+        self._non_daemon_count = 0  # Non-daemon callbacks, queued or running.
+        self._daemon_running_count = 0  # Daemon callbacks that are running.
+        self._shutdown = False
+
+        #: Statistics.
+        self.submitted_count = 0
+        self.completed_count = 0
+        self.max_queue_depth = 0
+
+        _executors.add(self)
+
+    @property
+    def queue_depth(self):
+        " Number of callbacks that are waiting for a worker. "
+        return len(self._queue)
+
+    @property
+    def worker_count(self):
+        " Number of running worker threads. "
+        return self._worker_count
+
+    @property
+    def busy_worker_count(self):
+        " Number of workers that are executing a callback. "
+        with self._condition:
+            return self._worker_count - self._idle_worker_count
+
+    def submit(self, callback, priority=NORMAL_PRIORITY, daemon=False):
+        """
+        Call `callback` in one of the worker threads. Returns a `Future` for
+        the result.
+
+        :param daemon: If `False`, the interpreter waits for this callback at
+            exit.
+        """
+        future = Future()
+        self._submit(callback, future, priority, daemon)
+        return future
+
+    def _submit(self, callback, future, priority, daemon=False):
+        assert callable(callback)
+        assert isinstance(future, Future)
+
+        # Like `ThreadWithFuture`, run the callback in the current context.
+        ctx_id = get_context_id()
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('Executor has been shut down.')
+
+            item = (priority, next(self._counter), ctx_id, callback, future, daemon)
+            self.submitted_count += 1
+
+            if daemon:
+                # Don't let daemon callbacks wait in the queue: when no worker
+                # is idle, they get an additional worker of their own.
+                if len(self._queue) >= self._idle_worker_count:
+                    self._start_worker(item)
+                    return
+            else:
+                self._non_daemon_count += 1
+
+            heapq.heappush(self._queue, item)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+
+            # Start a new worker when there are not enough idle workers.
+            # (Workers that are running daemon callbacks don't count.)
+            if (len(self._queue) > self._idle_worker_count and
+                    (self._worker_count - self._daemon_running_count < self.max_workers or
+                     priority <= HIGH_PRIORITY)):
+                self._start_worker()
+            else:
+                self._condition.notify()
+
+    def _start_worker(self, item=None):
+        """
+        Start a worker thread. (Called with `_condition` acquired.)
+
+        :param item: Queue item that this worker executes first.
+        """
+        self._worker_count += 1
+        if item is not None and item[5]:
+            self._daemon_running_count += 1
+
+        t = threading.Thread(target=self._run_worker, args=(item, ))
+        t.daemon = True
+        t.start()
+
+    def _run_worker(self, item=None):
+        while True:
+            with self._condition:
+                deadline = _time() + self.idle_timeout
+
+                while item is None and not self._queue:
+                    remaining = deadline - _time()
+
+                    if self._shutdown or remaining <= 0:
+                        self._worker_count -= 1
+                        self._condition.notify_all()
+                        return
+
+                    self._idle_worker_count += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._idle_worker_count -= 1
+
+                if item is None:
+                    item = heapq.heappop(self._queue)
+                    if item[5]:
+                        self._daemon_running_count += 1
+                _, _, ctx_id, callback, future, daemon = item
+
+            with context(ctx_id):
+                try:
+                    result = callback()
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+
+            with self._condition:
+                self.completed_count += 1
+
+                if daemon:
+                    self._daemon_running_count -= 1
+                else:
+                    self._non_daemon_count -= 1
+                    if not self._non_daemon_count:
+                        self._condition.notify_all()
+
+            # Don't keep a reference while waiting for the next callback.
+            del callback, future
+            item = None
+
+    def _shutdown_at_exit(self):
+        """
+        Block until all the non-daemon callbacks have been executed. Then
+        stop the workers, except for those that are running daemon callbacks.
+        (These are killed when the interpreter exits.)
+        """
+        with self._condition:
+            while self._non_daemon_count:
+                # Don't wait for workers that are blocked in other callbacks.
+                if (not self._idle_worker_count and
+                        any(not item[5] for item in self._queue)):
+                    self._start_worker()
+                self._condition.wait(.1)
+
+            self._shutdown = True
+            self._condition.notify_all()
+
+            while self._worker_count > self._daemon_running_count:
+                self._condition.wait(.1)
+
+    def shutdown(self):
+        """
+        Stop the workers, after the pending callbacks have been executed.
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
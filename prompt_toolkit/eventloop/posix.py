@@ -2,13 +2,15 @@ from __future__ import unicode_literals
 import fcntl
 import os
 import signal
+import threading
 import time
 
-from .base import EventLoop
+from .base import EventLoop, TimerHandle
+from .executor import ThreadPoolExecutor, NORMAL_PRIORITY
 from .future import Future
 from .inputhook import InputHookContext
 from .select import AutoSelector, Selector, fd_to_int
-from .utils import ThreadWithFuture
+from .utils import TimerQueue
 from .context import wrap_in_current_context
 
 __all__ = [
@@ -21,18 +23,24 @@ _now = time.time
 class PosixEventLoop(EventLoop):
     """
     Event loop for posix systems (Linux, Mac os X).
+
+    :param executor: :class:`.ThreadPoolExecutor` for `run_in_executor`.
     """
-    def __init__(self, selector=AutoSelector):
+    def __init__(self, selector=AutoSelector, executor=None):
         assert issubclass(selector, Selector)
+        assert executor is None or isinstance(executor, ThreadPoolExecutor)
 
         super(PosixEventLoop, self).__init__()
 
         self.closed = False
         self._running = False
+        self._thread = None  # The thread running the loop.
 
         self._calls_from_executor = []
         self._read_fds = {}  # Maps fd to handler.
+        self._timers = TimerQueue()
         self.selector = selector()
+        self.executor = executor or ThreadPoolExecutor()
 
         self._signal_handler_mappings = {}  # signal: previous_handler
 
@@ -61,6 +69,7 @@ class PosixEventLoop(EventLoop):
 
         try:
             self._running = True
+            self._thread = threading.current_thread()
 
             while not future.done():
                 self._run_once(inputhook)
@@ -71,6 +80,7 @@ class PosixEventLoop(EventLoop):
 
         finally:
             self._running = False
+            self._thread = None
 
     def _run_once(self, inputhook):
         # Call inputhook.
@@ -81,11 +91,11 @@ class PosixEventLoop(EventLoop):
 
             def ready(wait):
                 " True when there is input ready. The inputhook should return control. "
-                return self._ready_for_reading(None if wait else 0) != []
+                return self._ready_for_reading(self._get_timeout() if wait else 0) != []
             self._inputhook_context.call_inputhook(ready, inputhook)
 
-        # Wait until input is ready.
-        fds = self._ready_for_reading(None)
+        # Wait until input is ready, or until the next timer expires.
+        fds = self._ready_for_reading(self._get_timeout())
 
         # When any of the FDs are ready. Call the appropriate callback.
         if fds:
@@ -141,6 +151,17 @@ class PosixEventLoop(EventLoop):
                 for t, _ in low_priority_tasks:
                     self._run_task(t)
 
+        # Run the timers that expired.
+        for handle in self._timers.pop_expired(self.time()):
+            self._run_task(handle._run)
+
+    def _get_timeout(self):
+        """
+        Time to wait for input, before the next timer expires. (`None` when
+        there are no timers.)
+        """
+        return self._timers.get_timeout(self.time())
+
     def _run_task(self, t):
         """
         Run a task in the event loop. If it fails, print the exception.
@@ -199,26 +220,31 @@ class PosixEventLoop(EventLoop):
         # Return the previous signal handler.
         return self._signal_handler_mappings.get(signum, previous)
 
-    def run_in_executor(self, callback, _daemon=False):
+    def run_in_executor(self, callback, _daemon=False, _priority=NORMAL_PRIORITY):
         """
         Run a long running function in a background thread.
         (This is recommended for code that could block the event loop.)
         Similar to Twisted's ``deferToThread``.
+
+        The function is executed by `self.executor`, a bounded pool of
+        worker threads. Unless `_daemon` is `True`, the interpreter waits for
+        it at exit.
         """
-        th = ThreadWithFuture(callback, daemon=_daemon)
+        future = self.create_future()
 
         # Wait until the main thread is idle.
-        # We start the thread by using `call_from_executor`. The event loop
-        # favours processing input over `calls_from_executor`, so the thread
+        # We submit the callback by using `call_from_executor`. The event loop
+        # favours processing input over `calls_from_executor`, so the callback
         # will not start until there is no more input to process and the main
         # thread becomes idle for an instant. This is good, because Python
         # threading favours CPU over I/O -- an autocompletion thread in the
         # background would cause a significantly slow down of the main thread.
         # It is mostly noticeable when pasting large portions of text while
         # having real time autocompletion while typing on.
-        self.call_from_executor(th.start)
+        self.call_from_executor(
+            lambda: self.executor._submit(callback, future, _priority, _daemon))
 
-        return th.future
+        return future
 
     def call_from_executor(self, callback, _max_postpone_until=None):
         """
@@ -234,7 +260,30 @@ class PosixEventLoop(EventLoop):
         callback = wrap_in_current_context(callback)
 
         self._calls_from_executor.append((callback, _max_postpone_until))
+        self._wakeup()
 
+    def call_at(self, when, callback):
+        """
+        Call `callback` in the event loop at the given time. (A value returned
+        by `time`.) Returns a `TimerHandle` that can be used to cancel the
+        call. This is thread safe.
+        """
+        assert isinstance(when, (int, float))
+        assert callable(callback)
+
+        handle = TimerHandle(when, wrap_in_current_context(callback))
+
+        # When called from another thread, wake up the loop if it has to
+        # recompute its timeout.
+        if self._timers.add(handle) and threading.current_thread() is not self._thread:
+            self._wakeup()
+
+        return handle
+
+    def _wakeup(self):
+        """
+        Interrupt the `select` call of the event loop. (Thread safe.)
+        """
         if self._schedule_pipe:
             try:
                 os.write(self._schedule_pipe[1], b'x')
@@ -263,6 +312,8 @@ class PosixEventLoop(EventLoop):
         if self._inputhook_context:
             self._inputhook_context.close()
 
+        self.executor.shutdown()
+
     def add_reader(self, fd, callback):
         " Add read file descriptor to the event loop. "
         callback = wrap_in_current_context(callback)
@@ -5,6 +5,7 @@ from __future__ import unicode_literals, absolute_import
 import sys
 import abc
 import errno
+import math
 import select
 import six
 
@@ -154,6 +155,10 @@ class PollSelector(Selector):
         assert isinstance(fd, int)
 
     def select(self, timeout):
+        # `poll` takes the timeout in milliseconds.
+        if timeout is not None:
+            timeout = int(math.ceil(timeout * 1000))
+
         tuples = self._poll.poll(timeout)  # Returns (fd, event) tuples.
         return [t[0] for t in tuples]
 
@@ -1,10 +1,13 @@
 from __future__ import unicode_literals
+import heapq
+import itertools
 import threading
 from .future import Future
 from .context import get_context_id, context
 
 __all__ = [
     'ThreadWithFuture',
+    'TimerQueue',
 ]
 
 
@@ -40,3 +43,55 @@ class ThreadWithFuture(object):
         if self.daemon:
             t.daemon = True
         t.start()
+
+
+class TimerQueue(object):
+    """
+    Heap of :class:`~prompt_toolkit.eventloop.base.TimerHandle` objects,
+    ordered by deadline. Used by the event loops to implement `call_at`.
+    (Thread safe.)
+    """
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()  # Keeps the order for equal deadlines.
+        self._lock = threading.Lock()
+
+    def add(self, handle):
+        """
+        Add a timer. Return `True` when this is now the first deadline. (When
+        the event loop has to wake up earlier than it planned to.)
+        """
+        with self._lock:
+            heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+            return self._heap[0][2] is handle
+
+    def get_timeout(self, now):
+        """
+        Return the number of seconds until the first deadline, or `None` when
+        there are no timers.
+        """
+        with self._lock:
+            heap = self._heap
+
+            # Drop cancelled timers, so that we don't wake up for them.
+            while heap and heap[0][2].cancelled:
+                heapq.heappop(heap)
+
+            if heap:
+                return max(0, heap[0][0] - now)
+
+    def pop_expired(self, now):
+        """
+        Remove and return the timers that have expired, in order.
+        """
+        result = []
+
+        with self._lock:
+            heap = self._heap
+
+            while heap and heap[0][0] <= now:
+                handle = heapq.heappop(heap)[2]
+                if not handle.cancelled:
+                    result.append(handle)
+
+        return result
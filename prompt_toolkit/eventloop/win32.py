@@ -4,16 +4,19 @@ Win32 event loop.
 from __future__ import unicode_literals
 
 from ..win32_types import SECURITY_ATTRIBUTES
-from .base import EventLoop
+from .base import EventLoop, TimerHandle
 from .context import wrap_in_current_context
+from .executor import ThreadPoolExecutor, NORMAL_PRIORITY
 from .future import Future
 from .inputhook import InputHookContext
-from .utils import ThreadWithFuture
+from .utils import TimerQueue
 
 from ctypes import windll, pointer
 from ctypes.wintypes import DWORD, BOOL, HANDLE
 
+import math
 import msvcrt
+import threading
 
 __all__ = [
     'Win32EventLoop',
@@ -31,8 +34,10 @@ class Win32EventLoop(EventLoop):
 
     :param recognize_paste: When True, try to discover paste actions and turn
         the event into a BracketedPaste.
+    :param executor: :class:`.ThreadPoolExecutor` for `run_in_executor`.
     """
-    def __init__(self, recognize_paste=True):
+    def __init__(self, recognize_paste=True, executor=None):
+        assert executor is None or isinstance(executor, ThreadPoolExecutor)
         super(Win32EventLoop, self).__init__()
 
         self._event = create_win32_event()
@@ -40,6 +45,9 @@ class Win32EventLoop(EventLoop):
 
         self.closed = False
         self._running = False
+        self._thread = None  # The thread running the loop.
+        self._timers = TimerQueue()
+        self.executor = executor or ThreadPoolExecutor()
 
         # Additional readers.
         self._read_fds = {}  # Maps fd to handler.
@@ -63,6 +71,7 @@ class Win32EventLoop(EventLoop):
 
         try:
             self._running = True
+            self._thread = threading.current_thread()
 
             while not future.done():
                 self._run_once(inputhook)
@@ -73,6 +82,7 @@ class Win32EventLoop(EventLoop):
 
         finally:
             self._running = False
+            self._thread = None
 
     def _run_once(self, inputhook):
         # Call inputhook.
@@ -83,11 +93,11 @@ class Win32EventLoop(EventLoop):
 
             def ready(wait):
                 " True when there is input ready. The inputhook should return control. "
-                return bool(self._ready_for_reading(INFINITE if wait else 0))
+                return bool(self._ready_for_reading(self._get_timeout() if wait else 0))
             self._inputhook_context.call_inputhook(ready, inputhook)
 
-        # Wait for the next event.
-        handle = self._ready_for_reading(INFINITE)
+        # Wait for the next event, or until the next timer expires.
+        handle = self._ready_for_reading(self._get_timeout())
 
         if handle == self._event:
             # When the Windows Event has been trigger, process the messages in the queue.
@@ -98,6 +108,20 @@ class Win32EventLoop(EventLoop):
             callback = self._read_fds[handle]
             self._run_task(callback)
 
+        # Run the timers that expired.
+        for timer in self._timers.pop_expired(self.time()):
+            self._run_task(timer._run)
+
+    def _get_timeout(self):
+        """
+        Time to wait (in milliseconds), before the next timer expires.
+        """
+        timeout = self._timers.get_timeout(self.time())
+        if timeout is None:
+            return INFINITE
+        else:
+            return int(math.ceil(timeout * 1000))
+
     def _run_task(self, t):
         try:
             t()
@@ -123,19 +147,22 @@ class Win32EventLoop(EventLoop):
         if self._inputhook_context:
             self._inputhook_context.close()
 
-    def run_in_executor(self, callback, _daemon=False):
+        self.executor.shutdown()
+
+    def run_in_executor(self, callback, _daemon=False, _priority=NORMAL_PRIORITY):
         """
         Run a long running function in a background thread.
         (This is recommended for code that could block the event loop.)
         Similar to Twisted's ``deferToThread``.
         """
-        th = ThreadWithFuture(callback, daemon=_daemon)
+        future = self.create_future()
 
-        # Wait until the main thread is idle for an instant before starting the
-        # executor. (Like in eventloop/posix.py, we start the executor using
+        # Wait until the main thread is idle for an instant before submitting
+        # to the executor. (Like in eventloop/posix.py, we submit using
         # `call_from_executor`.)
-        self.call_from_executor(th.start)
-        return th.future
+        self.call_from_executor(
+            lambda: self.executor._submit(callback, future, _priority, _daemon))
+        return future
 
     def call_from_executor(self, callback, _max_postpone_until=None):
         """
@@ -150,6 +177,24 @@ class Win32EventLoop(EventLoop):
         # Set Windows event.
         windll.kernel32.SetEvent(self._event)
 
+    def call_at(self, when, callback):
+        """
+        Call `callback` in the event loop at the given time. (A value returned
+        by `time`.) Returns a `TimerHandle` that can be used to cancel the
+        call. This is thread safe.
+        """
+        assert isinstance(when, (int, float))
+        assert callable(callback)
+
+        handle = TimerHandle(when, wrap_in_current_context(callback))
+
+        # When called from another thread, wake up the loop if it has to
+        # recompute its timeout.
+        if self._timers.add(handle) and threading.current_thread() is not self._thread:
+            windll.kernel32.SetEvent(self._event)
+
+        return handle
+
     def _process_queued_calls_from_executor(self):
         # Process calls from executor.
         calls_from_executor = self._calls_from_executor[:]
@@ -12,16 +12,31 @@ from .utils import Event
 from .eventloop import AsyncGeneratorItem, From, ensure_future, consume_async_generator, generator_to_async_generator
 
 from abc import ABCMeta, abstractmethod
-from six import with_metaclass, text_type
+from array import array
+from bisect import bisect_right
+from six import with_metaclass, text_type, PY2
 
+import atexit
 import datetime
+import mmap
 import os
+import re
+import sys
+import threading
+import weakref
+import zlib
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 __all__ = [
     'History',
     'ThreadedHistory',
     'DummyHistory',
     'FileHistory',
+    'IndexedFileHistory',
     'InMemoryHistory',
 ]
 
@@ -32,6 +47,10 @@ class History(with_metaclass(ABCMeta, object)):
 
     This also includes abstract methods for loading/storing history.
     """
+    # Index for the searches, created when needed. (A class attribute, so
+    # that it also exists for subclasses that don't call `__init__`.)
+    _index = None
+
     def __init__(self):
         # In memory storage for strings.
         self._loading = False
@@ -48,6 +67,10 @@ class History(with_metaclass(ABCMeta, object)):
         def add_string(string):
             " Got one string from the asynchronous history generator. "
             self._loaded_strings.insert(0, string)
+
+            # The index is based on positions. It has to be built again.
+            self._index = None
+
             self._item_loaded.fire()
 
         yield From(consume_async_generator(
@@ -81,6 +104,36 @@ class History(with_metaclass(ABCMeta, object)):
         self._loaded_strings.append(string)
         self.store_string(string)
 
+    def find_matches(self, text, start=0, stop=None, backward=False,
+                     prefix=False, ignore_case=False):
+        """
+        Generator that yields the indexes (in `get_strings`) of the strings
+        that contain `text`, or that start with `text` when `prefix` is
+        `True`. Only the strings in the range [start, stop) are searched, in
+        descending order when `backward` is `True`.
+
+        This searches through an index: all strings joined together, which is
+        created the first time it's needed and extended when strings are
+        appended. The search itself happens in C (`str.find`), and stops as
+        soon as the caller doesn't need any more matches.
+        """
+        if self._index is None:
+            self._index = _HistoryIndex(self.get_strings())
+        return self._index.find_matches(
+            text, start, stop, backward, prefix, ignore_case)
+
+    def find_line_with_prefix(self, text):
+        """
+        Return the most recent line in the history that starts with `text`, or
+        `None`. (Strings can consist of several lines. Within a string, the
+        last line is the most recent.)
+
+        Like `find_matches`, this searches through the index, backwards.
+        """
+        if self._index is None:
+            self._index = _HistoryIndex(self.get_strings())
+        return self._index.find_line_with_prefix(text)
+
     #
     # Implementation for specific backends.
     #
@@ -120,6 +173,172 @@ class History(with_metaclass(ABCMeta, object)):
         """
 
 
+def _string_matches(string, text, prefix=False, ignore_case=False):
+    """
+    True when `string` contains `text` (or starts with it, if `prefix` is
+    `True`).
+    """
+    if ignore_case:
+        string = string.lower()
+        text = text.lower()
+
+    if prefix:
+        return string.startswith(text)
+    else:
+        return text in string
+
+
+# The characters at which `str.splitlines` splits.
+_LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+
+class _HistoryIndex(object):
+    """
+    Index for searching through a list of history strings.
+
+    All strings are joined together, with a separator before and after every
+    string, so that a substring (or prefix: separator + text) search for all
+    the strings becomes one `str.find` call. `offsets` contains the position
+    of the separator in front of every string.
+
+    Only appending strings is supported. (The index has to be created again
+    when strings are inserted anywhere else.)
+    """
+    _SEPARATOR = '\0'
+
+    # Translation table that replaces the line breaks by the separator.
+    _LINES_TABLE = dict.fromkeys(map(ord, _LINE_BREAKS), _SEPARATOR)
+
+    def __init__(self, strings):
+        self.strings = strings
+        self._text = self._SEPARATOR
+        self._offsets = array(_INDEX_TYPECODE, [0])
+        self._lower_text = None  # Created when needed.
+        self._lower_offsets = None
+        self._lines_text = None  # Created when needed.
+
+    def _update(self):
+        " Add the strings that were appended since the last update. "
+        count = len(self._offsets) - 1
+        new_strings = self.strings[count:]
+
+        if new_strings:
+            old_length = len(self._text)
+            self._text, self._offsets = self._extend(
+                self._text, self._offsets, new_strings)
+
+            if self._lower_text is not None:
+                self._lower_text, self._lower_offsets = self._extend(
+                    self._lower_text, self._lower_offsets,
+                    [s.lower() for s in new_strings])
+
+            if self._lines_text is not None:
+                self._lines_text += self._text[old_length:].translate(self._LINES_TABLE)
+
+    def _extend(self, text, offsets, strings):
+        sep = self._SEPARATOR
+        offsets = offsets[:]
+        position = offsets[-1]
+
+        for string in strings:
+            position += len(string) + 1
+            offsets.append(position)
+
+        return text + sep.join(strings) + sep, offsets
+
+    def _get_lower(self):
+        " Text and offsets for case insensitive searches. "
+        if self._lower_text is None:
+            lower_text = self._text.lower()
+
+            if len(lower_text) == len(self._text):
+                self._lower_text = lower_text
+                self._lower_offsets = self._offsets
+            else:
+                # Some characters have a lower case variant of another length.
+                self._lower_text, self._lower_offsets = self._extend(
+                    self._SEPARATOR, array(_INDEX_TYPECODE, [0]),
+                    [s.lower() for s in self.strings[:len(self._offsets) - 1]])
+
+        return self._lower_text, self._lower_offsets
+
+    def find_line_with_prefix(self, text):
+        """
+        Return the last line (of all strings) that starts with `text`.
+        """
+        self._update()
+        sep = self._SEPARATOR
+
+        if not text:
+            # Every line matches. (Not searched in the index, because a final
+            # line break doesn't start a new line for `splitlines`.)
+            for i in range(len(self._offsets) - 2, -1, -1):
+                lines = self.strings[i].splitlines()
+                if lines:
+                    return lines[-1]
+            return None
+
+        if sep in text or any(c in text for c in _LINE_BREAKS):
+            return None
+
+        # Like `_text`, but with a separator between the lines too. (An empty
+        # line appears between '\r' and '\n', but it never matches.)
+        if self._lines_text is None:
+            self._lines_text = self._text.translate(self._LINES_TABLE)
+        lines_text = self._lines_text
+
+        position = lines_text.rfind(sep + text)
+        if position == -1:
+            return None
+
+        return lines_text[position + 1:lines_text.index(sep, position + 1)]
+
+    def find_matches(self, text, start, stop, backward, prefix, ignore_case):
+        self._update()
+
+        if ignore_case:
+            search_text, offsets = self._get_lower()
+            key = text.lower()
+        else:
+            search_text, offsets = self._text, self._offsets
+            key = text
+
+        if prefix or not key:
+            # (Also for empty substrings, which match everything.)
+            key = self._SEPARATOR + key
+
+        count = len(offsets) - 1
+        start = max(0, start)
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return
+
+        low = offsets[start]
+        high = offsets[stop]
+        strings = self.strings
+
+        while True:
+            if backward:
+                position = search_text.rfind(key, low, high)
+            else:
+                position = search_text.find(key, low, high)
+
+            if position == -1:
+                return
+
+            i = bisect_right(offsets, position) - 1
+
+            # Continue in the next string. (Only one result for every string.)
+            if backward:
+                high = offsets[i]
+            else:
+                low = offsets[i + 1]
+
+            # (The text could contain the separator. Verify the match.)
+            if _string_matches(strings[i], text, prefix, ignore_case):
+                yield i
+
+
 class ThreadedHistory(History):
     """
     Wrapper that runs the `load_history_strings` generator in a thread.
@@ -182,9 +401,36 @@ class DummyHistory(History):
 class FileHistory(History):
     """
     :class:`.History` class that stores all strings in a file.
+
+    :param write_in_background: Queue the strings and write them from a
+        background thread, in batches. Accepting input will never have to wait
+        for the disk. (Call `flush` to wait for the pending writes.)
+    :param fsync: Call `os.fsync` after every write, so that the strings are
+        really on disk.
+    :param max_size: When the file grows beyond this amount of bytes, it's
+        compacted: only the most recent entries that fit in half of this size
+        are kept. (Entries that other processes append to the file during the
+        compaction can get lost.)
+    :param deduplicate: Don't store a string if it's the same as the previous
+        one, and drop older duplicates when compacting.
     """
-    def __init__(self, filename):
+    def __init__(self, filename, write_in_background=False, fsync=False,
+                 max_size=None, deduplicate=False):
+        assert max_size is None or max_size > 0
+
         self.filename = filename
+        self.write_in_background = write_in_background
+        self.fsync = fsync
+        self.max_size = max_size
+        self.deduplicate = deduplicate
+
+        self._last_stored_string = None
+
+        # Entries that wait to be written in the background, and the thread
+        # that writes them. (The thread stops when there's nothing left.)
+        self._pending_entries = []
+        self._writer_thread = None
+        self._writer_condition = threading.Condition(threading.Lock())
         super(FileHistory, self).__init__()
 
     def load_history_strings(self):
@@ -215,11 +461,421 @@ class FileHistory(History):
         return reversed(strings)
 
     def store_string(self, string):
-        # Save to file.
+        if self.deduplicate:
+            if string == self._last_stored_string:
+                return
+            self._last_stored_string = string
+
+        # (Format it right away, so that the timestamp is correct.)
+        entry = '\n# %s\n' % datetime.datetime.now()
+        entry += ''.join('+%s\n' % line for line in string.split('\n'))
+
+        if self.write_in_background:
+            with self._writer_condition:
+                self._pending_entries.append(entry)
+
+                if self._writer_thread is None:
+                    self._writer_thread = threading.Thread(target=self._write_in_background)
+                    self._writer_thread.daemon = True
+                    self._writer_thread.start()
+
+                    # Don't lose the pending strings when the application exits.
+                    _histories_to_flush.add(self)
+        else:
+            self._write_entries([entry])
+
+    def flush(self):
+        """
+        Wait until all strings that are queued for writing in the background
+        have been written.
+        """
+        with self._writer_condition:
+            while self._writer_thread is not None:
+                self._writer_condition.wait()
+
+    def _write_in_background(self):
+        condition = self._writer_condition
+
+        try:
+            while True:
+                # Write everything that's queued at once. Stop when nothing is
+                # left. (A new thread is started for the next string.)
+                with condition:
+                    entries = self._pending_entries
+                    self._pending_entries = []
+
+                    if not entries:
+                        self._stop_writer()
+                        return
+
+                try:
+                    self._write_entries(entries)
+                except (IOError, OSError):
+                    pass  # History is not critical.
+        finally:
+            # When writing failed unexpectedly, don't let `flush` wait forever.
+            with condition:
+                if self._writer_thread is threading.current_thread():
+                    self._stop_writer()
+
+    def _stop_writer(self):
+        " Mark the writer thread as stopped. (Called with the lock acquired.) "
+        self._writer_thread = None
+        _histories_to_flush.discard(self)
+        self._writer_condition.notify_all()
+
+    def _write_entries(self, entries):
         with open(self.filename, 'ab') as f:
-            def write(t):
-                f.write(t.encode('utf-8'))
+            # (Strings with lone surrogates can't be encoded. These come for
+            # instance from undecodable input.)
+            f.write(''.join(entries).encode('utf-8', 'replace'))
+
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        if self.max_size is not None and os.path.getsize(self.filename) > self.max_size:
+            self._compact()
+
+    def _compact(self):
+        """
+        Rewrite the history file, keeping only the most recent entries that
+        fit in half of `max_size`.
+        """
+        # Collect the entries as (comment lines, '+' lines) byte strings.
+        entries = []
+        comments = []
+        lines = []
+
+        with open(self.filename, 'rb') as f:
+            for line in f:
+                if line.startswith(b'+'):
+                    lines.append(line)
+                else:
+                    if lines:
+                        entries.append((b''.join(comments), b''.join(lines)))
+                        comments = []
+                        lines = []
+                    if line.strip():
+                        comments.append(line)
+
+            if lines:
+                entries.append((b''.join(comments), b''.join(lines)))
+
+        # Keep the newest entries.
+        result = []
+        seen = set()
+        size = 0
+
+        for comment, lines in reversed(entries):
+            if self.deduplicate:
+                if lines in seen:
+                    continue
+                seen.add(lines)
+
+            size += 1 + len(comment) + len(lines)
+            if size > self.max_size // 2 and result:
+                break
+            result.append(b'\n' + comment + lines)
+
+        # Write to a temporary file first, so that we never end up with a
+        # half written history.
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(b''.join(reversed(result)))
+
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        _replace_file(tmp_filename, self.filename)
+
+
+# `FileHistory` instances that are writing in the background. (Weak
+# references, the histories themselves are kept alive by their thread.)
+_histories_to_flush = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_histories():
+    " Wait for the background writes of all histories, when exiting. "
+    for history in list(_histories_to_flush):
+        history.flush()
+
+
+def _replace_file(src, dst):
+    " Atomically replace `dst` by `src`. (As far as the platform allows.) "
+    try:
+        os.replace(src, dst)
+    except AttributeError:  # Python 2.
+        if os.path.exists(dst) and sys.platform == 'win32':
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+# Typecode for the offsets in the index. (Python 2 doesn't know 'q'.)
+_INDEX_TYPECODE = 'l' if PY2 else 'q'
+_INDEX_VERSION = 1
 
-            write('\n# %s\n' % datetime.datetime.now())
-            for line in string.split('\n'):
-                write('+%s\n' % line)
+# Number of bytes at the start of the history file that are used to recognize
+# whether an index still belongs to that file.
+_INDEX_CHECKSUM_SIZE = 4096
+
+# One history entry: consecutive lines starting with '+'.
+_ENTRY_RE = re.compile(br'^\+.*(?:\n\+.*)*', re.MULTILINE)
+
+
+class IndexedFileHistory(FileHistory):
+    """
+    :class:`.FileHistory` for big history files.
+
+    Instead of reading and decoding the whole file at start-up, the file is
+    memory-mapped and only the offsets of the entries are collected. Entries
+    are read and decoded when they are accessed. (The file stays open for
+    that.) `get_strings` returns a lazy sequence that the
+    :class:`~prompt_toolkit.buffer.Buffer` can use directly.
+
+    The offsets are persisted in an index file, next to the history file.
+    When the history file grows, only the new part of it has to be indexed.
+    (The file format is the same as for :class:`.FileHistory`.)
+
+    :param index_filename: Where to store the index. (Defaults to the name of
+        the history file with an ``.index`` suffix.)
+
+    The other parameters are the same as for :class:`.FileHistory`.
+    """
+    def __init__(self, filename, index_filename=None, write_in_background=False,
+                 fsync=False, max_size=None, deduplicate=False):
+        self.index_filename = index_filename or filename + '.index'
+        super(IndexedFileHistory, self).__init__(
+            filename, write_in_background=write_in_background, fsync=fsync,
+            max_size=max_size, deduplicate=deduplicate)
+        self._loaded_strings = None
+
+    def start_loading(self):
+        # Building the index happens synchronously. There is nothing left
+        # that has to be loaded in the background.
+        self.get_strings()
+
+    def get_strings(self):
+        if self._loaded_strings is None:
+            self._loaded_strings = _IndexedStrings(_IndexedEntries(*self._load()))
+        return self._loaded_strings
+
+    def append_string(self, string):
+        self.get_strings().append(string)
+        self.store_string(string)
+
+    def load_history_strings(self):
+        return reversed(self.get_strings()[:])
+
+    def _compact(self):
+        # The file is going to be replaced. Read the entries that are still
+        # needed, and close it. (On Windows, an open file can't be replaced.)
+        if self._loaded_strings is not None:
+            self._loaded_strings.close()
+
+        super(IndexedFileHistory, self)._compact()
+
+    def _load(self):
+        """
+        Open the history file and index it. Returns a `(fd, offsets)` tuple.
+        """
+        offsets = array(_INDEX_TYPECODE)
+
+        try:
+            fd = os.open(self.filename, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        except (IOError, OSError):
+            return None, offsets
+
+        try:
+            if os.fstat(fd).st_size == 0:
+                # (Empty files can't be mapped.)
+                os.close(fd)
+                return None, offsets
+
+            # The map is only used for indexing. (When the file is truncated
+            # by someone else, accessing the map crashes the process.)
+            data = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            try:
+                self._index_data(data, offsets)
+            finally:
+                data.close()
+        except (IOError, OSError):
+            os.close(fd)
+            return None, array(_INDEX_TYPECODE)
+
+        return fd, offsets
+
+    def _index_data(self, data, offsets):
+        " Collect the offsets of the entries in `data`. "
+        indexed_size = self._read_index(data, offsets)
+
+        if indexed_size != len(data):
+            # Continue at the start of the last known entry. (More lines could
+            # have been appended to it.)
+            if offsets:
+                position = offsets[-2]
+                del offsets[-2:]
+            else:
+                position = 0
+
+            for m in _ENTRY_RE.finditer(data, position):
+                offsets.append(m.start())
+                offsets.append(m.end())
+
+            self._write_index(data, offsets)
+
+    def _read_index(self, data, offsets):
+        """
+        Read the offsets from the index file into `offsets`. Returns the size
+        of the history file when it was indexed, or zero if the index can't be
+        used.
+        """
+        try:
+            with open(self.index_filename, 'rb') as f:
+                content = f.read()
+        except (IOError, OSError):
+            return 0
+
+        index = array(_INDEX_TYPECODE)
+        try:
+            if PY2:
+                index.fromstring(content)
+            else:
+                index.frombytes(content)
+        except ValueError:
+            return 0
+
+        if len(index) < 3 or len(index) % 2 == 0:
+            return 0
+
+        version, indexed_size, checksum = index[:3]
+
+        if (version != _INDEX_VERSION or indexed_size > len(data) or
+                checksum != _checksum(data, indexed_size) or
+                (len(index) > 3 and index[-1] > indexed_size)):
+            # The history file was replaced or truncated.
+            return 0
+
+        offsets.extend(index[3:])
+        return indexed_size
+
+    def _write_index(self, data, offsets):
+        index = array(_INDEX_TYPECODE, [
+            _INDEX_VERSION, len(data), _checksum(data, len(data))])
+        index.extend(offsets)
+
+        try:
+            with open(self.index_filename, 'wb') as f:
+                index.tofile(f)
+        except (IOError, OSError):
+            pass  # Not being able to store the index is not fatal.
+
+
+# (Not available on Windows and Python 2.)
+_pread = getattr(os, 'pread', None)
+
+
+def _checksum(data, size):
+    " Checksum of the start of the history file. "
+    return zlib.crc32(data[:min(size, _INDEX_CHECKSUM_SIZE)]) & 0xffffffff
+
+
+class _IndexedEntries(object):
+    """
+    Reads the entries of an indexed history file, when they are accessed.
+    (Shared by all copies of an :class:`._IndexedStrings`.)
+
+    :param fd: File descriptor of the history file. (Or `None`.)
+    :param offsets: `array` of (start, end) offsets for every entry.
+    """
+    def __init__(self, fd, offsets):
+        self._fd = fd
+        self._offsets = offsets
+        self._strings = None  # All strings, once the file is closed.
+        self._lock = threading.Lock()  # For `lseek` and `read`.
+
+    def __del__(self):
+        if self._fd is not None:
+            os.close(self._fd)
+
+    def __len__(self):
+        return len(self._offsets) // 2
+
+    def get(self, index):
+        " Return the string for the entry at this position. "
+        with self._lock:
+            if self._strings is not None:
+                return self._strings[index]
+            return self._read(index)
+
+    def _read(self, index):
+        # Drop the leading '+' of every line.
+        start = self._offsets[index * 2] + 1
+        size = self._offsets[index * 2 + 1] - start
+
+        if _pread is not None:
+            data = _pread(self._fd, size, start)
+        else:
+            os.lseek(self._fd, start, os.SEEK_SET)
+            data = os.read(self._fd, size)
+
+        if len(data) != size:
+            return ''  # The file was truncated by someone else.
+
+        return data.decode('utf-8').replace('\n+', '\n')
+
+    def close(self):
+        " Read all the entries into memory, and close the file. "
+        with self._lock:
+            if self._strings is None:
+                self._strings = [self._read(i) for i in range(len(self))]
+
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+
+
+class _IndexedStrings(Sequence):
+    """
+    Lazy sequence of the strings in an :class:`.IndexedFileHistory`. (Oldest
+    first, like the list returned by `History.get_strings`.)
+
+    :param entries: :class:`._IndexedEntries` for the history file.
+    :param appended: Strings appended after the file was indexed.
+    """
+    def __init__(self, entries, appended=None):
+        self._entries = entries
+        self._indexed_count = len(entries)
+        self._appended = appended or []
+
+    def __len__(self):
+        return self._indexed_count + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index == slice(None):
+                # Copying is cheap: the entries are shared.
+                return _IndexedStrings(self._entries, self._appended[:])
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError('History index out of range.')
+
+        if index < self._indexed_count:
+            return self._entries.get(index)
+
+        return self._appended[index - self._indexed_count]
+
+    def append(self, string):
+        self._appended.append(string)
+
+    def close(self):
+        """
+        Read all the entries into memory, and close the history file. (For
+        all the copies of this sequence.)
+        """
+        self._entries.close()
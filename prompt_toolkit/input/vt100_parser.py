@@ -33,6 +33,11 @@ _cpr_response_prefix_re = re.compile('^' + re.escape('\x1b[') + r'[\d;]*\Z')
 
 _mouse_event_prefix_re = re.compile('^' + re.escape('\x1b[') + r'(<?[\d;]*|M.{0,2})\Z')
 
+# Regex matching a run of plain text: characters that don't start any escape
+# sequence or control key. (All the keys in `ANSI_SEQUENCES` start with a
+# control character.)
+_plain_text_re = re.compile('[^\x00-\x1f\x7f]+')
+
 
 class _Flush(object):
     """ Helper object to indicate flush operation to the parser. """
@@ -86,6 +91,7 @@ class Vt100Parser(object):
 
     def reset(self, request=False):
         self._in_bracketed_paste = False
+        self._has_prefix = False  # True when the parser has buffered input.
         self._start_parser()
 
     def _start_parser(self):
@@ -129,6 +135,7 @@ class Vt100Parser(object):
                 retry = False
             else:
                 # Get next character.
+                self._has_prefix = bool(prefix)
                 c = yield
 
                 if c == _Flush:
@@ -207,16 +214,34 @@ class Vt100Parser(object):
 
                 self.feed(remaining)
 
-        # Handle normal input character by character.
+        # Handle normal input.
         else:
-            for i, c in enumerate(data):
+            i = 0
+            length = len(data)
+            match_plain_text = _plain_text_re.match
+            feed_key_callback = self.feed_key_callback
+
+            while i < length:
                 if self._in_bracketed_paste:
                     # Quit loop and process from this position when the parser
                     # entered bracketed paste.
                     self.feed(data[i:])
                     break
-                else:
-                    self._input_parser.send(c)
+
+                # Fast path: when nothing is buffered in the parser, a run of
+                # plain text can't be part of any escape sequence. Turn it
+                # into key presses right away.
+                if not self._has_prefix:
+                    m = match_plain_text(data, i)
+                    if m:
+                        for c in m.group():
+                            feed_key_callback(KeyPress(c, c))
+                        i = m.end()
+                        continue
+
+                # Otherwise, go character by character through the parser.
+                self._input_parser.send(data[i])
+                i += 1
 
     def flush(self):
         """
@@ -145,12 +145,20 @@ class KeyBindings(KeyBindingsBase):
         self.bindings = []
         self._get_bindings_for_keys_cache = SimpleCache(maxsize=10000)
         self._get_bindings_starting_with_keys_cache = SimpleCache(maxsize=1000)
+        self._trie = None  # Created when needed.
         self.__version = 0  # For cache invalidation.
 
     def _clear_cache(self):
         self.__version += 1
         self._get_bindings_for_keys_cache.clear()
         self._get_bindings_starting_with_keys_cache.clear()
+        self._trie = None
+
+    def _get_trie(self):
+        " Return a `_KeyTrie` for the current bindings. "
+        if self._trie is None:
+            self._trie = _KeyTrie(self.bindings)
+        return self._trie
 
     @property
     def _version(self):
@@ -272,26 +280,14 @@ class KeyBindings(KeyBindingsBase):
         """
         def get():
             result = []
-            for b in self.bindings:
-                if len(keys) == len(b.keys):
-                    match = True
-                    any_count = 0
-
-                    for i, j in zip(b.keys, keys):
-                        if i != j and i != Keys.Any:
-                            match = False
-                            break
-
-                        if i == Keys.Any:
-                            any_count += 1
-
-                    if match:
-                        result.append((any_count, b))
+            for node in self._get_trie().find_nodes(keys):
+                result.extend(node.bindings)
 
             # Place bindings that have more 'Any' occurrences in them at the end.
-            result = sorted(result, key=lambda item: -item[0])
+            # (Otherwise, keep the order in which they were added.)
+            result.sort(key=lambda item: (-item[1], item[0]))
 
-            return [item[1] for item in result]
+            return [item[2] for item in result]
 
         return self._get_bindings_for_keys_cache.get(keys, get)
 
@@ -306,20 +302,79 @@ class KeyBindings(KeyBindingsBase):
         """
         def get():
             result = []
-            for b in self.bindings:
-                if len(keys) < len(b.keys):
-                    match = True
-                    for i, j in zip(b.keys, keys):
-                        if i != j and i != Keys.Any:
-                            match = False
-                            break
-                    if match:
-                        result.append(b)
-            return result
+            for node in self._get_trie().find_nodes(keys):
+                result.extend(node.longer_bindings)
+
+            # Keep the order in which they were added.
+            result.sort(key=lambda item: item[0])
+
+            return [item[2] for item in result]
 
         return self._get_bindings_starting_with_keys_cache.get(keys, get)
 
 
+class _KeyTrieNode(object):
+    __slots__ = ('children', 'bindings', 'longer_bindings')
+
+    def __init__(self):
+        self.children = {}  # Maps keys to `_KeyTrieNode` objects.
+
+        # (index, any_count, binding) tuples for the bindings that end at this
+        # node, and for the bindings with longer key sequences.
+        self.bindings = []
+        self.longer_bindings = []
+
+
+class _KeyTrie(object):
+    """
+    Prefix tree of key bindings, used by :class:`.KeyBindings` for finding the
+    bindings for a key sequence without visiting all bindings.
+
+    Bindings with `Keys.Any` in their key sequence are stored under a
+    `Keys.Any` edge, which matches every key.
+    """
+    def __init__(self, bindings):
+        self.root = _KeyTrieNode()
+
+        for index, b in enumerate(bindings):
+            item = (index, b.keys.count(Keys.Any), b)
+            node = self.root
+
+            for key in b.keys:
+                node.longer_bindings.append(item)
+                try:
+                    node = node.children[key]
+                except KeyError:
+                    child = _KeyTrieNode()
+                    node.children[key] = child
+                    node = child
+
+            node.bindings.append(item)
+
+    def find_nodes(self, keys):
+        """
+        Return the nodes for all the bindings that match this key sequence.
+        (There can be more than one, because of `Keys.Any`.)
+        """
+        nodes = [self.root]
+
+        for key in keys:
+            next_nodes = []
+
+            for node in nodes:
+                children = node.children
+                if key in children:
+                    next_nodes.append(children[key])
+                if key != Keys.Any and Keys.Any in children:
+                    next_nodes.append(children[Keys.Any])
+
+            nodes = next_nodes
+            if not nodes:
+                break
+
+        return nodes
+
+
 def _check_and_expand_key(key):
     """
     Replace key by alias and verify whether it's a valid one.
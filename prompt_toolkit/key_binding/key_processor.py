@@ -10,7 +10,7 @@ from __future__ import unicode_literals
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.buffer import EditReadOnlyBuffer
 from prompt_toolkit.enums import EditingMode
-from prompt_toolkit.eventloop import run_in_executor, call_from_executor
+from prompt_toolkit.eventloop import call_later
 from prompt_toolkit.filters.app import vi_navigation_mode
 from prompt_toolkit.keys import Keys, ALL_KEYS
 from prompt_toolkit.utils import Event
@@ -20,7 +20,6 @@ from .key_bindings import KeyBindingsBase
 from collections import deque
 from six.moves import range
 import six
-import time
 import weakref
 
 __all__ = [
@@ -36,7 +35,7 @@ class KeyPress(object):
     :param data: The received string on stdin. (Often vt100 escape codes.)
     """
     def __init__(self, key, data=None):
-        assert key in ALL_KEYS or len(key) == 1
+        assert len(key) == 1 or key in ALL_KEYS
         assert data is None or isinstance(data, six.text_type)
 
         if data is None:
@@ -80,16 +79,25 @@ class KeyProcessor(object):
         # registered in the key bindings.
 
     :param key_bindings: `KeyBindingsBase` instance.
+    :param batch_self_insert: When True, a run of consecutive key presses that
+        are handled by the `self-insert` command is handled at once: the
+        handler is called with one :class:`KeyPressEvent` for all of them
+        (`data` is the text of the whole run), and `before_key_press` and
+        `after_key_press` fire once for the whole run. This gives one
+        `insert_text` call and one undo entry. (Can also be enabled later
+        through the `batch_self_insert` attribute.)
     """
-    def __init__(self, key_bindings):
+    def __init__(self, key_bindings, batch_self_insert=False):
         assert isinstance(key_bindings, KeyBindingsBase)
 
         self._bindings = key_bindings
+        self.batch_self_insert = batch_self_insert
 
         self.before_key_press = Event(self)
         self.after_key_press = Event(self)
 
         self._keys_pressed = 0  # Monotonically increasing counter.
+        self._timeout_handle = None  # `TimerHandle` of the flush timeout.
 
         self.reset()
 
@@ -177,7 +185,15 @@ class KeyProcessor(object):
 
                 # Exact matches found, call handler.
                 if not is_prefix_of_longer_match and matches:
-                    self._call_handler(matches[-1], key_sequence=buffer[:])
+                    key_sequence = buffer[:]
+                    is_batch = len(key_sequence) == 1 and self._is_self_insert(matches[-1])
+
+                    # Insert a run of self-inserting key presses at once.
+                    if is_batch:
+                        key_sequence.extend(self._take_self_insert_run(matches[-1]))
+
+                    self._call_handler(matches[-1], key_sequence=key_sequence,
+                                       is_batch=is_batch)
                     del buffer[:]  # Keep reference.
 
                 # No match found.
@@ -197,6 +213,54 @@ class KeyProcessor(object):
                     if not found:
                         del buffer[:1]
 
+    def _is_self_insert(self, binding):
+        """
+        True when the given binding inserts the typed characters. Consecutive
+        key presses that are handled by this binding can be inserted at once.
+        (Only when `batch_self_insert` is enabled.)
+        """
+        from .bindings.named_commands import get_by_name
+        return (self.batch_self_insert and self.arg is None and
+                binding.handler is get_by_name('self-insert'))
+
+    def _take_self_insert_run(self, binding):
+        """
+        Remove the key presses from the start of the input queue that would be
+        handled by `binding` (a self-insert binding) and return them.
+
+        We stop at the first key press that is not a single character, that
+        could be the start of a longer key binding, or that resolves to
+        another handler. (The filters are evaluated once per character; no
+        handler runs in between.)
+        """
+        result = []
+        queue = self.input_queue
+        resolves_to_binding = {}  # Maps characters to a boolean.
+
+        while queue:
+            key_press = queue[0]
+            key = key_press.key
+
+            if len(key) != 1:
+                break
+
+            try:
+                ok = resolves_to_binding[key]
+            except KeyError:
+                matches = self._get_matches([key_press])
+                eager_matches = [m for m in matches if m.eager()]
+                ok = (not eager_matches and
+                      bool(matches) and matches[-1] is binding and
+                      not self._is_prefix_of_longer_match([key_press]))
+                resolves_to_binding[key] = ok
+
+            if not ok:
+                break
+
+            result.append(queue.popleft())
+
+        return result
+
     def feed(self, key_press, first=False):
         """
         Add a new :class:`KeyPress` to the input queue.
@@ -301,7 +365,7 @@ class KeyProcessor(object):
         key_presses = [k for k in key_presses if k.key != Keys.CPRResponse]
         return key_presses
 
-    def _call_handler(self, handler, key_sequence=None):
+    def _call_handler(self, handler, key_sequence=None, is_batch=False):
         app = get_app()
         was_recording_emacs = app.emacs_state.is_recording
         was_recording_vi = bool(app.vi_state.recording_register)
@@ -312,7 +376,7 @@ class KeyProcessor(object):
         event = KeyPressEvent(
             weakref.ref(self), arg=arg, key_sequence=key_sequence,
             previous_key_sequence=self._previous_key_sequence,
-            is_repeat=(handler == self._previous_handler))
+            is_repeat=(handler == self._previous_handler), is_batch=is_batch)
 
         # Save the state of the current buffer.
         if handler.save_before(event):
@@ -379,34 +443,34 @@ class KeyProcessor(object):
         """
         Start auto flush timeout. Similar to Vim's `timeoutlen` option.
 
-        Start a background thread with a timer. When this timeout expires and
-        no key was pressed in the meantime, we flush all data in the queue and
+        Schedule a timer in the event loop. When this timeout expires and no
+        key was pressed in the meantime, we flush all data in the queue and
         call the appropriate key binding handlers.
         """
+        # Cancel the previous timer. A key was pressed in the meantime.
+        if self._timeout_handle is not None:
+            self._timeout_handle.cancel()
+            self._timeout_handle = None
+
         timeout = get_app().timeoutlen
 
-        if timeout is None:
+        # Nothing to flush when the key buffer is empty. (The key buffer can
+        # only change when more keys are pressed, which restarts the timer.)
+        if timeout is None or len(self.key_buffer) == 0:
             return
 
         counter = self._keys_pressed
 
-        def wait():
-            " Wait for timeout. "
-            time.sleep(timeout)
+        def flush_keys():
+            " Flush keys. "
+            self._timeout_handle = None
 
             if len(self.key_buffer) > 0 and counter == self._keys_pressed:
                 # (No keys pressed in the meantime.)
-                call_from_executor(flush_keys)
-
-        def flush_keys():
-            " Flush keys. "
-            self.feed(_Flush)
-            self.process_keys()
+                self.feed(_Flush)
+                self.process_keys()
 
-        # Automatically flush keys.
-        # (_daemon needs to be set, otherwise, this will hang the
-        # application for .5 seconds before exiting.)
-        run_in_executor(wait, _daemon=True)
+        self._timeout_handle = call_later(timeout, flush_keys)
 
 
 class KeyPressEvent(object):
@@ -418,9 +482,11 @@ class KeyPressEvent(object):
     :param key_sequence: List of `KeyPress` instances.
     :param previouskey_sequence: Previous list of `KeyPress` instances.
     :param is_repeat: True when the previous event was delivered to the same handler.
+    :param is_batch: True when `key_sequence` is a run of self-inserting key
+        presses, handled at once. (See `KeyProcessor.batch_self_insert`.)
     """
     def __init__(self, key_processor_ref, arg=None, key_sequence=None,
-            previous_key_sequence=None, is_repeat=False):
+            previous_key_sequence=None, is_repeat=False, is_batch=False):
         self._key_processor_ref = key_processor_ref
         self.key_sequence = key_sequence
         self.previous_key_sequence = previous_key_sequence
@@ -428,6 +494,8 @@ class KeyPressEvent(object):
         #: True when the previous key sequence was handled by the same handler.
         self.is_repeat = is_repeat
 
+        self._is_batch = is_batch
+
         self._arg = arg
         self._app = get_app()
 
@@ -437,6 +505,10 @@ class KeyPressEvent(object):
 
     @property
     def data(self):
+        # For a run of self-inserting key presses that is handled at once,
+        # this is the text of all of them.
+        if self._is_batch:
+            return ''.join(k.data for k in self.key_sequence)
         return self.key_sequence[-1].data
 
     @property
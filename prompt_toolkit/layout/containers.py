@@ -21,6 +21,7 @@ from prompt_toolkit.filters import to_filter, vi_insert_mode, emacs_insert_mode
 from prompt_toolkit.formatted_text import to_formatted_text
 from prompt_toolkit.formatted_text.utils import fragment_list_to_text, fragment_list_width
 from prompt_toolkit.mouse_events import MouseEvent, MouseEventType
+from prompt_toolkit.profiling import get_render_profiler, measure
 from prompt_toolkit.utils import take_using_weights, get_cwidth, to_int, to_str
 
 try:
@@ -1219,6 +1220,15 @@ class Window(Container):
         wrap_count and returns formatted text. This can be used for
         implementation of line continuations, things like Vim "breakindent" and
         so on.
+    :param cache_rendering: A `bool` or :class:`.Filter` instance. When True,
+        remember the output of this window, and copy it to the next screen
+        as long as the :class:`.UIContent`, position, size, scroll offsets and
+        styling didn't change. This skips `_copy_body` for static panels. It
+        only takes effect when the window doesn't have the focus and has no
+        `get_line_prefix`, and it requires a :class:`.UIControl` that returns
+        the same :class:`.UIContent` instance if nothing changed (like
+        :class:`.FormattedTextControl` does). The window should not be drawn
+        transparently on top of other content.
     """
     def __init__(self, content=None, width=None, height=None, z_index=None,
                  dont_extend_width=False, dont_extend_height=False,
@@ -1227,7 +1237,8 @@ class Window(Container):
                  allow_scroll_beyond_bottom=False, wrap_lines=False,
                  get_vertical_scroll=None, get_horizontal_scroll=None, always_hide_cursor=False,
                  cursorline=False, cursorcolumn=False, colorcolumns=None,
-                 align=WindowAlign.LEFT, style='', char=None, get_line_prefix=None):
+                 align=WindowAlign.LEFT, style='', char=None, get_line_prefix=None,
+                 cache_rendering=False):
         assert content is None or isinstance(content, UIControl)
         assert is_dimension(width)
         assert is_dimension(height)
@@ -1248,6 +1259,7 @@ class Window(Container):
         self.wrap_lines = to_filter(wrap_lines)
         self.cursorline = to_filter(cursorline)
         self.cursorcolumn = to_filter(cursorcolumn)
+        self.cache_rendering = to_filter(cache_rendering)
 
         self.content = content or DummyControl()
         self.dont_extend_width = to_filter(dont_extend_width)
@@ -1294,6 +1306,16 @@ class Window(Container):
         #: output.)
         self.render_info = None
 
+        # Output of the last rendering, when `cache_rendering` is enabled.
+        self._cached_render = None
+
+        # The arguments of the last `write_to_screen` call and the dimensions
+        # that were reported to the parent during the last layout. (Used for
+        # re-rendering only this window, see `Application.invalidate_window`.)
+        self._last_write_to_screen_args = None
+        self._last_dimensions = {}
+        self._last_dimensions_render_counter = None
+
     def _get_margin_width(self, margin):
         """
         Return the width for this margin.
@@ -1333,10 +1355,14 @@ class Window(Container):
             return preferred_width
 
         # Merge.
-        return self._merge_dimensions(
-            dimension=to_dimension(self.width),
-            get_preferred=preferred_content_width,
-            dont_extend=self.dont_extend_width())
+        with measure('layout'):
+            result = self._merge_dimensions(
+                dimension=to_dimension(self.width),
+                get_preferred=preferred_content_width,
+                dont_extend=self.dont_extend_width())
+
+        self._remember_dimension(('width', max_available_width), result)
+        return result
 
     def preferred_height(self, width, max_available_height):
         """
@@ -1356,10 +1382,49 @@ class Window(Container):
                 width - total_margin_width, max_available_height, wrap_lines,
                 self.get_line_prefix)
 
-        return self._merge_dimensions(
-            dimension=to_dimension(self.height),
-            get_preferred=preferred_content_height,
-            dont_extend=self.dont_extend_height())
+        with measure('layout'):
+            result = self._merge_dimensions(
+                dimension=to_dimension(self.height),
+                get_preferred=preferred_content_height,
+                dont_extend=self.dont_extend_height())
+
+        self._remember_dimension(('height', width, max_available_height), result)
+        return result
+
+    def _remember_dimension(self, key, dimension):
+        """
+        Remember the dimension that was reported to the parent container
+        during this rendering.
+        """
+        render_counter = get_app().render_counter
+
+        if self._last_dimensions_render_counter != render_counter:
+            self._last_dimensions_render_counter = render_counter
+            self._last_dimensions = {}
+
+        self._last_dimensions[key] = (
+            dimension.min, dimension.max, dimension.preferred, dimension.weight,
+            dimension.min_specified, dimension.max_specified,
+            dimension.preferred_specified, dimension.weight_specified)
+
+    def _dimensions_changed(self):
+        """
+        True when this window reports other dimensions to its parent than it
+        did during the last layout. In that case, the layout has to be
+        computed again.
+        """
+        previous = self._last_dimensions
+
+        for key, value in list(previous.items()):
+            if key[0] == 'width':
+                self.preferred_width(*key[1:])
+            else:
+                self.preferred_height(*key[1:])
+
+            if self._last_dimensions.get(key) != value:
+                return True
+
+        return False
 
     @staticmethod
     def _merge_dimensions(dimension, get_preferred, dont_extend=False):
@@ -1430,9 +1495,15 @@ class Window(Container):
         """
         z_index = z_index if self.z_index is None else self.z_index
 
+        self._last_write_to_screen_args = (write_position, parent_style, erase_bg, z_index)
+
         draw_func = partial(self._write_to_screen_at_index, screen,
                             mouse_handlers, write_position, parent_style, erase_bg)
 
+        profiler = get_render_profiler()
+        if profiler is not None:
+            draw_func = profiler.timed('write_to_screen', draw_func, window=self)
+
         if z_index is None or z_index <= 0:
             # When no z_index is given, draw right away.
             draw_func()
@@ -1453,20 +1524,35 @@ class Window(Container):
         total_margin_width = sum(left_margin_widths + right_margin_widths)
 
         # Render UserControl.
-        ui_content = self.content.create_content(
-            write_position.width - total_margin_width, write_position.height)
+        with measure('create_content'):
+            ui_content = self.content.create_content(
+                write_position.width - total_margin_width, write_position.height)
         assert isinstance(ui_content, UIContent)
 
         # Scroll content.
         wrap_lines = self.wrap_lines()
         self._scroll(ui_content, write_position.width - total_margin_width, write_position.height)
 
-        # Erase background and fill with `char`.
-        self._fill_bg(screen, write_position, erase_bg)
-
         # Resolve `align` attribute.
         align = self.align() if callable(self.align) else self.align
 
+        has_focus = get_app().layout.current_control == self.content
+
+        # Copy the output of the previous rendering, if nothing changed.
+        if self.get_line_prefix is None and not has_focus and self.cache_rendering():
+            render_key = self._get_render_key(
+                ui_content, write_position, left_margin_widths,
+                right_margin_widths, parent_style, erase_bg, wrap_lines, align)
+
+            if self._copy_cached_render(render_key, screen, mouse_handlers, write_position,
+                                        left_margin_widths, right_margin_widths):
+                return
+        else:
+            render_key = None
+
+        # Erase background and fill with `char`.
+        self._fill_bg(screen, write_position, erase_bg)
+
         # Write body
         visible_line_to_row_col, rowcol_to_yx = self._copy_body(
             ui_content, screen, write_position,
@@ -1475,7 +1561,7 @@ class Window(Container):
             wrap_lines=wrap_lines, highlight_lines=True,
             vertical_scroll_2=self.vertical_scroll_2,
             always_hide_cursor=self.always_hide_cursor(),
-            has_focus=get_app().layout.current_control == self.content,
+            has_focus=has_focus,
             align=align, get_line_prefix=self.get_line_prefix)
 
         # Remember render info. (Set before generating the margins. They need this.)
@@ -1543,30 +1629,129 @@ class Window(Container):
 
             return result
 
+        self._set_mouse_handler(mouse_handlers, write_position, left_margin_widths,
+                                right_margin_widths, mouse_handler)
+
+        # Render and copy margins.
+        margin_fragments = self._get_margin_fragments(
+            write_position, left_margin_widths, right_margin_widths)
+        self._copy_margins(screen, write_position, left_margin_widths,
+                           right_margin_widths, margin_fragments)
+
+        # Apply 'self.style'
+        self._apply_style(screen, write_position, parent_style)
+
+        # Tell the screen that this user control has been painted.
+        screen.visible_windows.append(self)
+
+        # Remember the output, for copying it to the next screen.
+        if render_key is not None:
+            self._cached_render = _CachedWindowRender(
+                screen, write_position, render_key, margin_fragments,
+                mouse_handler, screen.menu_positions.get(self))
+        else:
+            self._cached_render = None
+
+    def _get_render_key(self, ui_content, write_position, left_margin_widths,
+                        right_margin_widths, parent_style, erase_bg, wrap_lines,
+                        align):
+        """
+        Return a key that captures everything that the output of this window
+        depends on (except for the margins). Used for `cache_rendering`.
+        """
+        if callable(self.char):
+            char = self.char()
+        else:
+            char = self.char
+
+        colorcolumns = self.colorcolumns
+        if callable(colorcolumns):
+            colorcolumns = colorcolumns()
+
+        # Note: the `UIContent` instance is kept inside the key. This way, it
+        #       can't be garbage collected and the comparison by identity is
+        #       reliable.
+        return (
+            ui_content, ui_content.cursor_position, ui_content.menu_position,
+            write_position.xpos, write_position.ypos,
+            write_position.width, write_position.height,
+            tuple(left_margin_widths), tuple(right_margin_widths),
+            parent_style, to_str(self.style), char, erase_bg, wrap_lines, align,
+            self.vertical_scroll, self.horizontal_scroll, self.vertical_scroll_2,
+            self.cursorline(), self.cursorcolumn(),
+            tuple((cc.position, cc.style) for cc in colorcolumns),
+        )
+
+    def _copy_cached_render(self, render_key, screen, mouse_handlers,
+                            write_position, left_margin_widths, right_margin_widths):
+        """
+        Copy the output of the previous rendering to the screen if the given
+        key and the margins are still the same. Returns `True` on success.
+        """
+        cached = self._cached_render
+
+        if cached is None or cached.render_key != render_key:
+            return False
+
+        # The margins are rendered using the `WindowRenderInfo`, which is
+        # still valid if the key didn't change.
+        margin_fragments = self._get_margin_fragments(
+            write_position, left_margin_widths, right_margin_widths)
+
+        if margin_fragments != cached.margin_fragments:
+            return False
+
+        cached.copy_to_screen(screen, self)
+
+        self._set_mouse_handler(mouse_handlers, write_position, left_margin_widths,
+                                right_margin_widths, cached.mouse_handler)
+        return True
+
+    def _set_mouse_handler(self, mouse_handlers, write_position,
+                           left_margin_widths, right_margin_widths, handler):
+        " Set the mouse handler for the body of this window. "
         mouse_handlers.set_mouse_handler_for_range(
             x_min=write_position.xpos + sum(left_margin_widths),
-            x_max=write_position.xpos + write_position.width - total_margin_width,
+            x_max=write_position.xpos + write_position.width -
+            sum(left_margin_widths + right_margin_widths),
             y_min=write_position.ypos,
             y_max=write_position.ypos + write_position.height,
-            handler=mouse_handler)
+            handler=handler)
 
-        # Render and copy margins.
-        move_x = 0
+    def _get_margin_fragments(self, write_position, left_margin_widths,
+                              right_margin_widths):
+        """
+        Create the fragments for all the margins.
+        Returns a (left, right) tuple of lists.
+        """
+        def get(margins, widths):
+            return [m.create_margin(self.render_info, width, write_position.height)
+                    if width > 0 else []
+                    for m, width in zip(margins, widths)]
+
+        return (get(self.left_margins, left_margin_widths),
+                get(self.right_margins, right_margin_widths))
 
-        def render_margin(m, width):
-            " Render margin. Return `Screen`. "
-            # Retrieve margin fragments.
-            fragments = m.create_margin(self.render_info, width, write_position.height)
+    def _copy_margins(self, screen, write_position, left_margin_widths,
+                      right_margin_widths, margin_fragments):
+        """
+        Copy the margin fragments to the screen.
+        """
+        left_fragments, right_fragments = margin_fragments
 
+        def render_margin(fragments, width):
+            " Render margin. Return `UIContent`. "
             # Turn it into a UIContent object.
             # already rendered those fragments using this size.)
             return FormattedTextControl(fragments).create_content(
                 width + 1, write_position.height)
 
-        for m, width in zip(self.left_margins, left_margin_widths):
+        move_x = 0
+
+        for fragments, width in zip(left_fragments, left_margin_widths):
             if width > 0:  # (ConditionalMargin returns a zero width. -- Don't render.)
                 # Create screen for margin.
-                margin_screen = render_margin(m, width)
+                margin_screen = render_margin(fragments, width)
 
                 # Copy and shift X.
                 self._copy_margin(margin_screen, screen, write_position, move_x, width)
@@ -1574,20 +1759,14 @@ class Window(Container):
 
         move_x = write_position.width - sum(right_margin_widths)
 
-        for m, width in zip(self.right_margins, right_margin_widths):
+        for fragments, width in zip(right_fragments, right_margin_widths):
             # Create screen for margin.
-            margin_screen = render_margin(m, width)
+            margin_screen = render_margin(fragments, width)
 
             # Copy and shift X.
             self._copy_margin(margin_screen, screen, write_position, move_x, width)
             move_x += width
 
-        # Apply 'self.style'
-        self._apply_style(screen, write_position, parent_style)
-
-        # Tell the screen that this user control has been painted.
-        screen.visible_windows.append(self)
-
     def _copy_body(self, ui_content, new_screen, write_position, move_x,
                    width, vertical_scroll=0, horizontal_scroll=0,
                    wrap_lines=False, highlight_lines=False,
@@ -2149,6 +2328,57 @@ class Window(Container):
         return []
 
 
+class _CachedWindowRender(object):
+    """
+    The output of a :class:`.Window` on the screen, as it was captured after
+    rendering. (Used by `Window.cache_rendering`.)
+    """
+    def __init__(self, screen, write_position, render_key, margin_fragments,
+                 mouse_handler, menu_position):
+        self.write_position = write_position
+        self.render_key = render_key
+        self.margin_fragments = margin_fragments
+        self.mouse_handler = mouse_handler
+        self.menu_position = menu_position
+
+        xmin = write_position.xpos
+        xmax = write_position.xpos + write_position.width
+        ymin = write_position.ypos
+        ymax = write_position.ypos + write_position.height
+
+        def capture(buffer):
+            result = []
+            for y in range(ymin, ymax):
+                if y in buffer:
+                    row = buffer[y]
+                    cells = dict((x, row[x]) for x in range(xmin, xmax) if x in row)
+                    if cells:
+                        result.append((y, cells))
+            return result
+
+        self.data = capture(screen.data_buffer)
+        self.zero_width_escapes = capture(screen.zero_width_escapes)
+
+    def copy_to_screen(self, screen, window):
+        """
+        Copy the captured output to the given screen.
+        """
+        data_buffer = screen.data_buffer
+        for y, cells in self.data:
+            data_buffer[y].update(cells)
+
+        zero_width_escapes = screen.zero_width_escapes
+        for y, cells in self.zero_width_escapes:
+            zero_width_escapes[y].update(cells)
+
+        if self.menu_position is not None:
+            screen.set_menu_position(window, self.menu_position)
+
+        wp = self.write_position
+        screen.height = max(screen.height, wp.ypos + wp.height)
+        screen.visible_windows.append(window)
+
+
 class ConditionalContainer(Container):
     """
     Wrapper around any other container that can change the visibility. The
@@ -16,6 +16,7 @@ from prompt_toolkit.formatted_text import to_formatted_text
 from prompt_toolkit.formatted_text.utils import split_lines, fragment_list_to_text, fragment_list_width
 from prompt_toolkit.lexers import Lexer, SimpleLexer
 from prompt_toolkit.mouse_events import MouseEventType
+from prompt_toolkit.profiling import get_render_profiler, measure
 from prompt_toolkit.search import SearchState
 from prompt_toolkit.selection import SelectionType
 from prompt_toolkit.utils import get_cwidth
@@ -571,7 +572,8 @@ class BufferControl(UIControl):
         """
         # Cache using `document.text`.
         def get_formatted_text_for_line():
-            return self.lexer.lex_document(document)
+            with measure('lexing'):
+                return self.lexer.lex_document(document)
 
         key = (document.text, self.lexer.invalidation_hash())
         return self._fragment_cache.get(key, get_formatted_text_for_line)
@@ -620,6 +622,10 @@ class BufferControl(UIControl):
             get_line = self._get_formatted_text_for_line_func(document)
             cache = {}
 
+            profiler = get_render_profiler()
+            if profiler is not None:
+                get_line = profiler.timed('lexing', get_line)
+
             def get_processed_line(i):
                 try:
                     return cache[i]
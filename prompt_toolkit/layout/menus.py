@@ -1,8 +1,9 @@
 from __future__ import unicode_literals
 
-from six.moves import zip_longest, range
+from six.moves import range
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.filters import has_completions, is_done, Condition, to_filter
+from prompt_toolkit.formatted_text import to_formatted_text, fragment_list_width
 from prompt_toolkit.mouse_events import MouseEventType
 from prompt_toolkit.utils import get_cwidth
 
@@ -13,6 +14,7 @@ from .margins import ScrollbarMargin
 from .screen import Point
 
 import math
+import weakref
 
 __all__ = [
     'CompletionsMenu',
@@ -88,22 +90,23 @@ class CompletionsMenuControl(UIControl):
         """
         Return ``True`` if we need to show a column with meta information.
         """
-        return any(c.display_meta for c in complete_state.completions)
+        return _get_completion_widths(complete_state).has_meta
 
     def _get_menu_width(self, max_width, complete_state):
         """
         Return the width of the main column.
         """
-        return min(max_width, max(self.MIN_WIDTH, max(get_cwidth(c.display)
-                   for c in complete_state.completions) + 2))
+        return min(max_width, max(self.MIN_WIDTH,
+                   _get_completion_widths(complete_state).display_width + 2))
 
     def _get_menu_meta_width(self, max_width, complete_state):
         """
         Return the width of the meta column.
         """
-        if self._show_meta(complete_state):
-            return min(max_width, max(get_cwidth(c.display_meta)
-                       for c in complete_state.completions) + 2)
+        widths = _get_completion_widths(complete_state)
+
+        if widths.has_meta:
+            return min(max_width, widths.meta_width + 2)
         else:
             return 0
 
@@ -114,9 +117,10 @@ class CompletionsMenuControl(UIControl):
         else:
             style_str = 'class:completion-menu.completion ' + completion.style
 
-        text, tw = _trim_text(completion.display, width - 2)
+        fragments, tw = _trim_formatted_text(completion.display_fragments, width - 2)
         padding = ' ' * (width - 2 - tw)
-        return [(style_str, ' %s%s ' % (text, padding))]
+        return to_formatted_text(
+            [('', ' ')] + fragments + [('', padding + ' ')], style=style_str)
 
     def _get_menu_item_meta_fragments(self, completion, is_current_completion, width):
         if is_current_completion:
@@ -148,6 +152,53 @@ class CompletionsMenuControl(UIControl):
             b.complete_previous(count=3, disable_wrap_around=True)
 
 
+class _CompletionWidths(object):
+    """
+    The widths of the completions in a :class:`.CompletionState`.
+
+    Completions are appended to the state while they are generated, so this is
+    updated incrementally: only the completions that were added since the
+    previous call are measured.
+    """
+    def __init__(self):
+        self.count = 0  # Number of completions measured.
+        self.display_width = 0
+        self.meta_width = 0
+        self.has_meta = False
+
+    def update(self, completions):
+        if len(completions) < self.count:
+            # Completions were removed. Start over.
+            self.__init__()
+
+        for i in range(self.count, len(completions)):
+            c = completions[i]
+            self.display_width = max(self.display_width, get_cwidth(c.display))
+
+            if c.display_meta:
+                self.has_meta = True
+                self.meta_width = max(self.meta_width, get_cwidth(c.display_meta))
+
+        self.count = len(completions)
+
+
+# Maps `CompletionState` instances to their `_CompletionWidths`.
+_completion_widths = weakref.WeakKeyDictionary()
+
+
+def _get_completion_widths(complete_state):
+    """
+    Return the (up to date) `_CompletionWidths` for this `CompletionState`.
+    """
+    try:
+        widths = _completion_widths[complete_state]
+    except KeyError:
+        widths = _completion_widths[complete_state] = _CompletionWidths()
+
+    widths.update(complete_state.completions)
+    return widths
+
+
 def _trim_text(text, max_width):
     """
     Trim the text to `max_width`, append dots when the text is too long.
@@ -176,6 +227,44 @@ def _trim_text(text, max_width):
         return text, width
 
 
+def _trim_formatted_text(fragments, max_width):
+    """
+    Like `_trim_text`, but for a list of ``(style_str, text)`` tuples.
+    Returns (fragments, width) tuple.
+    """
+    # Plain text.
+    if len(fragments) == 1:
+        style, text = fragments[0][:2]
+        text, width = _trim_text(text, max_width)
+        return [(style, text)], width
+
+    width = fragment_list_width(fragments)
+
+    # When the text is too wide, trim it.
+    if width > max_width:
+        result = []
+        remaining_width = max(1, max_width - 3)
+
+        for item in fragments:
+            text = ''
+            for c in item[1]:
+                c_width = get_cwidth(c)
+                if c_width > remaining_width:
+                    break
+                text += c
+                remaining_width -= c_width
+
+            if text:
+                result.append((item[0], text))
+            if len(text) < len(item[1]):
+                break
+
+        result.append(('', '...'))
+        return result, fragment_list_width(result)
+    else:
+        return fragments, width
+
+
 class CompletionsMenu(ConditionalContainer):
     # NOTE: We use a pretty big z_index by default. Menus are supposed to be
     #       above anything else. We also want to make sure that the content is
@@ -236,7 +325,9 @@ class MultiColumnCompletionMenuControl(UIControl):
         self._rendered_rows = 0
         self._rendered_columns = 0
         self._total_columns = 0
-        self._render_pos_to_completion = {}
+        self._render_completions = []
+        self._render_column_width = 1
+        self._render_scroll = 0
         self._render_left_arrow = False
         self._render_right_arrow = False
         self._render_width = 0
@@ -277,25 +368,27 @@ class MultiColumnCompletionMenuControl(UIControl):
     def create_content(self, width, height):
         """
         Create a UIContent object for this menu.
+
+        Only the completions in the visible columns are rendered, so this
+        doesn't depend on the total amount of completions.
         """
         complete_state = get_app().current_buffer.complete_state
-        column_width = self._get_column_width(complete_state)
-        self._render_pos_to_completion = {}
-
-        def grouper(n, iterable, fillvalue=None):
-            " grouper(3, 'ABCDEFG', 'x') --> ABC DEF Gxx "
-            args = [iter(iterable)] * n
-            return zip_longest(fillvalue=fillvalue, *args)
+        self._render_completions = []
 
-        def is_current_completion(completion):
+        def is_current_completion(index):
             " Returns True when this completion is the currently selected one. "
-            return complete_state.complete_index is not None and c == complete_state.current_completion
+            return index == complete_state.complete_index
 
         # Space required outside of the regular columns, for displaying the
         # left and right arrow.
         HORIZONTAL_MARGIN_REQUIRED = 3
 
-        if complete_state:
+        fragments_for_line = []
+
+        if complete_state and complete_state.completions:
+            completions = complete_state.completions
+            column_width = self._get_column_width(complete_state)
+
             # There should be at least one column, but it cannot be wider than
             # the available width.
             column_width = min(width - HORIZONTAL_MARGIN_REQUIRED, column_width)
@@ -309,35 +402,34 @@ class MultiColumnCompletionMenuControl(UIControl):
 
             visible_columns = max(1, (width - self._required_margin) // column_width)
 
-            columns_ = list(grouper(height, complete_state.completions))
-            rows_ = list(zip(*columns_))
+            # Column `i` contains the completions `i * height` until
+            # `(i + 1) * height`.
+            total_columns = int(math.ceil(len(completions) / float(height)))
 
             # Make sure the current completion is always visible: update scroll offset.
             selected_column = (complete_state.complete_index or 0) // height
             self.scroll = min(selected_column, max(self.scroll, selected_column - visible_columns + 1))
 
             render_left_arrow = self.scroll > 0
-            render_right_arrow = self.scroll < len(rows_[0]) - visible_columns
+            render_right_arrow = self.scroll < total_columns - visible_columns
+            rendered_columns = min(visible_columns, total_columns - self.scroll)
 
             # Write completions to screen.
-            fragments_for_line = []
-
-            for row_index, row in enumerate(rows_):
+            for row_index in range(height):
                 fragments = []
-                middle_row = row_index == len(rows_) // 2
+                middle_row = row_index == height // 2
 
                 # Draw left arrow if we have hidden completions on the left.
                 if render_left_arrow:
                     fragments += [('class:scrollbar', '<' if middle_row else ' ')]
 
                 # Draw row content.
-                for column_index, c in enumerate(row[self.scroll:][:visible_columns]):
-                    if c is not None:
-                        fragments += self._get_menu_item_fragments(c, is_current_completion(c), column_width)
+                for column_index in range(self.scroll, self.scroll + rendered_columns):
+                    i = column_index * height + row_index
 
-                        # Remember render position for mouse click handler.
-                        for x in range(column_width):
-                            self._render_pos_to_completion[(column_index * column_width + x, row_index)] = c
+                    if i < len(completions):
+                        fragments += self._get_menu_item_fragments(
+                            completions[i], is_current_completion(i), column_width)
                     else:
                         fragments += [('class:completion', ' ' * column_width)]
 
@@ -351,26 +443,40 @@ class MultiColumnCompletionMenuControl(UIControl):
                 # Newline.
                 fragments_for_line.append(fragments)
 
-        else:
-            fragments = []
+            # Remember what was rendered for the mouse click handler.
+            self._render_completions = completions
+            self._render_column_width = column_width
+            self._render_scroll = self.scroll
 
-        self._rendered_rows = height
-        self._rendered_columns = visible_columns
-        self._total_columns = len(columns_)
-        self._render_left_arrow = render_left_arrow
-        self._render_right_arrow = render_right_arrow
-        self._render_width = column_width * visible_columns + render_left_arrow + render_right_arrow + 1
+            self._rendered_rows = height
+            self._rendered_columns = visible_columns
+            self._total_columns = total_columns
+            self._render_left_arrow = render_left_arrow
+            self._render_right_arrow = render_right_arrow
+            self._render_width = column_width * visible_columns + render_left_arrow + render_right_arrow + 1
 
         def get_line(i):
             return fragments_for_line[i]
 
-        return UIContent(get_line=get_line, line_count=len(rows_))
+        return UIContent(get_line=get_line, line_count=len(fragments_for_line))
+
+    def _get_completion_at(self, x, y):
+        """
+        Return the completion that was rendered at this position, or `None`.
+        """
+        if self._render_completions and 0 <= y < self._rendered_rows:
+            column_index = x // self._render_column_width
+
+            if 0 <= column_index < self._rendered_columns:
+                i = (self._render_scroll + column_index) * self._rendered_rows + y
+                if i < len(self._render_completions):
+                    return self._render_completions[i]
 
     def _get_column_width(self, complete_state):
         """
         Return the width of each column.
         """
-        return max(get_cwidth(c.display) for c in complete_state.completions) + 1
+        return _get_completion_widths(complete_state).display_width + 1
 
     def _get_menu_item_fragments(self, completion, is_current_completion, width):
         if is_current_completion:
@@ -379,10 +485,11 @@ class MultiColumnCompletionMenuControl(UIControl):
         else:
             style_str = 'class:completion-menu.completion ' + completion.style
 
-        text, tw = _trim_text(completion.display, width)
+        fragments, tw = _trim_formatted_text(completion.display_fragments, width)
         padding = ' ' * (width - tw - 1)
 
-        return [(style_str, ' %s%s' % (text, padding))]
+        return to_formatted_text(
+            [('', ' ')] + fragments + [('', padding)], style=style_str)
 
     def mouse_handler(self, mouse_event):
         """
@@ -420,7 +527,7 @@ class MultiColumnCompletionMenuControl(UIControl):
 
             # Mouse click on completion.
             else:
-                completion = self._render_pos_to_completion.get((x, y))
+                completion = self._get_completion_at(x, y)
                 if completion:
                     b.apply_completion(completion)
 
@@ -494,7 +601,7 @@ class MultiColumnCompletionsMenu(HSplit):
 
         @Condition
         def any_completion_has_meta():
-            return any(c.display_meta for c in get_app().current_buffer.complete_state.completions)
+            return _get_completion_widths(get_app().current_buffer.complete_state).has_meta
 
         # Create child windows.
         completions_window = ConditionalContainer(
@@ -532,7 +639,7 @@ class _SelectedCompletionMetaControl(UIControl):
         app = get_app()
         if app.current_buffer.complete_state:
             state = app.current_buffer.complete_state
-            return 2 + max(get_cwidth(c.display_meta) for c in state.completions)
+            return 2 + _get_completion_widths(state).meta_width
         else:
             return 0
 
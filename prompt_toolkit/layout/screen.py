@@ -230,13 +230,14 @@ class Screen(object):
         Set the style string to the given `style_str`.
         """
         b = self.data_buffer
-        char_cache = _CHAR_CACHE
+        restyle = _RestyledCharCache('', ' ' + style_str)
 
-        append_style = ' ' + style_str
-
-        for y, row in b.items():
+        for row in b.values():
             for x, char in row.items():
-                b[y][x] = char_cache[char.char, char.style + append_style]
+                try:
+                    row[x] = restyle[id(char)]
+                except KeyError:
+                    row[x] = restyle.add(char)
 
     def fill_area(self, write_position, style='', after=False):
         """
@@ -248,21 +249,54 @@ class Screen(object):
 
         xmin = write_position.xpos
         xmax = write_position.xpos + write_position.width
-        char_cache = _CHAR_CACHE
         data_buffer = self.data_buffer
 
         if after:
-            append_style = ' ' + style
-            prepend_style = ''
+            restyle = _RestyledCharCache('', ' ' + style)
         else:
-            append_style = ''
-            prepend_style = style + ' '
+            restyle = _RestyledCharCache(style + ' ', '')
 
         for y in range(write_position.ypos, write_position.ypos + write_position.height):
             row = data_buffer[y]
             for x in range(xmin, xmax):
                 cell = row[x]
-                row[x] = char_cache[cell.char, prepend_style + cell.style + append_style]
+                try:
+                    row[x] = restyle[id(cell)]
+                except KeyError:
+                    row[x] = restyle.add(cell)
+
+
+class _RestyledCharCache(dict):
+    """
+    Map :class:`.Char` instances to the same character with a prefix and
+    suffix added to the style.
+
+    Most of the cells in an area share only a handful of distinct `Char`
+    instances. Caching the result per instance means that the style strings
+    are concatenated once per distinct character instead of once per cell.
+
+    `Char` is not hashable, so this dictionary is keyed by `id(char)`. Use it
+    as follows (the fast path stays a plain dictionary lookup)::
+
+        try:
+            new_char = cache[id(char)]
+        except KeyError:
+            new_char = cache.add(char)
+    """
+    def __init__(self, prepend_style, append_style):
+        self.prepend_style = prepend_style
+        self.append_style = append_style
+
+        # Keep the original characters alive, so that their `id` can't be
+        # reused while this cache exists.
+        self._originals = []
+
+    def add(self, char):
+        result = _CHAR_CACHE[
+            char.char, self.prepend_style + char.style + self.append_style]
+        self[id(char)] = result
+        self._originals.append(char)
+        return result
 
 
 class WritePosition(object):
@@ -5,10 +5,16 @@ from __future__ import unicode_literals
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass, text_type
 
+from prompt_toolkit.eventloop import run_in_executor
+
+import threading
+import time
+
 __all__ = [
     'Lexer',
     'SimpleLexer',
     'DynamicLexer',
+    'ThreadedLexer',
 ]
 
 
@@ -76,3 +82,160 @@ class DynamicLexer(Lexer):
     def invalidation_hash(self):
         lexer = self.get_lexer() or self._dummy
         return id(lexer)
+
+
+class ThreadedLexer(Lexer):
+    """
+    Wrapper that runs another lexer in a background thread.
+
+    Rendering never has to wait for the lexer. Lines that are not lexed yet
+    are displayed the way they were displayed for the previous document (when
+    the line didn't change), or without styling. The application is
+    invalidated when the lexed lines become available.
+
+    :param lexer: The :class:`.Lexer` that runs in the background.
+    """
+    def __init__(self, lexer):
+        assert isinstance(lexer, Lexer)
+        self.lexer = lexer
+
+        # Only one document is lexed at the same time.
+        self._lock = threading.Lock()
+
+        self._last_document = None
+        self._last_requesting_document = None
+
+    def lex_document(self, document):
+        lexed_document = _ThreadedLexedDocument(self, document, self._last_document)
+        self._last_document = lexed_document
+        return lexed_document.get_line
+
+    def invalidation_hash(self):
+        return self.lexer.invalidation_hash()
+
+
+class _ThreadedLexedDocument(object):
+    """
+    A document that is being lexed by a :class:`.ThreadedLexer`.
+    """
+    # While lexing, invalidate the application at most this often. (Seconds.)
+    INVALIDATE_INTERVAL = .05
+
+    def __init__(self, threaded_lexer, document, previous):
+        self.threaded_lexer = threaded_lexer
+        self.document = document
+        self.lines = document.lines
+
+        #: Maps line numbers to the lexed fragments.
+        self.results = {}
+
+        #: (lines, results) tuple of the last document that has results.
+        #: (Used for the lines that are not lexed yet.)
+        if previous is None:
+            self.fallback = ([], {})
+        elif previous.results:
+            self.fallback = (previous.lines, previous.results)
+        else:
+            self.fallback = previous.fallback
+
+        self._lock = threading.Lock()
+        self._requested = set()
+        self._pending = []
+        self._running = False
+
+    def get_line(self, i):
+        " Return the fragments for the given line number. "
+        try:
+            return self.results[i]
+        except KeyError:
+            pass
+
+        if not 0 <= i < len(self.lines):
+            return []
+
+        self._request(i)
+        return self._get_fallback(i)
+
+    def _get_fallback(self, i):
+        """
+        Fragments to display while line `i` is not lexed. Use the result of the
+        previous document, if the line is the same. (Look at the same line
+        number, and at the line that moved because lines were added or
+        removed.)
+        """
+        line = self.lines[i]
+        lines, results = self.fallback
+
+        for j in (i, i + len(lines) - len(self.lines)):
+            if j in results and lines[j] == line:
+                return results[j]
+
+        return [('', line)]
+
+    def _request(self, i):
+        " Lex line `i` in the background. "
+        from prompt_toolkit.application.current import get_app
+
+        self.threaded_lexer._last_requesting_document = self
+
+        with self._lock:
+            if i in self._requested:
+                return
+
+            self._requested.add(i)
+            self._pending.append(i)
+
+            if self._running:
+                return
+            self._running = True
+
+        app = get_app()
+        run_in_executor(lambda: self._lex_in_background(app))
+
+    def _lex_in_background(self, app):
+        threaded_lexer = self.threaded_lexer
+
+        def is_outdated():
+            # Another document started requesting lines. Probably, we don't
+            # need this one anymore.
+            return threaded_lexer._last_requesting_document is not self
+
+        with threaded_lexer._lock:
+            get_line = None
+            last_invalidate = time.time()
+
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._running = False
+                        return
+
+                    if is_outdated():
+                        # Forget about the pending lines. When they are
+                        # displayed again, they will be requested again.
+                        self._requested.difference_update(self._pending)
+                        self._pending = []
+                        self._running = False
+                        return
+
+                    # Lex from top to bottom. That's the most efficient for
+                    # lexers that continue from previous lines.
+                    line_numbers = sorted(self._pending)
+                    self._pending = []
+
+                if get_line is None:
+                    get_line = threaded_lexer.lexer.lex_document(self.document)
+
+                for n, i in enumerate(line_numbers):
+                    if is_outdated():
+                        with self._lock:
+                            self._pending.extend(line_numbers[n:])
+                        break
+
+                    self.results[i] = get_line(i)
+
+                    if time.time() - last_invalidate > self.INVALIDATE_INTERVAL:
+                        app.invalidate()
+                        last_invalidate = time.time()
+
+                app.invalidate()
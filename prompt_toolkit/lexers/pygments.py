@@ -6,10 +6,16 @@ lexing at the beginning of a document, when displaying a very large text.
 """
 from __future__ import unicode_literals, absolute_import
 from abc import ABCMeta, abstractmethod
-from six import with_metaclass, text_type
+from six import with_metaclass, text_type, unichr
 from six.moves import range
 import re
 
+try:
+    from re import _parser as sre_parse, _constants as sre_constants  # Python 3.11+
+except ImportError:
+    import sre_parse
+    import sre_constants
+
 from prompt_toolkit.filters import to_filter
 from prompt_toolkit.formatted_text.utils import split_lines
 from prompt_toolkit.styles.pygments import pygments_token_to_classname
@@ -148,6 +154,13 @@ class PygmentsLexer(Lexer):
         recommended to disable this for inputs that are expected to be more
         than 1,000 lines.
     :param syntax_sync: `SyntaxSync` object.
+    :param incremental: Keep the lexer state at the start of every line, and
+        reuse the result of the previous document: after an edit, only lex
+        again from the first changed line until the lexer state is the same
+        as before. This gives the same result as `sync_from_start`, but is
+        much faster for editing big documents. (Only for Pygments lexers that
+        inherit from `RegexLexer` without overriding
+        `get_tokens_unprocessed`. Other lexers ignore this option.)
     """
     # Minimum amount of lines to go backwards when starting the parser.
     # This is important when the lines are retrieved in reverse order, or when
@@ -161,11 +174,13 @@ class PygmentsLexer(Lexer):
     # (This should probably be bigger than MIN_LINES_BACKWARDS.)
     REUSE_GENERATOR_MAX_DISTANCE = 100
 
-    def __init__(self, pygments_lexer_cls, sync_from_start=True, syntax_sync=None):
+    def __init__(self, pygments_lexer_cls, sync_from_start=True, syntax_sync=None,
+                 incremental=False):
         assert syntax_sync is None or isinstance(syntax_sync, SyntaxSync)
 
         self.pygments_lexer_cls = pygments_lexer_cls
         self.sync_from_start = to_filter(sync_from_start)
+        self.incremental = to_filter(incremental)
 
         # Instantiate the Pygments lexer.
         self.pygments_lexer = pygments_lexer_cls(
@@ -176,6 +191,10 @@ class PygmentsLexer(Lexer):
         # Create syntax sync instance.
         self.syntax_sync = syntax_sync or RegexSync.from_pygments_lexer_cls(pygments_lexer_cls)
 
+        # The last document that was lexed in incremental mode.
+        self._incremental_supported = _supports_incremental_lexing(self.pygments_lexer)
+        self._last_lexed_document = None
+
     @classmethod
     def from_filename(cls, filename, sync_from_start=True):
         """
@@ -197,6 +216,12 @@ class PygmentsLexer(Lexer):
         Create a lexer function that takes a line number and returns the list
         of (style_str, text) tuples as the Pygments lexer returns for that line.
         """
+        if self._incremental_supported and self.incremental():
+            lexed_document = _IncrementalLexedDocument(
+                self.pygments_lexer, document, self._last_lexed_document)
+            self._last_lexed_document = lexed_document
+            return lexed_document.get_line
+
         # Cache of already lexed lines.
         cache = {}
 
@@ -299,3 +324,514 @@ class PygmentsLexer(Lexer):
             return []
 
         return get_line
+
+
+def _supports_incremental_lexing(pygments_lexer):
+    """
+    True when `_lex_matches` gives the same result as the
+    `get_tokens_unprocessed` method of this Pygments lexer.
+    """
+    from pygments.lexer import RegexLexer
+
+    def get_function(method):
+        return getattr(method, '__func__', method)  # (Unbound methods on Python 2.)
+
+    return (isinstance(pygments_lexer, RegexLexer) and
+            get_function(type(pygments_lexer).get_tokens_unprocessed) is
+            get_function(RegexLexer.get_tokens_unprocessed))
+
+
+def _lex_matches(pygments_lexer, text, pos, stack):
+    """
+    Same algorithm as `RegexLexer.get_tokens_unprocessed`, but start at `pos`
+    with the given state stack, and yield a `(tokens, end_pos, stack, checks)`
+    tuple for every match. `stack` is the state after the match: lexing can
+    continue from `end_pos` with that stack.
+
+    `checks` is a list of `(rexmatch, regs)` tuples for the rules that were
+    tried at this position, and that could have looked at the text after the
+    next newline. `regs` is the result, relative to the position. (See
+    `_relative_regs`.) When the text after that newline changes, these rules
+    have to be matched again.
+    """
+    from pygments.token import Error, Whitespace, _TokenType
+
+    tokendefs = _rules_cache[type(pygments_lexer)]
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+
+    while True:
+        checks = []
+
+        for rexmatch, action, new_state, look_ahead in statetokens:
+            m = rexmatch(text, pos)
+            if look_ahead is not None and (look_ahead is True or look_ahead(text, pos)):
+                checks.append((rexmatch, _relative_regs(m, pos)))
+            if m:
+                if action is None:
+                    tokens = []
+                elif type(action) is _TokenType:
+                    tokens = [(pos, action, m.group())]
+                else:
+                    tokens = list(action(pygments_lexer, m))
+                pos = m.end()
+
+                if new_state is not None:
+                    # State transition.
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == '#pop':
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == '#push':
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == '#push':
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+
+                yield tokens, pos, tuple(statestack), checks
+                break
+        else:
+            # No match. At the end of a line, reset the state to "root".
+            # Otherwise, consume one character as an error.
+            if pos >= len(text):
+                return
+            elif text[pos] == '\n':
+                statestack = ['root']
+                statetokens = tokendefs['root']
+                yield [(pos, Whitespace, '\n')], pos + 1, ('root', ), checks
+            else:
+                yield [(pos, Error, text[pos])], pos + 1, tuple(statestack), checks
+            pos += 1
+
+
+def _relative_regs(match, pos):
+    """
+    The positions of the groups of this match (or `None` when there is no
+    match), relative to `pos`.
+    """
+    if match:
+        return tuple((start - pos, end - pos) for start, end in match.regs)
+
+
+class _RulesCache(dict):
+    """
+    Cache that gives the rules of a Pygments `RegexLexer` class for
+    `_lex_matches`: a dictionary that maps every state to a list of
+    `(rexmatch, action, new_state, look_ahead)` tuples. (See `_look_ahead`.)
+    """
+    def __missing__(self, lexer_cls):
+        result = {}
+
+        for state, rules in lexer_cls._tokens.items():
+            result[state] = [
+                (rexmatch, action, new_state,
+                 _look_ahead(getattr(rexmatch, '__self__', None)))
+                for rexmatch, action, new_state in rules]
+
+        self[lexer_cls] = result
+        return result
+
+
+_rules_cache = _RulesCache()
+
+
+def _look_ahead(pattern):
+    """
+    Tell whether matching this compiled regular expression could look at the
+    text after the next newline. Returns `None` when it can't (most Pygments
+    rules stop at the end of a line, so their result doesn't depend on the
+    next lines), `True` when it can, or a `(text, pos)` function for when
+    that depends on the position. (The function returns `False` when the
+    first character at the position already doesn't match.)
+    """
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except (AttributeError, TypeError, re.error):
+        return True
+
+    if not _items_read_past_newline(parsed, False, bool(pattern.flags & re.DOTALL)):
+        return None
+
+    return _first_character_check(parsed, bool(pattern.flags & re.IGNORECASE)) or True
+
+
+def _first_character_check(items, ignore_case):
+    """
+    Helper for `_look_ahead`: return a `(text, pos)` function that returns
+    `False` when matching these parsed regex items at this position fails at
+    the first character, or `None`.
+    """
+    c = sre_constants
+
+    if items:
+        op, av = items[0]
+
+        if op is c.AT and av in (c.AT_BEGINNING, c.AT_BEGINNING_STRING):
+            return _at_line_start
+
+        elif op is c.LITERAL and not ignore_case:
+            char = unichr(av)
+            return lambda text, pos: text.startswith(char, pos)
+
+        elif op is c.SUBPATTERN:
+            if len(av) == 4 and av[1] & re.IGNORECASE:
+                ignore_case = True
+            return _first_character_check(av[-1], ignore_case)
+
+
+def _at_line_start(text, pos):
+    return pos == 0 or text[pos - 1] == '\n'
+
+
+_NEWLINE = ord('\n')
+
+# Character categories without newline.
+_CATEGORIES_WITHOUT_NEWLINE = (
+    sre_constants.CATEGORY_DIGIT,
+    sre_constants.CATEGORY_NOT_SPACE,
+    sre_constants.CATEGORY_WORD,
+    sre_constants.CATEGORY_NOT_LINEBREAK,
+)
+
+_REPEATS = tuple(op for op in (
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    getattr(sre_constants, 'POSSESSIVE_REPEAT', None),  # Python 3.11+
+) if op is not None)
+
+
+def _items_read_past_newline(items, followed, dotall):
+    """
+    Helper for `_look_ahead`: tell whether these parsed regex items could
+    look at the text after a newline. `followed` tells whether something can
+    be matched after them.
+    """
+    c = sre_constants
+
+    for i, (op, av) in enumerate(items):
+        item_followed = followed or i < len(items) - 1
+
+        if op in (c.LITERAL, c.NOT_LITERAL, c.ANY, c.IN):
+            if item_followed and _matches_newline(op, av, dotall):
+                return True
+
+        elif op in _REPEATS:
+            _, max_count, item = av
+            if _items_read_past_newline(item, item_followed or max_count > 1, dotall):
+                return True
+
+        elif op is c.SUBPATTERN:
+            item_dotall = dotall
+
+            if len(av) == 4:
+                # Python 3.6+ also has flags that only apply to this group.
+                _, add_flags, del_flags, item = av
+                if add_flags & re.DOTALL:
+                    item_dotall = True
+                if del_flags & re.DOTALL:
+                    item_dotall = False
+            else:
+                _, item = av
+
+            if _items_read_past_newline(item, item_followed, item_dotall):
+                return True
+
+        elif op is getattr(c, 'ATOMIC_GROUP', None):
+            if _items_read_past_newline(av, item_followed, dotall):
+                return True
+
+        elif op is c.BRANCH:
+            if any(_items_read_past_newline(item, item_followed, dotall) for item in av[1]):
+                return True
+
+        elif op in (c.ASSERT, c.ASSERT_NOT):
+            # A lookahead starts at the same position as the next item. A
+            # lookbehind only looks at the text before.
+            direction, item = av
+            if direction > 0 and _items_read_past_newline(item, False, dotall):
+                return True
+
+        elif op is not c.AT:
+            # Back references, conditionals, ...
+            return True
+
+    return False
+
+
+def _matches_newline(op, av, dotall):
+    " True when this parsed regex item (one character) could match a newline. "
+    c = sre_constants
+
+    if op is c.LITERAL:
+        return av == _NEWLINE
+    elif op is c.NOT_LITERAL:
+        return av != _NEWLINE
+    elif op is c.ANY:
+        return dotall
+    else:
+        negate = False
+        match = False
+
+        for item_op, item_av in av:
+            if item_op is c.NEGATE:
+                negate = True
+            elif item_op is c.LITERAL:
+                match = match or item_av == _NEWLINE
+            elif item_op is c.RANGE:
+                match = match or item_av[0] <= _NEWLINE <= item_av[1]
+            elif item_op is c.CATEGORY:
+                match = match or item_av not in _CATEGORIES_WITHOUT_NEWLINE
+            else:
+                return True
+
+        return match != negate
+
+
+class _IncrementalLexedDocument(object):
+    """
+    The lexed lines of a document, for `PygmentsLexer` in incremental mode.
+
+    For every line, we keep the lexer state at the start of that line (if a
+    token starts exactly there) and at the end of that line. Lines are only
+    lexed when they are requested, continuing from the last line with a known
+    state.
+
+    When the previous document is given, the lines before the first change
+    are taken from there, after matching the rules that could look past the
+    end of their line again. (See `_lex_matches`.) The lines after the last
+    change are only taken tentatively: they are reused once lexing the
+    changed part ends up at the start of such a line, with the same state as
+    the lexing pass that produced that line had there. Then all the following
+    lines that were produced by the same pass are reused too. (Lines of
+    different passes don't necessarily fit together.)
+    """
+    def __init__(self, pygments_lexer, document, previous=None):
+        self.pygments_lexer = pygments_lexer
+        self.document = document
+        self.lines = lines = document.lines
+        count = len(lines)
+
+        if previous is None:
+            #: Style/text fragments for every line. (`None` when not lexed.)
+            self.fragments = [None] * count
+
+            #: Lexer state stack at the start of every line, or `None`.
+            self.stacks = [None] * count
+
+            #: Lexer state stack at the start of the next line, for every line.
+            self.end_stacks = [None] * count
+
+            #: The lexing pass that produced every line.
+            self.passes = [None] * count
+
+            #: For every line, the `(offset, rexmatch, regs)` tuples for the
+            #: rules that could look past the end of the line. (See
+            #: `_lex_matches`.)
+            self.checks = [None] * count
+
+            #: All lines before this one are lexed correctly.
+            self.valid_count = 0
+
+            #: The lines from here on were taken from the previous document.
+            self.reuse_start = count
+        else:
+            old_lines = previous.lines
+            old_count = len(old_lines)
+
+            # Find the unchanged lines at the start and at the end.
+            prefix = 0
+            max_prefix = min(count, old_count)
+            while prefix < max_prefix and lines[prefix] == old_lines[prefix]:
+                prefix += 1
+
+            suffix = 0
+            max_suffix = max_prefix - prefix
+            while suffix < max_suffix and lines[-1 - suffix] == old_lines[-1 - suffix]:
+                suffix += 1
+
+            # The last unchanged line could depend on the first changed line.
+            # (Any rule can look at the character after the end of the line.)
+            prefix = max(0, prefix - 1)
+            valid_count = self._check_lines(
+                previous.checks, min(prefix, previous.valid_count),
+                document.translate_row_col_to_index(prefix, 0))
+            unknown = [None] * (count - valid_count - suffix)
+
+            def reuse(items):
+                return items[:valid_count] + unknown + items[old_count - suffix:]
+
+            self.fragments = reuse(previous.fragments)
+            self.stacks = reuse(previous.stacks)
+            self.end_stacks = reuse(previous.end_stacks)
+            self.passes = reuse(previous.passes)
+            self.checks = reuse(previous.checks)
+            self.valid_count = valid_count
+            self.reuse_start = count - suffix
+
+        # Generator that is lexing the line at `valid_count`, and the pass
+        # that it belongs to.
+        self._line_generator = None
+        self._pass = None
+
+    def get_line(self, i):
+        " Return the fragments for the given line number. "
+        if not 0 <= i < len(self.lines):
+            return []
+
+        while i >= self.valid_count:
+            self._lex_until(i)
+
+        return self.fragments[i]
+
+    def _check_lines(self, checks, count, end):
+        """
+        Match the rules that could look past the end of the line again (using
+        the `checks` of the previous document), for the first `count` lines.
+        Return the number of lines before the first line for which a result
+        is different, or for which a match goes beyond position `end`. (The
+        text before `end` didn't change.)
+        """
+        text = self.document.text
+        line_start = 0
+
+        for lineno in range(count):
+            for offset, rexmatch, regs in checks[lineno]:
+                pos = line_start + offset
+                m = rexmatch(text, pos)
+                if _relative_regs(m, pos) != regs or (m and m.end() > end):
+                    return lineno
+
+            line_start += len(self.lines[lineno]) + 1
+
+        return count
+
+    def _stack_at(self, lineno):
+        " The state at the start of this line, when all lines before are valid. "
+        if lineno == 0:
+            return ('root', )
+        return self.end_stacks[lineno - 1]
+
+    def _lex_until(self, i):
+        """
+        Lex lines starting at `valid_count`, until line `i` is lexed, or until
+        the result of a previous lexing pass can be reused.
+        """
+        if self._line_generator is None:
+            # Start from the last line with a known state.
+            lineno = self.valid_count
+            stack = self._stack_at(lineno)
+            while stack is None:
+                lineno -= 1
+                stack = self.stacks[lineno]
+
+            self._line_generator = self._lex_lines(lineno, stack)
+            self._pass = object()
+
+        for lineno, line_fragments, next_stack, checks in self._line_generator:
+            if lineno < self.valid_count:
+                # Lexing lines again, because we started at an earlier line.
+                continue
+
+            self.fragments[lineno] = line_fragments
+            self.stacks[lineno] = self._stack_at(lineno)
+            self.end_stacks[lineno] = next_stack
+            self.passes[lineno] = self._pass
+            self.checks[lineno] = checks
+            self.valid_count = lineno + 1
+
+            if self._reuse_previous_pass():
+                self._line_generator = None
+                return
+
+            if lineno >= i:
+                return
+
+    def _reuse_previous_pass(self):
+        """
+        If the line at `valid_count` was produced by a previous pass, which
+        started that line with the same state as we have now, reuse all the
+        lines that this pass produced from there on. Return `True` when lines
+        were reused.
+        """
+        fragments = self.fragments
+        stacks = self.stacks
+        passes = self.passes
+        count = len(fragments)
+        lineno = self.valid_count
+
+        while (self.reuse_start <= lineno < count and
+               fragments[lineno] is not None and
+               stacks[lineno] is not None and
+               stacks[lineno] == self._stack_at(lineno)):
+            previous_pass = passes[lineno]
+            while lineno < count and passes[lineno] is previous_pass:
+                passes[lineno] = self._pass
+                lineno += 1
+
+        reused = lineno > self.valid_count
+        self.valid_count = lineno
+        return reused
+
+    def _lex_lines(self, lineno, stack):
+        """
+        Generator that lexes the document, starting at the given line, with
+        the given state. Yields a `(lineno, fragments, next_stack, checks)`
+        tuple for every line. `next_stack` is the state at the start of the
+        next line, or `None` if no token starts there. `checks` is a list of
+        `(offset, rexmatch, regs)` tuples: the rules that were tried in this
+        line that could look past the end of it.
+        """
+        text = self.document.text
+        lines = self.document.lines
+        pos = line_start = self.document.translate_row_col_to_index(lineno, 0)
+        line = []
+        line_checks = []
+
+        for tokens, end_pos, stack, checks in _lex_matches(
+                self.pygments_lexer, text, pos, stack):
+            for rexmatch, regs in checks:
+                line_checks.append((pos - line_start, rexmatch, regs))
+            pos = end_pos
+
+            completed_lines = []
+
+            # (Split in lines, like `split_lines` does, but leave out empty
+            # fragments, so that the result doesn't depend on where we
+            # started lexing.)
+            for _, token, value in tokens:
+                style = _token_cache[token]
+                parts = value.split('\n')
+
+                for part in parts[:-1]:
+                    if part:
+                        line.append((style, part))
+                    completed_lines.append(line)
+                    line = []
+
+                if parts[-1]:
+                    line.append((style, parts[-1]))
+
+            if completed_lines:
+                at_line_start = text[end_pos - 1] == '\n'
+
+                for i, line_fragments in enumerate(completed_lines):
+                    if i == len(completed_lines) - 1 and at_line_start:
+                        next_stack = stack
+                    else:
+                        next_stack = None
+
+                    yield lineno, line_fragments, next_stack, line_checks
+
+                    line_start += len(lines[lineno]) + 1
+                    line_checks = []
+                    lineno += 1
+
+        yield lineno, line, None, line_checks
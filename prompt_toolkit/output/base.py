@@ -134,6 +134,15 @@ class Output(with_metaclass(ABCMeta, object)):
     def show_cursor(self):
         " Show cursor. "
 
+    def erase_characters(self, amount):
+        """
+        Erase `amount` characters, starting at the cursor position, without
+        moving the cursor.
+        (Outputs that don't have a dedicated command for this write spaces.)
+        """
+        self.write(' ' * amount)
+        self.cursor_backward(amount)
+
     def ask_for_cpr(self):
         """
         Asks for a cursor position report (CPR).
@@ -187,6 +196,7 @@ class DummyOutput(Output):
     def cursor_backward(self, amount): pass
     def hide_cursor(self): pass
     def show_cursor(self): pass
+    def erase_characters(self, amount): pass
     def ask_for_cpr(self): pass
     def bell(self): pass
     def enable_bracketed_paste(self): pass
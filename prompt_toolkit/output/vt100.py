@@ -398,6 +398,10 @@ class Vt100_Output(Output):
         self.get_size = get_size
         self.term = term or 'xterm'
 
+        #: Total amount of data written to `stdout`. (Bytes, or characters
+        #: when `write_binary` is `False`.)
+        self.bytes_written = 0
+
         # Cache for escape codes.
         self._escape_code_caches = {
             ColorDepth.DEPTH_1_BIT: _EscapeCodeCache(ColorDepth.DEPTH_1_BIT),
@@ -507,6 +511,16 @@ class Vt100_Output(Output):
         """
         self.write_raw('\x1b[J')
 
+    def erase_characters(self, amount):
+        """
+        Erase `amount` characters, starting at the cursor position, without
+        moving the cursor. (ECH)
+        """
+        if amount == 1:
+            self.write_raw('\x1b[X')
+        elif amount > 1:
+            self.write_raw('\x1b[%iX' % amount)
+
     def reset_attributes(self):
         self.write_raw('\x1b[0m')
 
@@ -598,9 +612,12 @@ class Vt100_Output(Output):
                     out = self.stdout.buffer  # Py3.
                 else:
                     out = self.stdout
-                out.write(data.encode(self.stdout.encoding or 'utf-8', 'replace'))
+                encoded = data.encode(self.stdout.encoding or 'utf-8', 'replace')
+                out.write(encoded)
+                self.bytes_written += len(encoded)
             else:
                 self.stdout.write(data)
+                self.bytes_written += len(data)
 
             self.stdout.flush()
         except IOError as e:
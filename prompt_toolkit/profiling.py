@@ -0,0 +1,230 @@
+"""
+Opt-in instrumentation of the rendering.
+
+Attach a :class:`.RenderProfiler` to an application to find out where the
+time of every frame goes::
+
+    profiler = RenderProfiler()
+    app = Application(..., render_profiler=profiler)
+
+    # Later.
+    frame = profiler.last_frame
+    print(frame.timings['write_to_screen'])
+    print(frame.window_timings)
+
+Setting `app.render_profiler` to `None` turns it off again. When no profiler
+is attached, the instrumentation costs almost nothing.
+"""
+from __future__ import unicode_literals
+from collections import defaultdict, deque
+import threading
+import time
+
+__all__ = [
+    'RenderProfiler',
+    'FrameTimings',
+    'get_render_profiler',
+    'measure',
+]
+
+_time = getattr(time, 'perf_counter', time.time)
+
+# The profiler recording the frame that is rendered in the current thread.
+_local = threading.local()
+
+
+def get_render_profiler():
+    """
+    Return the :class:`.RenderProfiler` that is recording the frame that is
+    being rendered in the current thread, or `None`.
+    """
+    return getattr(_local, 'profiler', None)
+
+
+def measure(category, window=None):
+    """
+    Context manager that adds the time spent in the block to the frame that
+    is being recorded in the current thread. (This does nothing when no frame
+    is being recorded.)
+    """
+    profiler = get_render_profiler()
+
+    if profiler is None:
+        return _no_measure
+    else:
+        return _Measure(profiler, category, window)
+
+
+class FrameTimings(object):
+    """
+    Timings of one rendered frame. All durations are in seconds.
+
+    The categories of `timings` are:
+
+    - ``layout``: Calculating the preferred sizes of the windows.
+    - ``write_to_screen``: Writing the windows to the screen. (Including
+      ``create_content``, ``lexing`` and ``style``.)
+    - ``create_content``: `UIControl.create_content` calls.
+    - ``lexing``: Lexing of the buffers.
+    - ``style``: Resolving style strings that were not cached yet.
+    - ``diff``: Comparing the screen with the previous one and generating
+      the output.
+    - ``flush``: Writing the output to the terminal.
+
+    Some categories are nested in others. Their times don't add up to the
+    frame duration.
+
+    :param number: The render counter of the application.
+    """
+    def __init__(self, number):
+        self.number = number
+        self.duration = 0
+        self.timings = defaultdict(float)
+        self.counts = defaultdict(int)
+
+        #: Maps the `Window` objects to the time it took to write them to the
+        #: screen.
+        self.window_timings = defaultdict(float)
+
+        #: Amount of data that was written to the output, if the output
+        #: reports this.
+        self.bytes_written = 0
+
+    def format_summary(self):
+        """
+        Return a one line summary of this frame.
+        """
+        parts = ['frame %.1fms' % (self.duration * 1000)]
+
+        for category in ('layout', 'write_to_screen', 'create_content',
+                         'lexing', 'style', 'diff', 'flush'):
+            if category in self.timings:
+                parts.append('%s %.1fms' % (category, self.timings[category] * 1000))
+
+        parts.append('%i bytes' % self.bytes_written)
+        return ' | '.join(parts)
+
+    def __repr__(self):
+        return '%s(number=%r, duration=%r)' % (
+            self.__class__.__name__, self.number, self.duration)
+
+
+class RenderProfiler(object):
+    """
+    Records the timings of the last `max_frames` rendered frames.
+
+    :param max_frames: Number of frames to remember.
+    """
+    def __init__(self, max_frames=100):
+        assert isinstance(max_frames, int) and max_frames > 0
+
+        #: The recorded :class:`.FrameTimings`, oldest first.
+        self.frames = deque(maxlen=max_frames)
+        self._current_frame = None
+        self._start_time = None
+
+    @property
+    def last_frame(self):
+        " The :class:`.FrameTimings` of the last frame, or `None`. "
+        if self.frames:
+            return self.frames[-1]
+
+    def start_frame(self, number):
+        """
+        Start recording a frame. (Called by the renderer.) The timings are
+        recorded for everything that happens in the current thread, until
+        `end_frame` is called.
+        """
+        self._current_frame = FrameTimings(number)
+        self._start_time = _time()
+        _local.profiler = self
+
+    def end_frame(self):
+        """
+        Finish recording the current frame.
+        """
+        frame = self._current_frame
+
+        if frame is not None:
+            frame.duration = _time() - self._start_time
+            self.frames.append(frame)
+            self._current_frame = None
+
+        _local.profiler = None
+
+    def add(self, category, duration, window=None):
+        """
+        Add the time spent on something to the current frame.
+
+        :param window: The `Window` object, when the time was spent on
+            writing this window to the screen.
+        """
+        frame = self._current_frame
+
+        if frame is not None:
+            frame.timings[category] += duration
+            frame.counts[category] += 1
+
+            if window is not None:
+                frame.window_timings[window] += duration
+
+    def add_bytes_written(self, amount):
+        " Add the amount of data written to the output to the current frame. "
+        if self._current_frame is not None:
+            self._current_frame.bytes_written += amount
+
+    def measure(self, category, window=None):
+        """
+        Context manager that adds the time spent in the block to the current
+        frame.
+        """
+        return _Measure(self, category, window)
+
+    def timed(self, category, func, window=None):
+        """
+        Wrap `func`, so that the time spent in it is added to the current
+        frame.
+        """
+        def timed_func(*a, **kw):
+            start = _time()
+            try:
+                return func(*a, **kw)
+            finally:
+                self.add(category, _time() - start, window)
+        return timed_func
+
+    def flush_output(self, output):
+        """
+        Flush the :class:`~prompt_toolkit.output.Output`, and add the time and
+        the amount of data that was written to the current frame.
+        """
+        bytes_written = getattr(output, 'bytes_written', 0)
+
+        with self.measure('flush'):
+            output.flush()
+
+        self.add_bytes_written(getattr(output, 'bytes_written', 0) - bytes_written)
+
+
+class _Measure(object):
+    def __init__(self, profiler, category, window):
+        self.profiler = profiler
+        self.category = category
+        self.window = window
+
+    def __enter__(self):
+        self.start = _time()
+
+    def __exit__(self, *a):
+        self.profiler.add(self.category, _time() - self.start, self.window)
+
+
+class _NoMeasure(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *a):
+        pass
+
+
+_no_measure = _NoMeasure()
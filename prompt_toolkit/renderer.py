@@ -11,13 +11,12 @@ from prompt_toolkit.input.base import Input
 from prompt_toolkit.layout.mouse_handlers import MouseHandlers
 from prompt_toolkit.layout.screen import Point, Screen, WritePosition
 from prompt_toolkit.output import Output, ColorDepth
+from prompt_toolkit.profiling import get_render_profiler, measure
 from prompt_toolkit.styles import BaseStyle, DummyStyleTransformation, StyleTransformation
 from prompt_toolkit.utils import is_windows
 
 from collections import deque
 from six.moves import range
-import time
-import threading
 
 __all__ = [
     'Renderer',
@@ -25,6 +24,11 @@ __all__ = [
 ]
 
 
+#: Runs of at least this many changed blank cells are written using "erase
+#: character", followed by a cursor movement, instead of writing spaces.
+_ERASE_CHARACTERS_MIN_RUN = 12
+
+
 def _output_screen_diff(app, output, screen, current_pos, color_depth,
                         previous_screen=None, last_style=None, is_done=False,
                         full_screen=False, attrs_for_style_string=None,
@@ -64,6 +68,7 @@ def _output_screen_diff(app, output, screen, current_pos, color_depth,
     _output_cursor_forward = output.cursor_forward
     _output_cursor_up = output.cursor_up
     _output_cursor_backward = output.cursor_backward
+    _output_erase_characters = output.erase_characters
 
     # Hide cursor before rendering. (Avoid flickering.)
     output.hide_cursor()
@@ -100,27 +105,44 @@ def _output_screen_diff(app, output, screen, current_pos, color_depth,
 
         return new
 
-    def output_char(char):
+    def set_style(style):
         """
-        Write the output of this character.
+        Make sure that the attributes for this style string are active.
         """
         # If the last printed character has the same style, don't output the
         # style again.
         the_last_style = last_style[0]  # Either `None` or a style string.
 
-        if the_last_style == char.style:
-            write(char.char)
-        else:
+        if the_last_style != style:
             # Look up `Attr` for this style string. Only set attributes if different.
             # (Two style strings can still have the same formatting.)
             # Note that an empty style string can have formatting that needs to
             # be applied, because of style transformations.
-            new_attrs = attrs_for_style_string[char.style]
+            new_attrs = attrs_for_style_string[style]
             if not the_last_style or new_attrs != attrs_for_style_string[the_last_style]:
                 _output_set_attributes(new_attrs, color_depth)
 
-            write(char.char)
-            last_style[0] = char.style
+            last_style[0] = style
+
+    def output_run(style, text):
+        """
+        Write a run of characters that share the same style.
+        """
+        set_style(style)
+
+        # Long runs of blanks are erased using "erase character" instead.
+        # This sends a couple of bytes instead of one byte per cell. Only do
+        # this when the blank cells are indistinguishable from erased cells.
+        # (Erased cells take the background color, depending on the terminal,
+        # and don't show underline or reverse attributes.)
+        if len(text) >= _ERASE_CHARACTERS_MIN_RUN and not text.strip(' '):
+            attrs = attrs_for_style_string[style]
+            if not (attrs.bgcolor or attrs.underline or attrs.reverse):
+                _output_erase_characters(len(text))
+                _output_cursor_forward(len(text))
+                return
+
+        write(text)
 
     # Render for the first time: reset styling.
     if not previous_screen:
@@ -154,6 +176,17 @@ def _output_screen_diff(app, output, screen, current_pos, color_depth,
     for y in range(row_count):
         new_row = screen.data_buffer[y]
         previous_row = previous_screen.data_buffer[y]
+
+        # Skip rows that didn't change at all. `Char` instances are interned
+        # through `_CHAR_CACHE`, so this dictionary comparison runs at C speed
+        # and mostly compares identities. This is much cheaper than walking
+        # every column. (When it returns `False`, some cells could still be
+        # equal, because cells that were never written are missing from the
+        # row rather than being equal to the default character. The loop
+        # below handles that.)
+        if new_row == previous_row:
+            continue
+
         zero_width_escapes_row = screen.zero_width_escapes[y]
 
         new_max_line_len = min(width - 1, max(new_row.keys()) if new_row else 0)
@@ -164,22 +197,45 @@ def _output_screen_diff(app, output, screen, current_pos, color_depth,
         while c < new_max_line_len + 1:
             new_char = new_row[c]
             old_char = previous_row[c]
-            char_width = (new_char.width or 1)
 
-            # When the old and new character at this position are different,
-            # draw the output. (Because of the performance, we don't call
-            # `Char.__ne__`, but inline the same expression.)
-            if new_char.char != old_char.char or new_char.style != old_char.style:
-                current_pos = move_cursor(Point(x=c, y=y))
+            # When the old and new character at this position are equal, go
+            # to the next one. (Because of the performance, we don't call
+            # `Char.__eq__`, but inline the same expression.)
+            if new_char.char == old_char.char and new_char.style == old_char.style:
+                c += (new_char.width or 1)
+                continue
+
+            # Collect the run of changed characters that starts here and
+            # shares the same style. It's written in one call, using one
+            # attribute change.
+            run_start = c
+            run_style = new_char.style
+            run_chars = []
 
-                # Send injected escape sequences to output.
-                if c in zero_width_escapes_row:
-                    write_raw(zero_width_escapes_row[c])
+            while True:
+                run_chars.append(new_char.char)
+                c += (new_char.width or 1)
 
-                output_char(new_char)
-                current_pos = Point(x=current_pos.x + char_width, y=current_pos.y)
+                # Injected escape sequences have to be written right before
+                # their cell, so they start a new run.
+                if c > new_max_line_len or c in zero_width_escapes_row:
+                    break
 
-            c += char_width
+                new_char = new_row[c]
+                old_char = previous_row[c]
+
+                if new_char.style != run_style or (
+                        new_char.char == old_char.char and old_char.style == run_style):
+                    break
+
+            current_pos = move_cursor(Point(x=run_start, y=y))
+
+            # Send injected escape sequences to output.
+            if run_start in zero_width_escapes_row:
+                write_raw(zero_width_escapes_row[run_start])
+
+            output_run(run_style, ''.join(run_chars))
+            current_pos = Point(x=c, y=y)
 
         # If the new line is shorter, trim it.
         if previous_screen and new_max_line_len < previous_max_line_len:
@@ -223,6 +279,12 @@ def _output_screen_diff(app, output, screen, current_pos, color_depth,
     return current_pos, last_style[0]
 
 
+def _overlap(wp1, wp2):
+    " True when the two `WritePosition` objects overlap. "
+    return (wp1.xpos < wp2.xpos + wp2.width and wp2.xpos < wp1.xpos + wp1.width and
+            wp1.ypos < wp2.ypos + wp2.height and wp2.ypos < wp1.ypos + wp1.height)
+
+
 class HeightIsUnknownError(Exception):
     " Information unavailable. Did not yet receive the CPR response. "
 
@@ -240,8 +302,9 @@ class _StyleStringToAttrsCache(dict):
         self.style_transformation = style_transformation
 
     def __missing__(self, style_str):
-        attrs = self.get_attrs_for_style_str(style_str)
-        attrs = self.style_transformation.transform_attrs(attrs)
+        with measure('style'):
+            attrs = self.get_attrs_for_style_str(style_str)
+            attrs = self.style_transformation.transform_attrs(attrs)
 
         self[style_str] = attrs
         return attrs
@@ -311,6 +374,10 @@ class Renderer(object):
         self._last_size = None
         self._last_style = None
 
+        # The focused window and available height during the last rendering.
+        # (When these change, we can't render individual windows.)
+        self._last_layout_state = None
+
         # Default MouseHandlers. (Just empty.)
         self.mouse_handlers = MouseHandlers()
 
@@ -416,19 +483,14 @@ class Renderer(object):
                 do_cpr()
 
                 def timer():
-                    time.sleep(self.CPR_TIMEOUT)
-
                     # Not set in the meantime -> not supported.
                     if self.cpr_support == CPR_Support.UNKNOWN:
                         self.cpr_support = CPR_Support.NOT_SUPPORTED
 
                         if self.cpr_not_supported_callback:
-                            # Make sure to call this callback in the main thread.
-                            get_event_loop().call_from_executor(self.cpr_not_supported_callback)
+                            self.cpr_not_supported_callback()
 
-                t = threading.Thread(target=timer)
-                t.daemon = True
-                t.start()
+                get_event_loop().call_later(self.CPR_TIMEOUT, timer)
 
     def report_absolute_cursor_row(self, row):
         """
@@ -473,36 +535,48 @@ class Renderer(object):
 
         f = Future()
 
-        # When a CPR has been received, set the result.
-        def wait_for_responses():
-            for response_f in cpr_futures:
-                yield From(response_f)
-            if not f.done():
-                f.set_result(None)
-        ensure_future(wait_for_responses())
-
         # Timeout.
         def wait_for_timeout():
-            time.sleep(timeout)
-
             # Got timeout.
             if not f.done():
                 self._waiting_for_cpr_futures = deque()
                 f.set_result(None)
 
-        t = threading.Thread(target=wait_for_timeout)
-        t.daemon = True
-        t.start()
+        timer = get_event_loop().call_later(timeout, wait_for_timeout)
+
+        # When a CPR has been received, set the result.
+        def wait_for_responses():
+            for response_f in cpr_futures:
+                yield From(response_f)
+            timer.cancel()
+            if not f.done():
+                f.set_result(None)
+        ensure_future(wait_for_responses())
 
         return f
 
-    def render(self, app, layout, is_done=False):
+    def render(self, app, layout, is_done=False, windows=None):
         """
         Render the current interface to the output.
 
         :param is_done: When True, put the cursor at the end of the interface. We
                 won't print any changes to this part.
+        :param windows: When given, only render these :class:`.Window` objects
+                again, at the position where they were drawn before. (Only if
+                the layout didn't change. Otherwise, everything is rendered.)
         """
+        profiler = app.render_profiler
+
+        if profiler is None:
+            self._render(app, layout, is_done, windows)
+        else:
+            profiler.start_frame(app.render_counter)
+            try:
+                self._render(app, layout, is_done, windows)
+            finally:
+                profiler.end_frame()
+
+    def _render(self, app, layout, is_done, windows):
         output = self.output
 
         # Enter alternate screen.
@@ -526,8 +600,43 @@ class Renderer(object):
             output.disable_mouse_support()
             self._mouse_support_enabled = False
 
-        # Create screen and write layout to it.
         size = output.get_size()
+
+        if windows and not is_done and self._can_render_windows(app, layout, windows, size):
+            screen = self._render_windows(layout, windows)
+            mouse_handlers = self.mouse_handlers
+        else:
+            screen, mouse_handlers = self._render_layout(app, layout, is_done, size)
+
+        # Process diff and write to output.
+        with measure('diff'):
+            self._cursor_pos, self._last_style = _output_screen_diff(
+                app, output, screen, self._cursor_pos, app.color_depth,
+                self._last_screen, self._last_style, is_done,
+                full_screen=self.full_screen,
+                attrs_for_style_string=self._attrs_for_style, size=size,
+                previous_width=(self._last_size.columns if self._last_size else 0))
+        self._last_screen = screen
+        self._last_size = size
+        self.mouse_handlers = mouse_handlers
+
+        profiler = get_render_profiler()
+        if profiler is None:
+            output.flush()
+        else:
+            profiler.flush_output(output)
+
+        # Set visible windows in layout.
+        app.layout.visible_windows = screen.visible_windows
+
+        if is_done:
+            self.reset()
+
+    def _render_layout(self, app, layout, is_done, size):
+        """
+        Create a new screen and write the whole layout to it.
+        Returns a (screen, mouse_handlers) tuple.
+        """
         screen = Screen()
         screen.show_cursor = False  # Hide cursor by default, unless one of the
                                     # containers decides to display it.
@@ -581,24 +690,94 @@ class Renderer(object):
         if app.exit_style:
             screen.append_style_to_content(app.exit_style)
 
-        # Process diff and write to output.
-        self._cursor_pos, self._last_style = _output_screen_diff(
-            app, output, screen, self._cursor_pos, app.color_depth,
-            self._last_screen, self._last_style, is_done,
-            full_screen=self.full_screen,
-            attrs_for_style_string=self._attrs_for_style, size=size,
-            previous_width=(self._last_size.columns if self._last_size else 0))
-        self._last_screen = screen
-        self._last_size = size
-        self.mouse_handlers = mouse_handlers
+        self._last_layout_state = (layout.current_window, self._min_available_height)
 
-        output.flush()
+        return screen, mouse_handlers
 
-        # Set visible windows in layout.
-        app.layout.visible_windows = screen.visible_windows
+    def _can_render_windows(self, app, layout, windows, size):
+        """
+        True when these windows can be rendered again on top of a copy of the
+        previous screen, without computing the layout again.
+        """
+        last_screen = self._last_screen
 
-        if is_done:
-            self.reset()
+        # Something changed that requires a full repaint.
+        if (last_screen is None or self._last_size != size or
+                app.exit_style or
+                self._last_layout_state != (layout.current_window, self._min_available_height) or
+                self.style.invalidation_hash() != self._last_style_hash or
+                app.style_transformation.invalidation_hash() != self._last_transformation_hash or
+                app.color_depth != self._last_color_depth):
+            return False
+
+        visible_windows = last_screen.visible_windows
+
+        for window in windows:
+            if window not in visible_windows or window._last_write_to_screen_args is None:
+                return False
+
+            # When other windows overlap (floats), we can't paint this one
+            # in isolation.
+            wp = window._last_write_to_screen_args[0]
+
+            for other in visible_windows:
+                if other is not window and _overlap(
+                        wp, other._last_write_to_screen_args[0]):
+                    return False
+
+            # When the dimensions changed, the layout has to be computed again.
+            if window._dimensions_changed():
+                return False
+
+        return True
+
+    def _render_windows(self, layout, windows):
+        """
+        Create a copy of the previous screen, and render the given windows
+        again at the same position. Returns the new screen.
+        """
+        last_screen = self._last_screen
+
+        screen = Screen()
+        screen.show_cursor = last_screen.show_cursor
+        screen.width = last_screen.width
+        screen.height = last_screen.height
+        screen.cursor_positions = dict(last_screen.cursor_positions)
+        screen.menu_positions = dict(last_screen.menu_positions)
+        screen.visible_windows = [
+            w for w in last_screen.visible_windows if w not in windows]
+
+        # Rows that are not touched are shared with the previous screen.
+        screen.data_buffer.update(last_screen.data_buffer)
+        screen.zero_width_escapes.update(last_screen.zero_width_escapes)
+
+        for window in windows:
+            write_position, parent_style, erase_bg, z_index = window._last_write_to_screen_args
+            xmin = write_position.xpos
+            xmax = write_position.xpos + write_position.width
+
+            # Copy the rows of this window, and erase the region.
+            for y in range(write_position.ypos, write_position.ypos + write_position.height):
+                for buffer, last_buffer in [
+                        (screen.data_buffer, last_screen.data_buffer),
+                        (screen.zero_width_escapes, last_screen.zero_width_escapes)]:
+                    if y in last_buffer:
+                        row = last_buffer[y].copy()
+                        for x in range(xmin, xmax):
+                            row.pop(x, None)
+                        buffer[y] = row
+
+            screen.cursor_positions.pop(window, None)
+            screen.menu_positions.pop(window, None)
+
+            if window == layout.current_window:
+                screen.show_cursor = False
+
+            window.write_to_screen(screen, self.mouse_handlers, write_position,
+                                   parent_style, erase_bg, z_index)
+
+        screen.draw_all_floats()
+        return screen
 
     def erase(self, leave_alternate_screen=True):
         """
@@ -0,0 +1,340 @@
+"""
+Rope: immutable text storage for big documents.
+
+A :class:`.Rope` is a balanced binary tree of text chunks. Every node knows
+the length of its text and the amount of newlines in it. This makes inserting
+and deleting text, and translating between indexes and (row, col) positions
+O(log n), without building the full string.
+
+A :class:`~prompt_toolkit.buffer.Buffer` created with ``use_rope=True`` stores
+its text in a rope, and creates :class:`~prompt_toolkit.document.Document`
+instances that answer line queries through it. The string is only built when
+someone asks for ``Document.text``.
+"""
+from __future__ import unicode_literals
+
+import six
+
+__all__ = [
+    'Rope',
+]
+
+# Maximum size of a chunk of text in a leaf. (When a rope is created from a
+# string, it's split in chunks of this size. Edits can create smaller leaves.)
+_LEAF_SIZE = 1024
+
+
+class Rope(object):
+    """
+    Immutable text, stored in a balanced tree of chunks.
+
+    All operations return a new `Rope`, which shares most of its nodes with
+    the original one.
+
+    :param text: The initial text (unicode).
+    """
+    __slots__ = ('_left', '_right', '_chunk', '_length', '_newlines',
+                 '_height', '_text')
+
+    def __init__(self, text=''):
+        assert isinstance(text, six.text_type)
+
+        if len(text) <= _LEAF_SIZE:
+            self._init_leaf(text)
+        else:
+            # Build a balanced tree from the chunks.
+            leaves = [Rope(text[i:i + _LEAF_SIZE])
+                      for i in range(0, len(text), _LEAF_SIZE)]
+            root = _build_balanced(leaves, 0, len(leaves))
+            self._init_node(root._left, root._right)
+
+        self._text = text  # We have it anyway.
+
+    def _init_leaf(self, chunk):
+        self._left = None
+        self._right = None
+        self._chunk = chunk
+        self._length = len(chunk)
+        self._newlines = chunk.count('\n')
+        self._height = 0
+        self._text = None
+
+    def _init_node(self, left, right):
+        self._left = left
+        self._right = right
+        self._chunk = None
+        self._length = left._length + right._length
+        self._newlines = left._newlines + right._newlines
+        self._height = max(left._height, right._height) + 1
+        self._text = None
+
+    @classmethod
+    def _leaf(cls, chunk):
+        rope = cls.__new__(cls)
+        rope._init_leaf(chunk)
+        return rope
+
+    @classmethod
+    def _node(cls, left, right):
+        rope = cls.__new__(cls)
+        rope._init_node(left, right)
+        return rope
+
+    def __repr__(self):
+        return '%s(length=%r, line_count=%r)' % (
+            self.__class__.__name__, self._length, self.line_count)
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return self.text
+
+    if six.PY2:
+        __unicode__ = __str__
+        del __str__
+
+    @property
+    def text(self):
+        """
+        The full text, as a string. (This is built once, and cached.)
+        """
+        if self._text is None:
+            chunks = []
+            _collect_chunks(self, 0, self._length, chunks)
+            self._text = ''.join(chunks)
+        return self._text
+
+    @property
+    def line_count(self):
+        " Number of lines. (A trailing newline starts a new, empty line.) "
+        return self._newlines + 1
+
+    def get_text(self, start, end):
+        """
+        Return the text between the indexes `start` and `end`.
+        """
+        start = max(0, start)
+        end = min(end, self._length)
+
+        if start >= end:
+            return ''
+        if self._text is not None:
+            return self._text[start:end]
+
+        chunks = []
+        _collect_chunks(self, start, end, chunks)
+        return ''.join(chunks)
+
+    def char_at(self, index):
+        """
+        Return the character at this index. Raise `IndexError` when the index
+        is out of range. (Negative indexes are not supported.)
+        """
+        if not 0 <= index < self._length:
+            raise IndexError('Rope index out of range.')
+
+        node = self
+        while node._chunk is None:
+            if index < node._left._length:
+                node = node._left
+            else:
+                index -= node._left._length
+                node = node._right
+        return node._chunk[index]
+
+    def insert(self, index, text):
+        """
+        Return a new `Rope` with `text` inserted at `index`.
+        """
+        assert isinstance(text, six.text_type)
+        if not text:
+            return self
+
+        left, right = _split(self, index)
+        return _join(_join(left, _from_text(text)), right)
+
+    def delete(self, start, end):
+        """
+        Return a new `Rope` without the text between `start` and `end`.
+        """
+        start = max(0, start)
+        end = min(end, self._length)
+
+        if start >= end:
+            return self
+
+        left, rest = _split(self, start)
+        _, right = _split(rest, end - start)
+        return _join(left, right)
+
+    def replace(self, start, end, text):
+        """
+        Return a new `Rope` in which the text between `start` and `end` is
+        replaced by `text`.
+        """
+        return self.delete(start, end).insert(start, text)
+
+    def row_of_index(self, index):
+        """
+        Return the row (0-based) that contains the character at `index`.
+        (This is the amount of newlines before `index`.)
+        """
+        index = max(0, min(index, self._length))
+        row = 0
+        node = self
+
+        while node._chunk is None:
+            left = node._left
+            if index <= left._length:
+                node = left
+            else:
+                row += left._newlines
+                index -= left._length
+                node = node._right
+
+        return row + node._chunk.count('\n', 0, index)
+
+    def line_start_index(self, row):
+        """
+        Return the index of the first character of the given row.
+        `row` should be in the range [0, line_count).
+        """
+        assert 0 <= row < self.line_count
+
+        if row == 0:
+            return 0
+
+        # Find the index of the newline that ends row `row - 1`.
+        remaining = row  # The n-th newline to find (1-based).
+        index = 0
+        node = self
+
+        while node._chunk is None:
+            left = node._left
+            if remaining <= left._newlines:
+                node = left
+            else:
+                remaining -= left._newlines
+                index += left._length
+                node = node._right
+
+        chunk = node._chunk
+        pos = -1
+        for _ in range(remaining):
+            pos = chunk.index('\n', pos + 1)
+
+        return index + pos + 1
+
+    def line_end_index(self, row):
+        """
+        Return the index right after the last character of the given row.
+        (This is the index of the newline, or the end of the text.)
+        """
+        if row + 1 < self.line_count:
+            return self.line_start_index(row + 1) - 1
+        return self._length
+
+    def get_line(self, row):
+        """
+        Return the text of the given row. (Without the trailing newline.)
+        """
+        return self.get_text(self.line_start_index(row), self.line_end_index(row))
+
+
+def _from_text(text):
+    " Create a rope for a (possibly big) piece of text. "
+    if len(text) <= _LEAF_SIZE:
+        return Rope._leaf(text)
+    return Rope(text)
+
+
+def _build_balanced(leaves, start, end):
+    " Build a balanced tree from leaves[start:end]. "
+    if end - start == 1:
+        return leaves[start]
+
+    middle = (start + end) // 2
+    return Rope._node(_build_balanced(leaves, start, middle),
+                      _build_balanced(leaves, middle, end))
+
+
+def _collect_chunks(node, start, end, chunks):
+    " Append the chunks of text between `start` and `end` to `chunks`. "
+    if node._text is not None:
+        chunks.append(node._text[start:end])
+    elif node._chunk is not None:
+        chunks.append(node._chunk[start:end])
+    else:
+        left = node._left
+        if start < left._length:
+            _collect_chunks(left, start, min(end, left._length), chunks)
+        if end > left._length:
+            _collect_chunks(node._right, max(0, start - left._length),
+                            end - left._length, chunks)
+
+
+def _rebalance(left, right):
+    """
+    Create a node from `left` and `right`, whose heights differ by at most
+    two. Do an AVL rotation when they differ by two.
+    """
+    if left._height > right._height + 1:
+        if left._left._height >= left._right._height:
+            return Rope._node(left._left, Rope._node(left._right, right))
+        else:
+            lr = left._right
+            return Rope._node(Rope._node(left._left, lr._left),
+                              Rope._node(lr._right, right))
+
+    elif right._height > left._height + 1:
+        if right._right._height >= right._left._height:
+            return Rope._node(Rope._node(left, right._left), right._right)
+        else:
+            rl = right._left
+            return Rope._node(Rope._node(left, rl._left),
+                              Rope._node(rl._right, right._right))
+
+    return Rope._node(left, right)
+
+
+def _join(left, right):
+    " Concatenate two ropes, keeping the tree balanced. "
+    if not left._length:
+        return right
+    if not right._length:
+        return left
+
+    # Merge small leaves.
+    if (left._chunk is not None and right._chunk is not None and
+            left._length + right._length <= _LEAF_SIZE):
+        return Rope._leaf(left._chunk + right._chunk)
+
+    if left._height > right._height + 1:
+        return _rebalance(left._left, _join(left._right, right))
+
+    if right._height > left._height + 1:
+        return _rebalance(_join(left, right._left), right._right)
+
+    return Rope._node(left, right)
+
+
+def _split(node, index):
+    " Split a rope in two at `index`. Return a (left, right) tuple. "
+    if index <= 0:
+        return Rope._leaf(''), node
+    if index >= node._length:
+        return node, Rope._leaf('')
+
+    if node._chunk is not None:
+        return Rope._leaf(node._chunk[:index]), Rope._leaf(node._chunk[index:])
+
+    left = node._left
+    if index < left._length:
+        l1, l2 = _split(left, index)
+        return l1, _join(l2, node._right)
+    elif index > left._length:
+        r1, r2 = _split(node._right, index - left._length)
+        return _join(left, r1), r2
+    else:
+        return left, node._right
@@ -27,7 +27,6 @@ import datetime
 import os
 import signal
 import threading
-import time
 import traceback
 import sys
 
@@ -300,22 +299,20 @@ class ProgressBarCounter(object):
 @contextlib.contextmanager
 def _auto_refresh_context(app, refresh_interval=None):
     " Return a context manager for the auto-refresh loop. "
-    done = [False]  # nonlocal
+    timer = [None]  # nonlocal
 
     # Enter.
 
-    def run():
-        while not done[0]:
-            time.sleep(refresh_interval)
-            app.invalidate()
+    def refresh():
+        app.invalidate()
+        timer[0] = get_event_loop().call_later(refresh_interval, refresh)
 
     if refresh_interval:
-        t = threading.Thread(target=run)
-        t.daemon = True
-        t.start()
+        timer[0] = get_event_loop().call_later(refresh_interval, refresh)
 
     try:
         yield
     finally:
         # Exit.
-        done[0] = True
+        if timer[0] is not None:
+            timer[0].cancel()
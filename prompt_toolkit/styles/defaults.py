@@ -65,6 +65,9 @@ PROMPT_TOOLKIT_STYLE = [
     ('validation-toolbar',                      'bg:#550000 #ffffff'),
     ('window-too-small',                        'bg:#550000 #ffffff'),
 
+    # Render profiler toolbar.
+    ('render-profiler-toolbar',                 'bg:#222222 #aaaaaa'),
+
     # Completions toolbar.
     ('completion-toolbar',                     'bg:#bbbbbb #000000'),
     ('completion-toolbar.arrow',               'bg:#bbbbbb #000000 bold'),
@@ -79,6 +82,10 @@ PROMPT_TOOLKIT_STYLE = [
     ('completion-menu.meta.completion.current', 'bg:#aaaaaa #000000'),
     ('completion-menu.multi-column-meta',       'bg:#aaaaaa #000000'),
 
+    # Fuzzy matches in completion menu (for FuzzyWordCompleter).
+    ('fuzzymatch.outside',                      'fg:#444444'),
+    ('fuzzymatch.inside.character',             'underline'),
+
     # Scrollbars.
     ('scrollbar.background',                     'bg:#aaaaaa'),
     ('scrollbar.button',                         'bg:#444444'),
@@ -5,6 +5,7 @@ Input validation for a `Buffer`.
 from __future__ import unicode_literals
 from .filters import to_filter
 from .eventloop import Future, run_in_executor
+from .eventloop.executor import HIGH_PRIORITY
 
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass, text_type
@@ -138,7 +139,7 @@ class ThreadedValidator(Validator):
         """
         def run_validation_thread():
             return self.validate(document)
-        f = run_in_executor(run_validation_thread)
+        f = run_in_executor(run_validation_thread, _priority=HIGH_PRIORITY)
         return f
 
 
@@ -11,7 +11,7 @@ from __future__ import unicode_literals
 from .base import TextArea, Label, Button, Frame, Shadow, Box, VerticalLine, HorizontalLine, RadioList, Checkbox, ProgressBar
 from .dialogs import Dialog
 from .menus import MenuContainer, MenuItem
-from .toolbars import ArgToolbar, CompletionsToolbar, FormattedTextToolbar, SearchToolbar, SystemToolbar, ValidationToolbar
+from .toolbars import ArgToolbar, CompletionsToolbar, FormattedTextToolbar, RenderProfilerToolbar, SearchToolbar, SystemToolbar, ValidationToolbar
 
 __all__ = [
     # Base.
@@ -31,6 +31,7 @@ __all__ = [
     'ArgToolbar',
     'CompletionsToolbar',
     'FormattedTextToolbar',
+    'RenderProfilerToolbar',
     'SearchToolbar',
     'SystemToolbar',
     'ValidationToolbar',
@@ -19,6 +19,7 @@ __all__ = [
     'ArgToolbar',
     'CompletionsToolbar',
     'FormattedTextToolbar',
+    'RenderProfilerToolbar',
     'SearchToolbar',
     'SystemToolbar',
     'ValidationToolbar',
@@ -313,3 +314,31 @@ class ValidationToolbar(object):
 
     def __pt_container__(self):
         return self.container
+
+
+class RenderProfilerToolbar(object):
+    """
+    Toolbar that displays the timings of the last rendered frame. This is only
+    visible while a :class:`~prompt_toolkit.profiling.RenderProfiler` is
+    attached to the application. (Set `Application.render_profiler` to toggle
+    it.)
+    """
+    def __init__(self):
+        def get_formatted_text():
+            profiler = get_app().render_profiler
+            frame = profiler.last_frame if profiler else None
+
+            if frame is None:
+                return []
+            else:
+                return [('class:render-profiler-toolbar', frame.format_summary())]
+
+        self.control = FormattedTextControl(get_formatted_text)
+
+        self.container = ConditionalContainer(
+            content=Window(self.control, height=1,
+                           style='class:render-profiler-toolbar'),
+            filter=Condition(lambda: get_app().render_profiler is not None))
+
+    def __pt_container__(self):
+        return self.container
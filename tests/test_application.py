@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.eventloop import call_from_executor
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.layout import Layout, HSplit, Window
+from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.layout.screen import Size
+from prompt_toolkit.lexers import SimpleLexer
+from prompt_toolkit.output import DummyOutput
+from prompt_toolkit.output.vt100 import Vt100_Output
+from prompt_toolkit.profiling import RenderProfiler
+from prompt_toolkit.widgets import RenderProfilerToolbar
+
+import io
+import threading
+import time
+
+
+def _run_app(app, func):
+    " Run the application while `func` is called in another thread. "
+    def thread():
+        try:
+            func()
+        finally:
+            call_from_executor(app.exit)
+
+    def pre_run():
+        threading.Thread(target=thread).start()
+
+    app.run(pre_run=pre_run)
+
+
+def test_max_fps_coalesces_invalidations():
+    app = Application(input=create_pipe_input(), output=DummyOutput(), max_fps=20)
+
+    def invalidate():
+        end = time.time() + .2
+        while time.time() < end:
+            app.invalidate()
+            time.sleep(.0001)
+
+    _run_app(app, invalidate)
+
+    # Five frames in .2 seconds, plus the first and last redraw.
+    assert 2 <= app.render_counter <= 8
+
+
+def test_idle_mode():
+    app = Application(input=create_pipe_input(), output=DummyOutput())
+    counters = []
+
+    def invalidate():
+        time.sleep(.05)
+        counters.append(app.render_counter)
+
+        app.idle = True
+        for i in range(100):
+            app.invalidate()
+        time.sleep(.05)
+        counters.append(app.render_counter)
+
+        # Leaving idle mode renders once.
+        app.idle = False
+        time.sleep(.05)
+        counters.append(app.render_counter)
+
+    _run_app(app, invalidate)
+
+    assert counters[1] == counters[0]
+    assert counters[2] == counters[0] + 1
+
+
+def test_render_profiler():
+    buff = Buffer()
+    buff.text = 'hello\nworld'
+    window = Window(BufferControl(buff, lexer=SimpleLexer('class:text')))
+    toolbar = RenderProfilerToolbar()
+
+    output = Vt100_Output(
+        io.StringIO(), lambda: Size(rows=10, columns=40), write_binary=False)
+    profiler = RenderProfiler()
+    app = Application(
+        layout=Layout(HSplit([window, toolbar])),
+        input=create_pipe_input(), output=output, render_profiler=profiler)
+
+    def invalidate():
+        time.sleep(.05)
+        app.invalidate()
+        time.sleep(.05)
+
+    _run_app(app, invalidate)
+
+    assert len(profiler.frames) == app.render_counter
+    frame = profiler.frames[0]
+    for category in ('layout', 'write_to_screen', 'create_content', 'lexing', 'diff', 'flush'):
+        assert frame.timings[category] > 0
+    assert window in frame.window_timings
+    assert frame.bytes_written > 0
+    assert output.bytes_written >= frame.bytes_written
+
+    # The toolbar displays the previous frame.
+    assert 'frame ' in output.stdout.getvalue()
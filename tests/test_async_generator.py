@@ -75,3 +75,31 @@ def test_generator_to_async_generator():
 
     # Check that `consume_async_generator` didn't fail.
     assert f.result() is None
+
+
+def test_batch_callback():
+    " Items are delivered in batches, every time the generator has to wait. "
+    def async_generator():
+        yield AsyncGeneratorItem(1)
+        yield AsyncGeneratorItem(2)
+        yield From(Future.succeed(None))
+        yield AsyncGeneratorItem(3)
+
+    batches = []
+    f = ensure_future(consume_async_generator(
+        async_generator(), lambda: False, batch_callback=batches.append))
+
+    get_event_loop().run_until_complete(f)
+    assert batches == [[1, 2], [3]]
+
+
+def test_generator_to_async_generator_batches():
+    " All items of a threaded generator are received, in batches. "
+    batches = []
+    f = ensure_future(consume_async_generator(
+        generator_to_async_generator(lambda: range(10000)), lambda: False,
+        batch_callback=batches.append))
+
+    get_event_loop().run_until_complete(f)
+    assert sum(batches, []) == list(range(10000))
+    assert len(batches) < 10000
@@ -5,9 +5,9 @@ from prompt_toolkit.buffer import Buffer
 import pytest
 
 
-@pytest.fixture
-def _buffer():
-    buff = Buffer()
+@pytest.fixture(params=[False, True], ids=['str', 'rope'])
+def _buffer(request):
+    buff = Buffer(use_rope=request.param)
     return buff
 
 
@@ -110,3 +110,98 @@ def test_swap_characters_before_cursor(_buffer):
     _buffer.swap_characters_before_cursor()
 
     assert _buffer.text == 'hello wrold'
+
+
+def test_undo_redo(_buffer):
+    _buffer.insert_text('hello')
+    _buffer.save_to_undo_stack()
+    _buffer.insert_text(' world')
+    _buffer.save_to_undo_stack()
+    _buffer.cursor_position = 0
+    _buffer.insert_text('> ')
+
+    _buffer.undo()
+    assert _buffer.text == 'hello world'
+    assert _buffer.cursor_position == len('hello world')
+
+    _buffer.undo()
+    assert _buffer.text == 'hello'
+
+    _buffer.redo()
+    assert _buffer.text == 'hello world'
+
+    _buffer.redo()
+    assert _buffer.text == '> hello world'
+    assert _buffer.cursor_position == len('> ')
+
+
+def test_undo_limits():
+    buff = Buffer(max_undo_entries=3)
+    for i in range(10):
+        buff.insert_text('%i\n' % i)
+        buff.save_to_undo_stack()
+
+    assert len(buff._undo_stack) == 3
+
+    # Only the differences are stored, except for the text on top. When
+    # appending text, the differences are empty.
+    buff = Buffer(max_undo_size=10000)
+    for i in range(100):
+        buff.insert_text('x' * 100)
+        buff.save_to_undo_stack()
+
+    assert len(buff._undo_stack) == 100
+    assert buff._undo_stack.size == 10000
+
+    # Replace the whole text every time: 100 characters per entry.
+    buff = Buffer(max_undo_size=5000)
+    for i in range(100):
+        buff.text = 'abcdefghij'[i % 10] * 100
+        buff.save_to_undo_stack()
+
+    assert len(buff._undo_stack) == 50
+    assert buff._undo_stack.size == 5000
+
+
+def test_undo_stack():
+    from prompt_toolkit.buffer import _UndoStack
+    import random
+
+    rnd = random.Random(0)
+    stack = _UndoStack()
+    expected = []
+    text = ''
+
+    for i in range(300):
+        if expected and rnd.random() < 0.3:
+            assert stack.pop() == expected.pop()
+        else:
+            pos = rnd.randint(0, len(text))
+            end = min(len(text), pos + rnd.randint(0, 5))
+            text = text[:pos] + rnd.choice(['', 'a', 'bc', '\n']) + text[end:]
+            stack.push(text, pos)
+            expected.append((text, pos))
+
+    while expected:
+        assert stack.pop() == expected.pop()
+    assert stack.size == 0
+
+
+def test_completions_delivered_in_batches():
+    from prompt_toolkit.completion import Completer, Completion
+
+    class ManyCompleter(Completer):
+        def get_completions(self, document, complete_event):
+            for i in range(5000):
+                yield Completion('word%i' % i, -len(document.text))
+
+    events = []
+    buff = Buffer(completer=ManyCompleter())
+    buff.on_completions_changed += lambda sender: events.append(
+        len(sender.complete_state.completions))
+
+    buff.insert_text('w')
+    buff.start_completion()
+
+    assert len(buff.complete_state.completions) == 5000
+    assert events == [5000]
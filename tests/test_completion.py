@@ -3,11 +3,13 @@ from __future__ import unicode_literals, absolute_import, print_function
 import os
 import shutil
 import tempfile
+import time
 
 from contextlib import contextmanager
 from six import text_type
 
-from prompt_toolkit.completion import CompleteEvent, PathCompleter, WordCompleter
+from prompt_toolkit.completion import CompleteEvent, PathCompleter, ExecutableCompleter, WordCompleter, FuzzyWordCompleter
+from prompt_toolkit.completion import filesystem
 from prompt_toolkit.document import Document
 
 
@@ -251,6 +253,133 @@ def test_pathcompleter_get_paths_constrains_path():
     shutil.rmtree(test_dir)
 
 
+def test_directory_cache():
+    test_dir = tempfile.mkdtemp()
+    write_test_files(test_dir, 'ab')
+
+    # Pretend that the directory was not modified recently.
+    mtime = time.time() - 10
+    os.utime(test_dir, (mtime, mtime))
+
+    listed = []
+
+    def list_directory(directory):
+        listed.append(directory)
+        return list_directory_orig(directory)
+
+    list_directory_orig = filesystem._list_directory
+    filesystem._list_directory = list_directory
+    try:
+        cache = filesystem._DirectoryCache()
+
+        assert sorted(cache.get_entries(test_dir)) == [('a', False), ('b', False)]
+        assert sorted(cache.get_entries(test_dir)) == [('a', False), ('b', False)]
+        assert len(listed) == 1
+
+        # Within the TTL, the directory is not checked.
+        write_test_files(test_dir, 'c')
+        os.utime(test_dir, (mtime + 1, mtime + 1))
+        assert len(cache.get_entries(test_dir, ttl=60)) == 2
+
+        # The modification time changed.
+        assert len(cache.get_entries(test_dir)) == 3
+        assert len(listed) == 2
+
+        # Recently modified directories are always listed again.
+        os.utime(test_dir, None)
+        cache.get_entries(test_dir)
+        cache.get_entries(test_dir)
+        assert len(listed) == 4
+    finally:
+        filesystem._list_directory = list_directory_orig
+
+    # cleanup
+    shutil.rmtree(test_dir)
+
+
+def test_directory_cache_max_size():
+    test_dir = tempfile.mkdtemp()
+    for name in 'ab':
+        os.mkdir(os.path.join(test_dir, name))
+        write_test_files(os.path.join(test_dir, name))
+
+    cache = filesystem._DirectoryCache(max_size=15)
+    cache.get_entries(test_dir)
+    cache.get_entries(os.path.join(test_dir, 'a'))
+    cache.get_entries(os.path.join(test_dir, 'b'))
+
+    # The least recently used listings were discarded.
+    assert list(cache._listings) == [os.path.join(test_dir, 'b')]
+    assert cache._size == 10
+
+    # cleanup
+    shutil.rmtree(test_dir)
+
+
+def test_executable_completer():
+    test_dir = tempfile.mkdtemp()
+    write_test_files(test_dir, ['my_program', 'my_data', 'other'])
+    os.chmod(os.path.join(test_dir, 'my_program'), 0o755)
+    os.chmod(os.path.join(test_dir, 'other'), 0o755)
+    os.mkdir(os.path.join(test_dir, 'my_dir'))
+
+    original_path = os.environ.get('PATH', '')
+    os.environ['PATH'] = test_dir
+    try:
+        completer = ExecutableCompleter()
+        completions = list(completer.get_completions(Document('my'), CompleteEvent()))
+        assert [c.text for c in completions] == ['_dir', '_program']
+        assert [c.display for c in completions] == ['my_dir/', 'my_program']
+
+        # Nothing typed.
+        assert list(completer.get_completions(Document(''), CompleteEvent())) == []
+
+        # When `$PATH` changes, the new directories are indexed.
+        other_dir = os.path.join(test_dir, 'my_dir')
+        write_test_files(other_dir, ['my_script'])
+        os.chmod(os.path.join(other_dir, 'my_script'), 0o755)
+        os.environ['PATH'] = os.pathsep.join([test_dir, other_dir])
+
+        completions = completer.get_completions(Document('my_'), CompleteEvent())
+        assert [c.text for c in completions] == ['dir', 'program', 'script']
+    finally:
+        os.environ['PATH'] = original_path
+
+    # cleanup
+    shutil.rmtree(test_dir)
+
+
+def test_executable_index_permission_changes():
+    test_dir = tempfile.mkdtemp()
+    write_test_files(test_dir, ['tool'])
+    filename = os.path.join(test_dir, 'tool')
+
+    # Pretend that the directory was not modified recently.
+    mtime = time.time() - 10
+    os.utime(test_dir, (mtime, mtime))
+
+    original_path = os.environ.get('PATH', '')
+    os.environ['PATH'] = test_dir
+    try:
+        index = filesystem._ExecutableIndex(refresh_interval=1000)
+        assert list(index.find('t')) == []
+
+        # `chmod` doesn't change the modification time of the directory, but
+        # the next refresh takes it into account.
+        os.chmod(filename, 0o755)
+        index.refresh().join()
+        assert list(index.find('t')) == [('tool', False)]
+
+        os.chmod(filename, 0o644)
+        index.refresh().join()
+        assert list(index.find('t')) == []
+    finally:
+        os.environ['PATH'] = original_path
+
+    # cleanup
+    shutil.rmtree(test_dir)
+
+
 def test_word_completer_static_word_list():
     completer = WordCompleter(['abc', 'def', 'aaa'])
 
@@ -314,3 +443,75 @@ def test_word_completer_dynamic_word_list():
     completions = completer.get_completions(Document('a'), CompleteEvent())
     assert [c.text for c in completions] == ['abc', 'aaa']
     assert called[0] == 2
+
+
+def test_fuzzy_word_completer():
+    completer = FuzzyWordCompleter(['user_name', 'username', 'users', 'order_number', 'Uname'])
+
+    # Best matches first: the shortest match, then the earliest match.
+    completions = list(completer.get_completions(Document('unm'), CompleteEvent()))
+    assert [c.text for c in completions] == ['Uname', 'username', 'user_name']
+    assert all(c.start_position == -3 for c in completions)
+
+    # Matching characters are highlighted.
+    assert completions[2].display == 'user_name'
+    assert completions[2].display_fragments == [
+        ('class:fuzzymatch.outside', ''),
+        ('class:fuzzymatch.inside.character', 'u'),
+        ('class:fuzzymatch.inside', 'ser_'),
+        ('class:fuzzymatch.inside.character', 'n'),
+        ('class:fuzzymatch.inside', 'a'),
+        ('class:fuzzymatch.inside.character', 'm'),
+        ('class:fuzzymatch.outside', 'e'),
+    ]
+
+    # Also after inserting the common part.
+    completion = completions[2].new_completion_from_position(2)
+    assert completion.text == 'name'
+    assert completion.display == 'user_name'
+    assert completion.display_fragments == completions[2].display_fragments
+
+    # Extending the pattern searches the previous results.
+    completions = completer.get_completions(Document('unme'), CompleteEvent())
+    assert [c.text for c in completions] == ['Uname', 'username', 'user_name']
+
+    completions = completer.get_completions(Document('odnb'), CompleteEvent())
+    assert [c.text for c in completions] == ['order_number']
+
+    # Nothing typed.
+    completions = completer.get_completions(Document(''), CompleteEvent())
+    assert len(list(completions)) == 5
+
+
+def test_fuzzy_word_completer_max_completions():
+    words = ['%s_%s' % (a, b) for a in ['get', 'set', 'target', 'reset']
+             for b in ['name', 'state', 'total', 'status', 'stage']]
+
+    def get_texts(completer, text):
+        completions = completer.get_completions(Document(text), CompleteEvent())
+        return [c.text for c in completions]
+
+    # Only the best matches are yielded.
+    for text in ['', 't', 'st', 'ets']:
+        all_texts = get_texts(FuzzyWordCompleter(words, max_completions=None), text)
+        assert len(all_texts) > 5
+        assert get_texts(FuzzyWordCompleter(words, max_completions=5), text) == all_texts[:5]
+
+
+def test_fuzzy_word_completer_case_sensitive():
+    completer = FuzzyWordCompleter(['user_name', 'Uname'], ignore_case=False)
+    completions = completer.get_completions(Document('un'), CompleteEvent())
+    assert [c.text for c in completions] == ['user_name']
+
+
+def test_fuzzy_word_completer_dynamic_word_list():
+    words = ['abc', 'def']
+    completer = FuzzyWordCompleter(lambda: words)
+
+    completions = completer.get_completions(Document('a'), CompleteEvent())
+    assert [c.text for c in completions] == ['abc']
+
+    # The index is created again when the list changes.
+    words = ['xyz', 'xaz']
+    completions = completer.get_completions(Document('a'), CompleteEvent())
+    assert [c.text for c in completions] == ['xaz']
@@ -78,3 +78,28 @@ def test_translate_index_to_position(document):
 def test_is_cursor_at_the_end(document):
     assert Document('hello', 5).is_cursor_at_the_end
     assert not Document('hello', 4).is_cursor_at_the_end
+
+
+def test_edit_document():
+    from prompt_toolkit.document import _edit_document
+    import random
+
+    rnd = random.Random(0)
+    document = Document('line 1\nline 2\n\nline 4')
+    document.lines  # Compute the lines. The edits derive them from here.
+
+    for i in range(200):
+        text = document.text
+        start = rnd.randint(0, len(text))
+        end = min(len(text), start + rnd.choice([0, 0, 1, 3, 10]))
+        data = rnd.choice(['', 'a', '\n', 'b\nc', 'def\n\n'])
+
+        new_document = _edit_document(document, start, end, data, start)
+        expected_text = text[:start] + data + text[end:]
+
+        assert new_document.text == expected_text
+        assert new_document._cache.lines == expected_text.split('\n')
+        assert new_document._line_start_indexes == \
+            Document(expected_text + ' ')._line_start_indexes  # (Not shared.)
+
+        document = new_document
@@ -0,0 +1,148 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.eventloop.executor import ThreadPoolExecutor, HIGH_PRIORITY, LOW_PRIORITY
+from prompt_toolkit.eventloop.posix import PosixEventLoop
+from prompt_toolkit.utils import is_windows
+
+import pytest
+import threading
+import time
+
+pytestmark = pytest.mark.skipif(is_windows(), reason='Posix event loop.')
+
+
+def test_call_later():
+    loop = PosixEventLoop()
+    f = loop.create_future()
+    calls = []
+
+    loop.call_later(.02, lambda: calls.append(2))
+    loop.call_later(.01, lambda: calls.append(1))
+    loop.call_later(.01, lambda: calls.append('cancelled')).cancel()
+    loop.call_later(.03, lambda: f.set_result(None))
+
+    start = time.time()
+    loop.run_until_complete(f)
+    loop.close()
+
+    assert calls == [1, 2]
+    assert time.time() - start >= .03
+
+
+def test_call_later_from_other_thread():
+    loop = PosixEventLoop()
+    f = loop.create_future()
+
+    # The loop is waiting without timeout, and has to wake up for the timer.
+    def schedule():
+        time.sleep(.01)
+        loop.call_later(0, lambda: f.set_result(threading.current_thread()))
+    threading.Thread(target=schedule).start()
+
+    loop.run_until_complete(f)
+    loop.close()
+
+    assert f.result() is threading.current_thread()
+
+
+def test_thread_pool_executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        release.wait()
+
+    # Occupy the worker, then queue callbacks with different priorities.
+    executor.submit(block)
+    started.wait()
+    futures = [
+        executor.submit(lambda: order.append('low'), priority=LOW_PRIORITY),
+        executor.submit(lambda: order.append('normal')),
+        executor.submit(lambda: order.append('low 2'), priority=LOW_PRIORITY),
+    ]
+    assert executor.worker_count == 1
+    assert executor.queue_depth == 3
+
+    # High priority callbacks don't wait for the blocked worker. (The
+    # additional worker continues with the queued callbacks.)
+    try:
+        executor.submit(lambda: order.append('high'), priority=HIGH_PRIORITY)
+        deadline = time.time() + 2
+        while not all(f.done() for f in futures) and time.time() < deadline:
+            time.sleep(.001)
+        assert all(f.done() for f in futures)
+        assert executor.worker_count == 2
+    finally:
+        release.set()
+
+    assert order == ['high', 'normal', 'low', 'low 2']
+    assert executor.max_queue_depth == 4
+    executor.shutdown()
+
+
+def test_thread_pool_executor_shutdown_at_exit():
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    done = []
+
+    # The worker is blocked by a daemon callback.
+    executor.submit(release.wait, daemon=True)
+    executor.submit(lambda: done.append(True))
+
+    try:
+        t = threading.Thread(target=executor._shutdown_at_exit)
+        t.daemon = True
+        t.start()
+        t.join(2)
+        assert not t.is_alive()
+        assert done == [True]
+
+        # Only the worker with the daemon callback is still running.
+        assert executor.worker_count == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_thread_pool_executor_daemon_callbacks():
+    executor = ThreadPoolExecutor(max_workers=2)
+    release = threading.Event()
+
+    def blocking_completer():
+        release.wait()
+        yield 'completion'
+
+    # Blocking daemon callbacks, like the threads that consume the generators
+    # of cancelled `ThreadedCompleter` completions, don't occupy the pool.
+    try:
+        for _ in range(4):
+            executor.submit(lambda: list(blocking_completer()), daemon=True)
+        f = executor.submit(lambda: threading.current_thread())
+
+        deadline = time.time() + 2
+        while not f.done() and time.time() < deadline:
+            time.sleep(.001)
+        assert f.done()
+        assert executor.queue_depth == 0
+        assert executor.worker_count == 5
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_run_in_executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = PosixEventLoop(executor=executor)
+
+    f = loop.run_in_executor(lambda: threading.current_thread())
+    loop.run_until_complete(f)
+    g = loop.run_in_executor(lambda: threading.current_thread())
+    loop.run_until_complete(g)
+    loop.close()
+
+    # The worker thread is reused.
+    assert f.result() is g.result() is not threading.current_thread()
+    assert executor.completed_count == 2
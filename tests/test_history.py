@@ -0,0 +1,314 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.history import History, FileHistory, IndexedFileHistory, InMemoryHistory
+from prompt_toolkit.search import SearchState, SearchDirection
+
+import gc
+import os
+import threading
+import weakref
+
+
+def _write_history(filename, strings):
+    history = FileHistory(filename)
+    for string in strings:
+        history.store_string(string)
+
+
+def _get_strings(history):
+    return list(history.get_strings())
+
+
+def test_indexed_file_history(tmpdir):
+    filename = str(tmpdir.join('history'))
+    _write_history(filename, ['hello', 'multi\nline\n+plus', '', 'h\xe9llo'])
+
+    history = IndexedFileHistory(filename)
+    assert _get_strings(history) == ['hello', 'multi\nline\n+plus', '', 'h\xe9llo']
+    assert list(history.load_history_strings()) == list(
+        FileHistory(filename).load_history_strings())
+    assert history.get_strings()[-1] == 'h\xe9llo'
+    assert os.path.exists(filename + '.index')
+
+    history.append_string('new')
+    assert _get_strings(history) == ['hello', 'multi\nline\n+plus', '', 'h\xe9llo', 'new']
+
+
+def test_indexed_file_history_reuses_index(tmpdir):
+    filename = str(tmpdir.join('history'))
+    _write_history(filename, ['a', 'b'])
+    assert _get_strings(IndexedFileHistory(filename)) == ['a', 'b']
+
+    # Appending to the file: only the tail is indexed again.
+    _write_history(filename, ['c'])
+    assert _get_strings(IndexedFileHistory(filename)) == ['a', 'b', 'c']
+
+    # Replacing the file invalidates the index.
+    os.remove(filename)
+    _write_history(filename, ['x'])
+    assert _get_strings(IndexedFileHistory(filename)) == ['x']
+
+    # A corrupt index is ignored.
+    with open(filename + '.index', 'wb') as f:
+        f.write(b'corrupt')
+    assert _get_strings(IndexedFileHistory(filename)) == ['x']
+
+
+def test_indexed_file_history_missing_file(tmpdir):
+    history = IndexedFileHistory(str(tmpdir.join('history')))
+    assert _get_strings(history) == []
+
+
+def test_indexed_file_history_truncated_by_someone_else(tmpdir):
+    filename = str(tmpdir.join('history'))
+    _write_history(filename, ['a' * 100, 'b' * 100])
+    history = IndexedFileHistory(filename)
+    strings = history.get_strings()
+
+    with open(filename, 'wb'):
+        pass
+
+    # The entries are gone, but reading them doesn't crash.
+    assert list(strings) == ['', '']
+
+
+def test_indexed_file_history_compact(tmpdir):
+    filename = str(tmpdir.join('history'))
+    history = IndexedFileHistory(filename, max_size=300)
+    history.store_string('first')
+    strings = history.get_strings()
+
+    # Compacting replaces the file. The loaded strings remain available.
+    for i in range(20):
+        history.append_string('entry %i' % i)
+
+    assert strings[0] == 'first'
+    assert list(strings) == ['first'] + ['entry %i' % i for i in range(20)]
+    assert history._loaded_strings._entries._fd is None
+
+    strings = _get_strings(IndexedFileHistory(filename))
+    assert 0 < len(strings) < 20
+    assert strings[-1] == 'entry 19'
+
+
+def test_buffer_with_indexed_file_history(tmpdir):
+    filename = str(tmpdir.join('history'))
+    _write_history(filename, ['first', 'second', 'third'])
+    history = IndexedFileHistory(filename)
+
+    buff = Buffer(history=history)
+    buff.history_backward()
+    assert buff.text == 'third'
+
+    # Editing entries doesn't modify the history.
+    buff.text = 'changed'
+    buff.history_backward(count=2)
+    assert buff.text == 'first'
+    buff.history_forward(count=2)
+    assert buff.text == 'changed'
+    assert _get_strings(history) == ['first', 'second', 'third']
+
+    buff.reset(append_to_history=True)
+    buff.history_backward()
+    assert buff.text == 'changed'
+
+
+def _create_history(strings):
+    history = InMemoryHistory()
+    for string in strings:
+        history.append_string(string)
+    return history
+
+
+def test_find_matches():
+    history = _create_history(['git status', 'ls -la', 'git commit', 'echo Git'])
+
+    def find(text, **kw):
+        return list(history.find_matches(text, **kw))
+
+    assert find('git', prefix=True) == [0, 2]
+    assert find('g', prefix=True) == [0, 2]
+    assert find('Git') == [3]
+    assert find('git', ignore_case=True) == [0, 2, 3]
+    assert find('t', backward=True) == [3, 2, 0]
+    assert find('t', start=1, stop=3) == [2]
+    assert find('xyz') == []
+    assert find('', backward=True) == [3, 2, 1, 0]
+
+    # Appended strings are indexed too.
+    history.append_string('git push')
+    assert find('git', prefix=True) == [0, 2, 4]
+
+
+def test_find_line_with_prefix():
+    history = _create_history(['git status', 'if x:\n    git add', 'ls'])
+
+    assert history.find_line_with_prefix('git') == 'git status'
+    assert history.find_line_with_prefix('    g') == '    git add'
+    assert history.find_line_with_prefix('l') == 'ls'
+    assert history.find_line_with_prefix('xyz') is None
+
+    history.append_string('git push\ngit pull')
+    assert history.find_line_with_prefix('git') == 'git pull'
+    assert history.find_line_with_prefix('git pu') == 'git pull'
+    assert history.find_line_with_prefix('git push') == 'git push'
+
+
+def test_find_line_with_prefix_like_splitlines():
+    history = _create_history(['a1\r\na2', 'b1\rb2\u2028b3', 'c1\n', ''])
+
+    # Every line matches the empty prefix. (Like for `splitlines`, a final
+    # line break doesn't start a new line, and empty strings have no lines.)
+    assert history.find_line_with_prefix('') == 'c1'
+    assert history.find_line_with_prefix('a') == 'a2'
+    assert history.find_line_with_prefix('b1') == 'b1'
+    assert history.find_line_with_prefix('b') == 'b3'
+    assert history.find_line_with_prefix('b1\r') is None
+
+    history.append_string('d1\rd2')
+    assert history.find_line_with_prefix('d') == 'd2'
+    assert history.find_line_with_prefix('') == 'd2'
+
+    assert _create_history([]).find_line_with_prefix('') is None
+
+
+def test_history_subclass_without_init():
+    class CustomHistory(History):
+        def __init__(self):
+            pass  # Doesn't call `History.__init__`.
+
+        def get_strings(self):
+            return ['git status', 'ls']
+
+        def load_history_strings(self):
+            return []
+
+        def store_string(self, string):
+            pass
+
+    history = CustomHistory()
+    assert history.find_line_with_prefix('g') == 'git status'
+    assert list(history.find_matches('s')) == [0, 1]
+
+
+def test_auto_suggest_from_history():
+    from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+    from prompt_toolkit.document import Document
+
+    history = _create_history(['git status', 'git commit', 'ls'])
+    buff = Buffer(history=history)
+    auto_suggest = AutoSuggestFromHistory()
+
+    def suggest(text):
+        suggestion = auto_suggest.get_suggestion(buff, Document(text))
+        return suggestion and suggestion.text
+
+    assert suggest('g') == 'it commit'
+    assert suggest('git') == ' commit'
+    assert suggest('git s') == 'tatus'
+    assert suggest('git x') is None
+    assert suggest('git xy') is None
+    assert suggest('') is None
+    assert suggest('abc\nl') == 's'
+
+    # New history entries are taken into account.
+    history.append_string('git xyz')
+    assert suggest('git xy') == 'z'
+    assert suggest('git') == ' xyz'
+
+
+def test_history_search_in_buffer():
+    history = _create_history(['git status', 'ls -la', 'git commit', 'echo'])
+    buff = Buffer(history=history, enable_history_search=True)
+
+    buff.insert_text('git')
+    buff.history_backward()
+    assert buff.text == 'git commit'
+    buff.history_backward()
+    assert buff.text == 'git status'
+    buff.history_forward()
+    assert buff.text == 'git commit'
+
+    # Edited entries are matched against their new text.
+    buff.text = 'changed'
+    buff.history_search_text = 'git'
+    buff.history_backward()
+    assert buff.text == 'git status'
+    buff.history_forward()
+    assert buff.text == 'git'
+
+
+def test_incremental_search_in_history():
+    history = _create_history(['git status', 'ls -la', 'git commit', 'echo'])
+    buff = Buffer(history=history)
+
+    state = SearchState('status', direction=SearchDirection.BACKWARD)
+    assert buff.document_for_search(state).text == 'git status'
+
+    state = SearchState('LS', direction=SearchDirection.BACKWARD, ignore_case=True)
+    assert buff.document_for_search(state).text == 'ls -la'
+
+    state = SearchState('missing', direction=SearchDirection.BACKWARD)
+    assert buff.document_for_search(state).text == ''
+
+    # Wrapping around to the first entry.
+    state = SearchState('status', direction=SearchDirection.FORWARD)
+    assert buff.document_for_search(state).text == 'git status'
+    state = SearchState('commit', direction=SearchDirection.FORWARD)
+    assert buff.document_for_search(state).text == ''
+
+
+def test_file_history_write_in_background(tmpdir):
+    filename = str(tmpdir.join('history'))
+    history = FileHistory(filename, write_in_background=True, fsync=True)
+    for string in ['a', 'b\nc', 'd']:
+        history.store_string(string)
+    writer_thread = history._writer_thread
+    history.flush()
+
+    assert list(FileHistory(filename).load_history_strings()) == ['d', 'b\nc', 'a']
+
+    # The thread stops when everything is written, and doesn't keep the
+    # history alive. (`flush` can return just before the thread exits.)
+    assert history._writer_thread is None
+    if writer_thread is not None:
+        writer_thread.join()
+    ref = weakref.ref(history)
+    del history
+    gc.collect()
+    assert ref() is None
+
+
+def test_file_history_write_undecodable_string(tmpdir):
+    filename = str(tmpdir.join('history'))
+    history = FileHistory(filename, write_in_background=True)
+    history.append_string('bad \udcff byte')
+
+    t = threading.Thread(target=history.flush)
+    t.daemon = True
+    t.start()
+    t.join(2)
+    assert not t.is_alive()
+
+    expected = 'bad \udcff byte'.encode('utf-8', 'replace').decode('utf-8')
+    assert list(FileHistory(filename).load_history_strings()) == [expected]
+
+
+def test_file_history_deduplicate_and_compact(tmpdir):
+    filename = str(tmpdir.join('history'))
+    history = FileHistory(filename, deduplicate=True)
+    for string in ['a', 'a', 'b', 'a']:
+        history.store_string(string)
+
+    assert list(FileHistory(filename).load_history_strings()) == ['a', 'b', 'a']
+
+    # When the file grows too big, only the newest unique entries are kept.
+    history = FileHistory(filename, deduplicate=True, max_size=300)
+    for i in range(20):
+        history.store_string('entry %i' % i)
+
+    strings = list(FileHistory(filename).load_history_strings())
+    assert os.path.getsize(filename) <= 300
+    assert strings[0] == 'entry 19'
+    assert strings == ['entry %i' % i for i in range(19, 19 - len(strings), -1)]
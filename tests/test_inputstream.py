@@ -140,3 +140,30 @@ def test_cpr_response_2(processor, stream):
     assert len(processor.keys) == 2
     assert processor.keys[0].key == Keys.CPRResponse
     assert processor.keys[1].key == Keys.ControlJ
+
+
+def test_plain_text_runs(processor, stream):
+    # Runs of plain text around escape sequences.
+    stream.feed('abc\x1b[Adef\x01g')
+
+    assert [k.key for k in processor.keys] == [
+        'a', 'b', 'c', Keys.Up, 'd', 'e', 'f', Keys.ControlA, 'g']
+    assert [k.data for k in processor.keys] == [
+        'a', 'b', 'c', '\x1b[A', 'd', 'e', 'f', '\x01', 'g']
+
+
+def test_plain_text_after_partial_sequence(processor, stream):
+    # Plain text following a buffered prefix has to go through the parser.
+    stream.feed('\x1b')
+    stream.feed('OAb')
+
+    assert len(processor.keys) == 2
+    assert processor.keys[0].key == Keys.Up
+    assert processor.keys[1].key == 'b'
+
+
+def test_bracketed_paste_after_plain_text(processor, stream):
+    stream.feed('ab\x1b[200~hello\x1b[201~c')
+
+    assert [k.key for k in processor.keys] == ['a', 'b', Keys.BracketedPaste, 'c']
+    assert processor.keys[2].data == 'hello'
@@ -182,3 +182,112 @@ def test_previous_key_sequence(processor):
         assert events[1].previous_key_sequence[0].data == 'a'
         assert events[1].previous_key_sequence[1].key == 'a'
         assert events[1].previous_key_sequence[1].data == 'a'
+
+
+def test_get_bindings_with_any(handlers):
+    bindings = KeyBindings()
+    bindings.add(Keys.Any, 'b')(handlers.any_b)
+    bindings.add('a', 'b')(handlers.a_b)
+    bindings.add('a', Keys.Any)(handlers.a_any)
+    bindings.add('a', 'b', 'c')(handlers.a_b_c)
+
+    # Bindings with more `Any` keys come first. (The last binding wins.)
+    # Otherwise, the order is kept.
+    assert [b.keys for b in bindings.get_bindings_for_keys(('a', 'b'))] == [
+        (Keys.Any, 'b'), ('a', Keys.Any), ('a', 'b')]
+    assert [b.keys for b in bindings.get_bindings_for_keys(('x', 'b'))] == [
+        (Keys.Any, 'b')]
+    assert bindings.get_bindings_for_keys(('x', 'x')) == []
+
+    assert [b.keys for b in bindings.get_bindings_starting_with_keys(('a', ))] == [
+        (Keys.Any, 'b'), ('a', 'b'), ('a', Keys.Any), ('a', 'b', 'c')]
+    assert [b.keys for b in bindings.get_bindings_starting_with_keys(('a', 'b'))] == [
+        ('a', 'b', 'c')]
+
+    # Adding bindings invalidates the index.
+    bindings.add('x', 'x')(handlers.x_x)
+    assert [b.keys for b in bindings.get_bindings_for_keys(('x', 'x'))] == [('x', 'x')]
+
+
+def test_self_insert_run():
+    """
+    A run of self-inserting key presses is inserted at once.
+    """
+    from prompt_toolkit.buffer import Buffer
+    from prompt_toolkit.key_binding.bindings.basic import load_basic_bindings
+    from prompt_toolkit.layout.controls import BufferControl
+
+    buff = Buffer()
+    changes = []
+    buff.on_text_changed += lambda sender: changes.append(sender.text)
+
+    app = Application(
+        layout=Layout(Window(BufferControl(buff))),
+        output=DummyOutput(), input=create_pipe_input())
+
+    with set_app(app):
+        processor = KeyProcessor(load_basic_bindings(), batch_self_insert=True)
+        processor.feed_multiple([KeyPress(c) for c in 'hello'])
+        processor.feed(KeyPress(Keys.Left))
+        processor.feed_multiple([KeyPress(c) for c in 'ab'])
+        processor.process_keys()
+
+        assert buff.text == 'hellabo'
+        assert changes == ['hello', 'hellabo']
+
+        # One undo entry for the whole run.
+        buff.undo()
+        assert buff.text == 'hello'
+
+
+def test_self_insert_without_batching():
+    """
+    By default, every key press is handled separately.
+    """
+    from prompt_toolkit.buffer import Buffer
+    from prompt_toolkit.key_binding.bindings.basic import load_basic_bindings
+    from prompt_toolkit.layout.controls import BufferControl
+
+    buff = Buffer()
+    changes = []
+    buff.on_text_changed += lambda sender: changes.append(sender.text)
+
+    app = Application(
+        layout=Layout(Window(BufferControl(buff))),
+        output=DummyOutput(), input=create_pipe_input())
+
+    with set_app(app):
+        processor = KeyProcessor(load_basic_bindings())
+        key_presses = []
+        processor.before_key_press += lambda sender: key_presses.append(buff.text)
+
+        processor.feed_multiple([KeyPress(c) for c in 'abc'])
+        processor.process_keys()
+
+        assert changes == ['a', 'ab', 'abc']
+        assert key_presses == ['', 'a', 'ab']
+
+
+def test_self_insert_run_stops_at_other_bindings(handlers):
+    from prompt_toolkit.buffer import Buffer
+    from prompt_toolkit.key_binding.bindings.basic import load_basic_bindings
+    from prompt_toolkit.key_binding.key_bindings import merge_key_bindings
+    from prompt_toolkit.layout.controls import BufferControl
+
+    buff = Buffer()
+    bindings = KeyBindings()
+    bindings.add('x', 'y')(handlers.x_y)
+    bindings.add('z')(handlers.z)
+
+    app = Application(
+        layout=Layout(Window(BufferControl(buff))),
+        output=DummyOutput(), input=create_pipe_input())
+
+    with set_app(app):
+        processor = KeyProcessor(merge_key_bindings([load_basic_bindings(), bindings]),
+                                 batch_self_insert=True)
+        processor.feed_multiple([KeyPress(c) for c in 'abxyczd'])
+        processor.process_keys()
+
+        assert buff.text == 'abcd'
+        assert handlers.called == ['x_y', 'z']
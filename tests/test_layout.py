@@ -1,8 +1,11 @@
 from __future__ import unicode_literals
 
+from prompt_toolkit.application import Application
+from prompt_toolkit.input.defaults import create_pipe_input
 from prompt_toolkit.layout import Layout, InvalidLayoutError
 from prompt_toolkit.layout.containers import HSplit, VSplit, Window
-from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+from prompt_toolkit.output import DummyOutput
 import pytest
 
 
@@ -56,3 +59,79 @@ def test_layout_class():
 def test_create_invalid_layout():
     with pytest.raises(InvalidLayoutError):
         Layout(HSplit([]))
+
+
+def test_cache_rendering():
+    text = ['hello']
+    static = Window(FormattedTextControl(lambda: text[0]), cache_rendering=True)
+    focused = Window(BufferControl())
+
+    app = Application(layout=Layout(HSplit([static, focused]), focused_element=focused),
+                      input=create_pipe_input(), output=DummyOutput())
+    app._is_running = True
+
+    def render():
+        app._redraw()
+        screen = app.renderer.last_rendered_screen
+        return ''.join(screen.data_buffer[0][x].char for x in range(5))
+
+    copied = []
+    original_copy_body = static._copy_body
+
+    def copy_body(*a, **kw):
+        copied.append(True)
+        return original_copy_body(*a, **kw)
+    static._copy_body = copy_body
+
+    assert render() == 'hello'
+    assert len(copied) == 1
+
+    # Nothing changed: output is copied from the previous rendering.
+    assert render() == 'hello'
+    assert len(copied) == 1
+
+    # Content changed: render again.
+    text[0] = 'world'
+    assert render() == 'world'
+    assert len(copied) == 2
+
+
+def test_render_single_window():
+    text = ['hello']
+    other_calls = []
+
+    def get_other_text():
+        other_calls.append(True)
+        return 'other'
+
+    progress = Window(FormattedTextControl(lambda: text[0]))
+    other = Window(FormattedTextControl(get_other_text))
+    focused = Window(BufferControl())
+
+    app = Application(layout=Layout(HSplit([progress, other, focused]), focused_element=focused),
+                      input=create_pipe_input(), output=DummyOutput())
+    app._is_running = True
+
+    def get_line(y):
+        screen = app.renderer.last_rendered_screen
+        return ''.join(screen.data_buffer[y][x].char for x in range(5))
+
+    app._redraw()
+    assert get_line(0) == 'hello'
+    assert get_line(1) == 'other'
+    del other_calls[:]
+
+    # Only the progress window is rendered again.
+    text[0] = 'world'
+    app._redraw(windows=[progress])
+    assert get_line(0) == 'world'
+    assert get_line(1) == 'other'
+    assert other_calls == []
+
+    # When the dimensions change, everything is rendered again.
+    text[0] = 'a\nb'
+    app._redraw(windows=[progress])
+    assert get_line(0) == 'a    '
+    assert get_line(1) == 'b    '
+    assert get_line(2) == 'other'
+    assert other_calls
@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.document import Document
+from prompt_toolkit.eventloop import get_event_loop, run_in_executor
+from prompt_toolkit.lexers import PygmentsLexer, SimpleLexer, ThreadedLexer
+
+import pytest
+import random
+import time
+
+
+def _lex(lexer, text, rows=None):
+    get_line = lexer.lex_document(Document(text))
+    if rows is None:
+        rows = range(len(text.split('\n')))
+    return [[f for f in get_line(i) if f[1]] for i in rows]
+
+
+def test_incremental_pygments_lexer():
+    PythonLexer = pytest.importorskip('pygments.lexers').PythonLexer
+
+    lexer = PygmentsLexer(PythonLexer, incremental=True)
+    reference = PygmentsLexer(PythonLexer, sync_from_start=True)
+
+    text = '\n'.join(['def f(a):', '    """', '    doc', '    """', '    return a'] * 20)
+    edits = [
+        (30, '"""'),   # Opens a string: everything after it changes.
+        (30, ''),
+        (60, 'x = 1\n'),
+        (0, '# comment\n'),
+    ]
+
+    for position, insert in edits:
+        text = text[:position] + insert + text[position + (0 if insert else 3):]
+        assert _lex(lexer, text) == _lex(reference, text)
+
+
+def test_incremental_lexing_reuses_previous_result():
+    PythonLexer = pytest.importorskip('pygments.lexers').PythonLexer
+
+    lexer = PygmentsLexer(PythonLexer, incremental=True)
+    text = '\n'.join('x = %i' % i for i in range(1000))
+
+    lexer.lex_document(Document(text))(999)
+
+    # After a small change, only the changed line is lexed again.
+    get_line = lexer.lex_document(Document('y' + text[1:]))
+    assert get_line(0)[0] == ('class:pygments.name', 'y')
+    assert lexer._last_lexed_document.valid_count == 1000
+
+
+@pytest.mark.parametrize('lexer_name, snippets', [
+    ('PythonLexer', ['"""', "'''", '#', '"', "'", '\n', '\\\n', ' ', '(',
+                     'def f(x):\n', '    return 1\n', 'u"""doc"""']),
+    ('HtmlLexer', ['<!--', '-->', '<script>', '</script>', '<a href="x">',
+                   '"', '\n', ' ', '>', '<!DOCTYPE html>', 'var x = 1;']),
+])
+def test_incremental_lexing_after_random_edits(lexer_name, snippets):
+    # The lines before and after an edit depend on each other in many ways.
+    # (Tokens or failed matches that span several lines.)
+    lexer_cls = getattr(pytest.importorskip('pygments.lexers'), lexer_name)
+
+    for seed in range(40):
+        rnd = random.Random(seed)
+        lexer = PygmentsLexer(lexer_cls, incremental=True)
+        reference = PygmentsLexer(lexer_cls, sync_from_start=True)
+        text = ''.join(rnd.choice(snippets) for _ in range(30))
+
+        for _ in range(15):
+            start = rnd.randint(0, len(text))
+            end = min(len(text), start + rnd.choice([0, 0, 1, 5]))
+            text = text[:start] + rnd.choice(snippets + ['']) + text[end:]
+
+            # Sometimes, only some of the lines are displayed.
+            line_count = len(text.split('\n'))
+            rows = sorted(rnd.sample(range(line_count), rnd.randint(0, line_count)))
+            rows = rnd.choice([rows, None])
+
+            assert _lex(lexer, text, rows) == _lex(reference, text, rows), (seed, text)
+
+
+def _wait_for(func):
+    " Run the event loop (which starts the background threads) until `func()`. "
+    loop = get_event_loop()
+    for _ in range(200):
+        if func():
+            return True
+        loop.run_until_complete(run_in_executor(lambda: time.sleep(.01)))
+    return False
+
+
+def test_threaded_lexer():
+    lexer = ThreadedLexer(SimpleLexer('class:lexed'))
+
+    # Lines are displayed without style, until they are lexed.
+    get_line = lexer.lex_document(Document('a\nb'))
+    assert get_line(0) == [('', 'a')]
+    assert _wait_for(lambda: get_line(0) == [('class:lexed', 'a')])
+    assert get_line(5) == []
+
+    # Unchanged lines of the previous document are used, while lexing.
+    get_line = lexer.lex_document(Document('new\na\nb'))
+    assert get_line(0) == [('', 'new')]
+    assert get_line(1) == [('class:lexed', 'a')]
+    assert _wait_for(lambda: get_line(0) == [('class:lexed', 'new')])
@@ -0,0 +1,101 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.buffer import Buffer, CompletionState
+from prompt_toolkit.completion import Completion
+from prompt_toolkit.document import Document
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.layout import Window, Layout
+from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.layout.menus import CompletionsMenuControl, MultiColumnCompletionMenuControl
+from prompt_toolkit.layout.screen import Point
+from prompt_toolkit.mouse_events import MouseEvent, MouseEventType
+from prompt_toolkit.output import DummyOutput
+
+import pytest
+
+
+@pytest.fixture
+def buff():
+    return Buffer()
+
+
+@pytest.fixture
+def app(buff):
+    app = Application(
+        layout=Layout(Window(BufferControl(buff))),
+        output=DummyOutput(), input=create_pipe_input())
+
+    with set_app(app):
+        yield app
+
+
+def _text(fragments):
+    return ''.join(text for _, text in fragments)
+
+
+def test_menu_widths_are_updated_incrementally(app, buff):
+    completions = [Completion('a' * 10)]
+    buff.complete_state = CompletionState(Document(), completions)
+
+    control = CompletionsMenuControl()
+    assert control.preferred_width(100) == 12
+    assert not control._show_meta(buff.complete_state)
+
+    # Completions arriving later are taken into account.
+    completions.append(Completion('b', display_meta='m' * 5))
+    assert control.preferred_width(100) == 12 + 7
+    assert control._show_meta(buff.complete_state)
+
+    # Removing completions starts over.
+    del completions[:]
+    completions.append(Completion('c'))
+    assert control.preferred_width(100) == CompletionsMenuControl.MIN_WIDTH
+    assert not control._show_meta(buff.complete_state)
+
+
+def test_multi_column_menu_renders_visible_columns(app, buff):
+    completions = [Completion('%05i' % i) for i in range(100000)]
+    buff.complete_state = CompletionState(Document(), completions, complete_index=20)
+
+    control = MultiColumnCompletionMenuControl()
+    content = control.create_content(width=23, height=10)
+
+    # Three visible columns of width 6.
+    assert content.line_count == 10
+    assert _text(content.get_line(0)) == ' 00000 00010 00020  '
+    assert _text(content.get_line(5)) == ' 00005 00015 00025 >'
+    assert control._total_columns == 10000
+
+    # Scroll to the selected completion.
+    buff.complete_state.go_to_index(99999)
+    content = control.create_content(width=23, height=10)
+    assert control.scroll == 9997
+    assert _text(content.get_line(5)) == '< 99975 99985 99995 '
+    assert _text(content.get_line(9)) == '  99979 99989 99999 '
+
+    # Clicking selects the completion below the mouse.
+    buff.complete_state.go_to_index(None)
+    control.scroll = 0
+    content = control.create_content(width=23, height=10)
+    control.mouse_handler(MouseEvent(Point(x=8, y=3), MouseEventType.MOUSE_UP))
+    assert buff.text == '00013'
+
+
+def test_menu_with_formatted_display(app, buff):
+    completions = [
+        Completion('abc', display=[('class:a', 'a'), ('', 'bc')]),
+        Completion('long_completion', display=[('class:a', 'long'), ('', '_completion')]),
+    ]
+    buff.complete_state = CompletionState(Document(), completions)
+
+    control = CompletionsMenuControl()
+    content = control.create_content(width=10, height=2)
+
+    assert completions[0].display == 'abc'
+    assert _text(content.get_line(0)) == ' abc      '
+    assert any('class:a' in style for style, text in content.get_line(0) if text == 'a')
+
+    # Trimmed.
+    assert _text(content.get_line(1)) == ' long_... '
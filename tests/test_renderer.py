@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.layout.screen import Screen, Size, Point, WritePosition, _CHAR_CACHE
+from prompt_toolkit.output import DummyOutput
+from prompt_toolkit.renderer import _output_screen_diff, _StyleStringToAttrsCache
+from prompt_toolkit.styles import Style, DummyStyleTransformation
+
+
+class _RecordingOutput(DummyOutput):
+    " Output that remembers all the text that was written. "
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def erase_characters(self, amount):
+        self.written.append('<erase %i>' % amount)
+
+
+def _create_screen(lines, style=''):
+    screen = Screen()
+    for y, line in enumerate(lines):
+        for x, c in enumerate(line):
+            screen.data_buffer[y][x] = _CHAR_CACHE[c, style]
+    screen.height = len(lines)
+    return screen
+
+
+def _diff(previous_screen, screen, size=Size(rows=10, columns=40)):
+    output = _RecordingOutput()
+    attrs = _StyleStringToAttrsCache(
+        Style([]).get_attrs_for_style_str, DummyStyleTransformation())
+
+    app = Application(input=create_pipe_input(), output=output)
+
+    _output_screen_diff(
+        app, output, screen, Point(x=0, y=0),
+        color_depth=None, previous_screen=previous_screen,
+        attrs_for_style_string=attrs, size=size, previous_width=size.columns)
+
+    return output.written
+
+
+def test_unchanged_screen_writes_nothing():
+    previous = _create_screen(['hello', 'world'])
+    screen = _create_screen(['hello', 'world'])
+
+    assert _diff(previous, screen) == []
+
+
+def test_only_changed_rows_are_written():
+    previous = _create_screen(['hello', 'world', 'abc'])
+    screen = _create_screen(['hello', 'there', 'abc'])
+
+    output = ''.join(_diff(previous, screen))
+    assert 'there' in output
+    assert 'hello' not in output
+    assert 'abc' not in output
+
+
+def test_changed_cells_are_written_as_one_run():
+    previous = _create_screen(['hello world'])
+    screen = _create_screen(['hello there'])
+
+    assert _diff(previous, screen) == ['there']
+
+
+def test_long_blank_runs_are_erased():
+    previous = _create_screen(['x' * 30])
+    screen = _create_screen(['x' + ' ' * 28 + 'x'])
+
+    assert _diff(previous, screen) == ['<erase 28>']
+
+
+def test_fill_area_restyles_every_cell():
+    screen = _create_screen(['ab', 'cd'], style='class:a')
+    screen.fill_area(WritePosition(0, 0, 2, 1), style='class:b')
+
+    assert screen.data_buffer[0][0].style == 'class:b class:a'
+    assert screen.data_buffer[0][1].style == 'class:b class:a'
+    assert screen.data_buffer[1][0].style == 'class:a'
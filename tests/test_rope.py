@@ -0,0 +1,83 @@
+from __future__ import unicode_literals
+
+from prompt_toolkit.document import Document
+from prompt_toolkit.rope import Rope
+
+import random
+
+
+def _check(rope, text):
+    assert len(rope) == len(text)
+    assert rope.text == text
+    assert rope.line_count == text.count('\n') + 1
+
+    lines = text.split('\n')
+    for row, line in enumerate(lines):
+        assert rope.get_line(row) == line
+
+    for index in range(len(text) + 1):
+        assert rope.row_of_index(index) == text.count('\n', 0, index)
+
+
+def test_small():
+    rope = Rope('hello\nworld')
+    _check(rope, 'hello\nworld')
+
+    _check(rope.insert(5, '!'), 'hello!\nworld')
+    _check(rope.delete(3, 8), 'helrld')
+    _check(rope.replace(0, 5, 'bye'), 'bye\nworld')
+    _check(rope, 'hello\nworld')  # Not modified.
+
+
+def test_big_text():
+    text = '\n'.join('line %i' % i for i in range(3000))
+    rope = Rope(text)
+    _check(rope, text)
+
+    assert rope.get_text(100, 200) == text[100:200]
+    assert rope.char_at(5000) == text[5000]
+
+
+def test_random_edits():
+    rnd = random.Random(0)
+    text = ''
+    rope = Rope()
+
+    for i in range(500):
+        pos = rnd.randint(0, len(text))
+
+        if rnd.random() < 0.7:
+            data = rnd.choice(['a', 'bc\n', '\n', 'x' * 100, 'yz\n' * 500])
+            text = text[:pos] + data + text[pos:]
+            rope = rope.insert(pos, data)
+        else:
+            end = pos + rnd.randint(0, 1000)
+            text = text[:pos] + text[end:]
+            rope = rope.delete(pos, end)
+
+    _check(rope, text)
+
+
+def test_document_from_rope():
+    text = 'abc\ndef\n\nghij'
+    document = Document(Rope(text), cursor_position=6)
+    expected = Document(text, cursor_position=6)
+
+    assert document.lines[:] == expected.lines[:]
+    assert list(document.lines) == list(expected.lines)
+    assert document.line_count == expected.line_count
+    assert document.current_line == expected.current_line
+    assert document.current_char == expected.current_char
+    assert document.cursor_position_row == expected.cursor_position_row
+    assert document.cursor_position_col == expected.cursor_position_col
+
+    for index in range(len(text) + 1):
+        assert (document.translate_index_to_position(index) ==
+                expected.translate_index_to_position(index))
+
+    for row in range(-1, 6):
+        for col in range(-1, 6):
+            assert (document.translate_row_col_to_index(row, col) ==
+                    expected.translate_row_col_to_index(row, col))
+
+    assert document.text == text
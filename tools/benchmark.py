@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the rendering and input pipelines.
+
+Everything runs headless: the applications read from a pipe input and
+render to a `Vt100_Output` that discards the output. The terminal size is
+fixed, so the results are reproducible.
+
+For every benchmark, this reports the time per operation (the best of a
+few repetitions) and, on Python 3, the peak memory that was allocated while
+running the operations.
+
+Usage::
+
+    python tools/benchmark.py                   # Run all benchmarks.
+    python tools/benchmark.py typing paste      # Run only these.
+    python tools/benchmark.py --list            # List the benchmarks.
+    python tools/benchmark.py --save before.json
+    python tools/benchmark.py --compare before.json
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import gc
+import json
+import sys
+import threading
+import time
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.completion import CompleteEvent, Completion, FuzzyWordCompleter
+from prompt_toolkit.document import Document
+from prompt_toolkit.eventloop import call_from_executor
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.input.vt100_parser import Vt100Parser
+from prompt_toolkit.key_binding.key_processor import KeyPress
+from prompt_toolkit.layout import Layout, HSplit, VSplit, Window, FloatContainer, Float
+from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+from prompt_toolkit.layout.menus import CompletionsMenu
+from prompt_toolkit.layout.screen import Screen, Size, Point, _CHAR_CACHE
+from prompt_toolkit.output import ColorDepth
+from prompt_toolkit.output.vt100 import Vt100_Output
+from prompt_toolkit.renderer import _output_screen_diff, _StyleStringToAttrsCache
+from prompt_toolkit.styles import Style, DummyStyleTransformation
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # Python 2.
+
+_time = getattr(time, 'perf_counter', time.time)
+
+SIZE = Size(rows=50, columns=160)
+
+_benchmarks = []
+
+
+def benchmark(name):
+    """
+    Register a benchmark. The decorated function does the setup, and returns
+    a callable that executes one operation.
+    """
+    def decorator(setup):
+        _benchmarks.append((name, setup))
+        return setup
+    return decorator
+
+
+class _NullStream(object):
+    " Output stream that discards everything. "
+    encoding = 'utf-8'
+
+    def write(self, data):
+        pass
+
+    def flush(self):
+        pass
+
+
+def _create_output():
+    return Vt100_Output(_NullStream(), lambda: SIZE)
+
+
+def _create_app(container, full_screen=True, **kw):
+    return Application(
+        layout=Layout(container), full_screen=full_screen,
+        input=create_pipe_input(), output=_create_output(), **kw)
+
+
+def _render(app):
+    " Render the application, like `Application._redraw` does. "
+    with set_app(app):
+        app.render_counter += 1
+        app.renderer.render(app, app.layout)
+
+
+def _large_text(lines=10000):
+    return '\n'.join('line %i: the quick brown fox jumps over the lazy dog' % i
+                     for i in range(lines))
+
+
+# Benchmarks.
+
+@benchmark('document')
+def bench_document():
+    " Create a Document for a large text and query the cursor position. "
+    text = _large_text()
+    positions = list(range(0, len(text), len(text) // 100))
+    i = [0]
+
+    def run():
+        i[0] += 1
+        document = Document(text + 'x' * (i[0] % 2), positions[i[0] % 100])
+        document.cursor_position_row
+        document.cursor_position_col
+        document.translate_row_col_to_index(5000, 10)
+        document.get_word_before_cursor()
+    return run
+
+
+@benchmark('buffer-insert')
+def bench_buffer_insert():
+    " Insert a character in the middle of a large buffer. "
+    buff = Buffer()
+    buff.text = _large_text()
+    buff.cursor_position = len(buff.text) // 2
+
+    def run():
+        buff.insert_text('x')
+        buff.document.cursor_position_row
+    return run
+
+
+@benchmark('typing')
+def bench_typing():
+    " Type a key in a large buffer and render. "
+    buff = Buffer()
+    buff.text = _large_text()
+    buff.cursor_position = len(buff.text) // 2
+    app = _create_app(Window(BufferControl(buff)))
+
+    def run():
+        with set_app(app):
+            app.key_processor.feed(KeyPress('x'))
+            app.key_processor.process_keys()
+        _render(app)
+    return run
+
+
+@benchmark('dashboard')
+def bench_dashboard():
+    " Render a full screen application with many windows that change. "
+    counter = [0]
+
+    def get_text(i):
+        return lambda: [('class:title', 'Panel %i' % i), ('', '\n'),
+                        ('', 'value: %i' % (counter[0] * (i + 1))), ('', '\n'),
+                        ('class:bar', '#' * ((counter[0] + i) % 30))]
+
+    rows = [VSplit([Window(FormattedTextControl(get_text(row * 8 + column)))
+                    for column in range(8)]) for row in range(10)]
+    app = _create_app(HSplit(rows))
+
+    def run():
+        counter[0] += 1
+        _render(app)
+    return run
+
+
+@benchmark('completion-menu')
+def bench_completion_menu():
+    " Move through a big completion menu and render. "
+    buff = Buffer()
+    buff._set_completions([Completion('completion_%i' % i, display_meta='meta %i' % i)
+                           for i in range(5000)])
+    app = _create_app(FloatContainer(
+        Window(BufferControl(buff)),
+        floats=[Float(xcursor=True, ycursor=True, content=CompletionsMenu(max_height=16))]))
+
+    def run():
+        buff.complete_next()
+        _render(app)
+    return run
+
+
+@benchmark('fuzzy-completion')
+def bench_fuzzy_completion():
+    " Fuzzy completion of one character over 200,000 words. "
+    parts = ['get', 'set', 'user', 'name', 'order', 'item', 'total', 'status']
+    words = ['%s_%s_%i' % (parts[i % 8], parts[i // 8 % 8], i) for i in range(200000)]
+    completer = FuzzyWordCompleter(words)
+    documents = [Document('e'), Document('s')]  # (Broad patterns.)
+    i = [0]
+
+    def run():
+        i[0] += 1
+        for _ in completer.get_completions(documents[i[0] % 2], CompleteEvent()):
+            pass
+    return run
+
+
+@benchmark('screen-diff')
+def bench_screen_diff():
+    " Output the difference between two full screens. "
+    def create_screen(char):
+        screen = Screen()
+        for y in range(SIZE.rows):
+            for x in range(SIZE.columns):
+                c = char if (x + y) % 10 == 0 else 'a'
+                screen.data_buffer[y][x] = _CHAR_CACHE[c, 'class:text']
+        screen.height = SIZE.rows
+        return screen
+
+    screens = [create_screen('x'), create_screen('y')]
+    output = _create_output()
+    app = _create_app(Window())
+    attrs = _StyleStringToAttrsCache(
+        Style([('text', '#ff0000')]).get_attrs_for_style_str, DummyStyleTransformation())
+    i = [0]
+
+    def run():
+        i[0] += 1
+        _output_screen_diff(
+            app, output, screens[i[0] % 2], Point(x=0, y=0),
+            color_depth=ColorDepth.DEPTH_8_BIT,
+            previous_screen=screens[(i[0] + 1) % 2], attrs_for_style_string=attrs,
+            size=SIZE, previous_width=SIZE.columns)
+        output.flush()
+    return run
+
+
+@benchmark('vt100-parser')
+def bench_vt100_parser():
+    " Parse 10KB of input: text with escape sequences. "
+    parser = Vt100Parser(lambda key_press: None)
+    data = ('hello world \x1b[A\x1b[B\r' * 600)[:10000]
+
+    def run():
+        parser.feed(data)
+    return run
+
+
+@benchmark('paste')
+def bench_paste():
+    " Paste 10KB of text without bracketed paste: parse and process the keys. "
+    buff = Buffer(multiline=True)
+    app = _create_app(Window(BufferControl(buff)))
+    data = ('def hello():\r    print("hello world")\r' * 300)[:10000]
+
+    def run():
+        buff.reset()
+        with set_app(app):
+            parser = Vt100Parser(app.key_processor.feed)
+            parser.feed(data)
+            app.key_processor.process_keys()
+    return run
+
+
+@benchmark('bracketed-paste')
+def bench_bracketed_paste():
+    " Paste 1MB of text with bracketed paste. "
+    buff = Buffer(multiline=True)
+    app = _create_app(Window(BufferControl(buff)))
+    data = '\x1b[200~' + _large_text(20000) + '\x1b[201~'
+
+    def run():
+        buff.reset()
+        with set_app(app):
+            parser = Vt100Parser(app.key_processor.feed)
+            parser.feed(data)
+            app.key_processor.process_keys()
+    return run
+
+
+@benchmark('invalidate')
+def bench_invalidate():
+    " Run an application that is invalidated 2000 times from another thread. "
+    counter = [0]
+
+    def run():
+        app = _create_app(Window(FormattedTextControl(lambda: 'count: %i' % counter[0])))
+
+        def invalidate():
+            for i in range(2000):
+                counter[0] += 1
+                app.invalidate()
+            call_from_executor(app.exit)
+
+        app.run(pre_run=lambda: threading.Thread(target=invalidate).start())
+    return run
+
+
+# Runner.
+
+def _measure(run, min_time=.2, repeat=5):
+    """
+    Return (time per operation, peak memory in bytes).
+    """
+    run()  # Warm up.
+
+    # Find the number of operations that takes `min_time`.
+    number = 1
+    while True:
+        start = _time()
+        for _ in range(number):
+            run()
+        duration = _time() - start
+        if duration >= min_time:
+            break
+        number *= 2 if duration < min_time / 4 else 1.5
+        number = int(number)
+
+    times = [duration / number]
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat - 1):
+            start = _time()
+            for _ in range(number):
+                run()
+            times.append((_time() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    # Memory.
+    if tracemalloc is None:
+        peak = None
+    else:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return min(times), peak
+
+
+def _format_time(seconds):
+    for unit, factor in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * factor >= 1:
+            return '%.2f %s' % (seconds * factor, unit)
+    return '%.2f ns' % (seconds * 1e9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('names', nargs='*', help='Benchmarks to run.')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks.')
+    parser.add_argument('--save', metavar='FILE', help='Save the results as JSON.')
+    parser.add_argument('--compare', metavar='FILE', help='Compare with saved results.')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, setup in _benchmarks:
+            print('%-20s %s' % (name, setup.__doc__.strip()))
+        return
+
+    unknown = set(args.names) - set(name for name, _ in _benchmarks)
+    if unknown:
+        parser.error('Unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    results = {}
+
+    for name, setup in _benchmarks:
+        if args.names and name not in args.names:
+            continue
+
+        seconds, peak = _measure(setup())
+        results[name] = {'time': seconds, 'peak_memory': peak}
+
+        line = '%-20s %12s' % (name, _format_time(seconds))
+        if peak is not None:
+            line += ' %10.1f KiB' % (peak / 1024.)
+        if name in previous:
+            line += '   %+.1f%%' % ((seconds / previous[name]['time'] - 1) * 100)
+        print(line)
+        sys.stdout.flush()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()